@@ -1,7 +1,35 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User
+from .models import User, Post, Tag
+from .forms import PostForm
+from .services import sync_post_tags
 
 # User Model
 
-# admin.site.register(User, UserAdmin)
\ No newline at end of file
+# admin.site.register(User, UserAdmin)
+
+
+class PostAdminForm(PostForm):
+    """PostForm with the author editable; tags are entered comma-separated like on the site"""
+
+    class Meta(PostForm.Meta):
+        fields = ['title', 'content', 'author']
+
+
+@admin.register(Post)
+class PostAdmin(admin.ModelAdmin):
+    form = PostAdminForm
+    list_display = ['title', 'author', 'published_date']
+    list_select_related = ['author']
+    search_fields = ['title']
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # The admin saves with commit=False, so PostForm.save leaves tags to us
+        sync_post_tags(form.instance, form.cleaned_data.get('tags_input', []))
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug']
+    search_fields = ['name']
@@ -0,0 +1,88 @@
+"""
+Rendered post cards (blog/includes/post_card.html), cached per post.
+
+A card's cache key carries the post id and its ``published_date``, which is
+bumped on every save, so edited posts miss on their own. What a card shows from
+other rows (tags, the author's username) is invalidated by the receivers below.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.template.loader import render_to_string
+
+from .models import Post, Tag
+from .queries import prefetch_card_data
+
+
+# Bump when post_card.html changes so cached cards are not served in the old markup
+CARD_VERSION = 2
+
+
+def card_key(post_id, published_date):
+    return f'blog:post_card:{CARD_VERSION}:{post_id}:{published_date.timestamp()}'
+
+
+def render_post_cards(posts):
+    """
+    HTML for each post in ``posts``, in order: one cache get_many, and tags are
+    prefetched and templates rendered only for the cards that missed
+    """
+    posts = list(posts)
+    keys = [card_key(post.pk, post.published_date) for post in posts]
+    cards = cache.get_many(keys)
+    misses = [post for post, key in zip(posts, keys) if key not in cards]
+    if misses:
+        prefetch_card_data(misses)
+        rendered = {card_key(post.pk, post.published_date): render_to_string('blog/includes/post_card.html', {'post': post}) for post in misses}
+        cache.set_many(rendered, getattr(settings, 'BLOG_POST_CARD_TIMEOUT', 60 * 60 * 24))
+        cards.update(rendered)
+    return [cards[key] for key in keys]
+
+
+def invalidate_cards(post_ids):
+    """
+    Drop the cached cards of the posts with ``post_ids``
+    """
+    post_ids = list(post_ids)
+    if post_ids:
+        dates = Post.objects.filter(pk__in=post_ids).values_list('pk', 'published_date')
+        cache.delete_many([card_key(pk, published_date) for pk, published_date in dates])
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance, **kwargs):
+    cache.delete(card_key(instance.pk, instance.published_date))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_retagged_posts(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # tag.posts.clear(): the posts are only known before the rows go
+        invalidate_cards(instance.posts.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            invalidate_cards([instance.pk])
+        elif pk_set:
+            invalidate_cards(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+def invalidate_renamed_tag(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        invalidate_cards(instance.posts.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def invalidate_deleted_tag(sender, instance, **kwargs):
+    invalidate_cards(instance.posts.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_author_cards(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    # Logins save last_login only; anything else may have changed the username on the cards
+    if created or raw or (update_fields is not None and 'username' not in update_fields):
+        return
+    invalidate_cards(instance.posts.values_list('pk', flat=True))
@@ -2,7 +2,8 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
-from .models import Post, Comment, Tag
+from .models import Post, Comment
+from .services import sync_post_tags
 
 class TagWidget(forms.TextInput):
     """
@@ -128,7 +129,7 @@ class PostForm(forms.ModelForm):
     
     def save(self, commit=True):
         """
-        Save the post and handle tag creation/association
+        Save the post and sync its tags to the ones entered
         """
         # Save the post first
         post = super().save(commit=False)
@@ -136,19 +137,8 @@ class PostForm(forms.ModelForm):
         if commit:
             post.save()
             
-            # Handle tags
-            tag_names = self.cleaned_data.get('tags_input', [])
-            
-            # Clear existing tags
-            post.tags.clear()
-            
-            # Create or get tags and add to post
-            for tag_name in tag_names:
-                tag, created = Tag.objects.get_or_create(
-                    name=tag_name,
-                    defaults={'slug': tag_name.lower().replace(' ', '-')}
-                )
-                post.tags.add(tag)
+            # Handle tags: only the added/removed ones are written
+            sync_post_tags(post, self.cleaned_data.get('tags_input', []))
         
         return post
 
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text post search index from the post and tag tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Posts indexed per statement batch")
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        if backend is None:
+            raise CommandError('No post search backend for this database')
+        backend.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Post search index rebuilt with {type(backend).__name__}'))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from blog.models import Post, Tag
+
+
+class Command(BaseCommand):
+    help = "Recompute Tag.post_count from the post/tag table and fix any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows written per bulk update")
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without writing")
+
+    def handle(self, *args, **options):
+        PostTag = Post.tags.through
+        counts = PostTag.objects.filter(tag=OuterRef('pk')).order_by().values('tag').annotate(total=Count('pk')).values('total')
+        drifted = (
+            Tag.objects
+            .annotate(actual=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0)))
+            .exclude(post_count=F('actual'))
+            .only('id', 'post_count')
+            .order_by('id')
+        )
+
+        fixed = 0
+        batch = []
+        for tag in drifted.iterator(chunk_size=options['batch_size']):
+            tag.post_count = tag.actual
+            batch.append(tag)
+            if len(batch) >= options['batch_size']:
+                fixed += self.write(batch, options['dry_run'])
+                batch = []
+        if batch:
+            fixed += self.write(batch, options['dry_run'])
+
+        verb = "would fix" if options['dry_run'] else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"Tag post counts {verb} for {fixed} tag(s)"))
+
+    def write(self, tags, dry_run):
+        if not dry_run:
+            with transaction.atomic():
+                Tag.objects.bulk_update(tags, ['post_count'])
+        return len(tags)
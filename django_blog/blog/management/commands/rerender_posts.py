@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.cards import invalidate_cards
+from blog.models import Post
+from blog.rendering import RENDERER_VERSION, render_post
+
+
+class Command(BaseCommand):
+    help = "Re-render Post.content_html/excerpt for posts rendered by an older renderer version"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Posts rendered per bulk update")
+        parser.add_argument('--all', action='store_true', help="Re-render every post, e.g. after changing BLOG_CONTENT_FORMAT")
+
+    def handle(self, *args, **options):
+        posts = Post.objects.only('id', 'content', 'renderer_version').order_by('id')
+        if not options['all']:
+            posts = posts.exclude(renderer_version=RENDERER_VERSION)
+
+        rendered = 0
+        batch = []
+        for post in posts.iterator(chunk_size=options['batch_size']):
+            render_post(post)
+            batch.append(post)
+            if len(batch) >= options['batch_size']:
+                rendered += self.write(batch)
+                batch = []
+        if batch:
+            rendered += self.write(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Re-rendered {rendered} post(s) with renderer version {RENDERER_VERSION}"))
+
+    def write(self, posts):
+        # bulk_update leaves published_date alone, so the cached cards must be dropped explicitly
+        with transaction.atomic():
+            Post.objects.bulk_update(posts, ['content_html', 'excerpt', 'renderer_version'])
+        invalidate_cards([post.pk for post in posts])
+        return len(posts)
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    # prefix='2 3' keeps prefix queries on partially typed words on an index
+    "CREATE VIRTUAL TABLE blog_post_fts USING fts5("
+    "title, content, tags, tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')",
+    "INSERT INTO blog_post_fts (rowid, title, content, tags) "
+    "SELECT p.id, p.title, p.content, COALESCE((SELECT group_concat(t.name, ' ') FROM blog_post_tags pt "
+    "JOIN blog_tag t ON t.id = pt.tag_id WHERE pt.post_id = p.id), '') FROM blog_post p",
+]
+SQLITE_BACKWARD = ['DROP TABLE IF EXISTS blog_post_fts']
+
+POSTGRES_FORWARD = [
+    'CREATE TABLE blog_post_search ('
+    'post_id bigint PRIMARY KEY REFERENCES blog_post (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+    'document tsvector NOT NULL)',
+    'CREATE INDEX blog_post_search_document_idx ON blog_post_search USING gin (document)',
+    "INSERT INTO blog_post_search (post_id, document) "
+    "SELECT p.id, setweight(to_tsvector('english', p.title), 'A') "
+    "|| setweight(to_tsvector('english', COALESCE((SELECT string_agg(t.name, ' ') FROM blog_post_tags pt "
+    "JOIN blog_tag t ON t.id = pt.tag_id WHERE pt.post_id = p.id), '')), 'B') "
+    "|| setweight(to_tsvector('english', p.content), 'C') FROM blog_post p",
+]
+POSTGRES_BACKWARD = ['DROP TABLE IF EXISTS blog_post_search']
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_tag_comment_post_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_post_counts(apps, schema_editor):
+    Tag = apps.get_model('blog', 'Tag')
+    PostTag = apps.get_model('blog', 'Post').tags.through
+    counts = PostTag.objects.filter(tag=OuterRef('pk')).order_by().values('tag').annotate(total=Count('pk')).values('total')
+    Tag.objects.update(post_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['-post_count', 'name'], name='tag_popularity_idx'),
+        ),
+        migrations.RunPython(populate_post_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+import html
+
+from django.db import migrations, models
+from django.utils.html import linebreaks, strip_tags
+from django.utils.text import Truncator
+
+
+# Frozen copy of blog.rendering's plain-text output at renderer version 1, so this
+# migration keeps producing the same result whatever the live renderer becomes.
+# Rows stamped with it are brought up to date by `manage.py rerender_posts`.
+RENDERER_VERSION = 1
+
+
+def render_posts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    batch = []
+    for post in Post.objects.only('id', 'content').order_by('id').iterator(chunk_size=1000):
+        post.content_html = linebreaks(post.content, autoescape=True)
+        post.excerpt = Truncator(html.unescape(strip_tags(post.content_html))).words(50)
+        post.renderer_version = RENDERER_VERSION
+        batch.append(post)
+        if len(batch) >= 1000:
+            Post.objects.bulk_update(batch, ['content_html', 'excerpt', 'renderer_version'])
+            batch = []
+    Post.objects.bulk_update(batch, ['content_html', 'excerpt', 'renderer_version'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_tag_post_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='renderer_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(render_posts, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,5 @@
+import hashlib
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.conf import settings
@@ -5,6 +7,8 @@ from taggit.models import Tag
 
 from django.utils.text import slugify
 
+from .rendering import needs_render, render_post
+
 # == User Model == #
 # class User(User):
 #     email = models.EmailField(unique=True)
@@ -15,6 +19,14 @@ from django.utils.text import slugify
 #         return self.email
 
 
+def tag_slug(name):
+    """
+    URL slug for a tag name, keeping non-Latin letters ("日本" stays "日本");
+    names with nothing sluggable ("!!!") get a stable hash-based slug
+    """
+    return slugify(name, allow_unicode=True) or 'tag-' + hashlib.md5(name.encode()).hexdigest()[:12]
+
+
 class Tag(models.Model):
     """
     Tag model for categorizing posts
@@ -24,11 +36,17 @@ class Tag(models.Model):
     """
     
     name = models.CharField(max_length=50, unique=True)
-    slug = models.SlugField(max_length=50, unique=True, blank=True)
+    slug = models.SlugField(max_length=50, unique=True, blank=True, allow_unicode=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Number of posts with this tag, kept up to date by blog.signals
+    post_count = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         ordering = ['name']
+        indexes = [
+            # Tag cloud: the most used tags, read straight off the index
+            models.Index(fields=['-post_count', 'name'], name='tag_popularity_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         """
@@ -36,7 +54,7 @@ class Tag(models.Model):
         Example: "Django Tips" → "django-tips"
         """
         if not self.slug:
-            self.slug = slugify(self.name)
+            self.slug = tag_slug(self.name)
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -63,10 +81,31 @@ class Post(models.Model):
         related_name='posts',      # Allows tag.posts.all()
         blank=True  
     ) 
+    # Rendered once on save by blog.rendering, so pages don't re-process the body
+    content_html = models.TextField(blank=True, editable=False)
+    excerpt = models.TextField(blank=True, editable=False)
+    renderer_version = models.PositiveSmallIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # Remember what content_html was rendered from, to skip re-rendering unchanged bodies
+        post._rendered_content = post.__dict__.get('content')
+        return post
+    
+    def save(self, *args, **kwargs):
+        """
+        Re-render content_html and excerpt when the content changed or the renderer was bumped
+        """
+        if 'content' not in self.get_deferred_fields() and needs_render(self):
+            rendered = render_post(self)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], *rendered}
+        super().save(*args, **kwargs)
+    
     class Meta:
         # Add newest posts first
         ordering = ['-published_date']
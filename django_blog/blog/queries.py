@@ -0,0 +1,41 @@
+"""
+Queries for the listing pages: posts with what their cards display, and the tag cloud.
+"""
+
+import math
+
+from django.db.models import prefetch_related_objects
+
+from .models import Post, Tag
+
+
+def post_list_queryset():
+    """
+    Posts newest first with their authors joined in; tags are prefetched separately
+    """
+    return Post.objects.select_related('author').order_by('-published_date', '-id')
+
+
+def prefetch_card_data(posts):
+    """
+    Load the tags of ``posts`` (a list) in one query
+    """
+    prefetch_related_objects(posts, 'tags')
+    return posts
+
+
+def tag_cloud(limit):
+    """
+    The ``limit`` most used tags, alphabetical, each with a ``size`` from 1 to 5
+
+    Reads the top of tag_popularity_idx instead of counting the post/tag table.
+    Sizes are spread on a log scale, since a few tags usually dominate.
+    """
+    tags = list(Tag.objects.filter(post_count__gt=0).order_by('-post_count', 'name')[:limit])
+    if not tags:
+        return []
+    low, high = math.log(tags[-1].post_count), math.log(tags[0].post_count)
+    for tag in tags:
+        share = (math.log(tag.post_count) - low) / (high - low) if high > low else 1
+        tag.size = 1 + round(share * 4)
+    return sorted(tags, key=lambda tag: tag.name.lower())
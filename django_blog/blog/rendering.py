@@ -0,0 +1,81 @@
+"""
+Post content pipeline: bodies are rendered once, when saved, into
+Post.content_html and Post.excerpt, so list and detail pages print stored
+columns instead of re-tokenizing every body on every request.
+
+Plain text is rendered the way the templates used to (escaped, then
+``linebreaks``). With ``BLOG_CONTENT_FORMAT = 'markdown'`` bodies are rendered
+as Markdown with raw HTML disabled, then sanitized with nh3: Markdown links and
+images take any URL, so ``[x](javascript:...)`` would otherwise be stored as
+script. Markdown mode needs both the optional ``markdown`` and ``nh3``
+packages and refuses to render without them. Bump RENDERER_VERSION whenever
+the output would change, then run ``manage.py rerender_posts``; after switching
+BLOG_CONTENT_FORMAT, run it with ``--all``.
+"""
+
+import html
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.html import linebreaks, strip_tags
+from django.utils.text import Truncator
+
+try:
+    import markdown
+except ImportError:
+    markdown = None
+
+try:
+    import nh3
+except ImportError:
+    nh3 = None
+
+
+RENDERER_VERSION = 2
+EXCERPT_WORDS = 50
+# Link and image URLs allowed through the sanitizer; anything else (javascript:, data:, ...) is dropped
+URL_SCHEMES = {'http', 'https', 'mailto'}
+
+
+def render_markdown(text):
+    if markdown is None or nh3 is None:
+        raise ImproperlyConfigured("BLOG_CONTENT_FORMAT = 'markdown' needs the markdown and nh3 packages installed")
+    md = markdown.Markdown(extensions=['fenced_code', 'sane_lists'])
+    # No raw HTML from post bodies: it is treated as text and escaped
+    md.preprocessors.deregister('html_block')
+    md.inlinePatterns.deregister('html')
+    return nh3.clean(md.convert(text), url_schemes=URL_SCHEMES, link_rel='nofollow noopener noreferrer')
+
+
+def render_content(text):
+    """
+    Post body -> safe HTML
+    """
+    if getattr(settings, 'BLOG_CONTENT_FORMAT', 'text') == 'markdown':
+        return render_markdown(text)
+    return linebreaks(text, autoescape=True)
+
+
+def make_excerpt(content_html):
+    """
+    Plain-text excerpt of rendered HTML, cut like ``truncatewords``; templates escape it again
+    """
+    return Truncator(html.unescape(strip_tags(content_html))).words(EXCERPT_WORDS)
+
+
+def render_post(post):
+    """
+    Fill ``post``'s rendered columns; returns the field names it set
+    """
+    post.content_html = render_content(post.content)
+    post.excerpt = make_excerpt(post.content_html)
+    post.renderer_version = RENDERER_VERSION
+    post._rendered_content = post.content
+    return ['content_html', 'excerpt', 'renderer_version']
+
+
+def needs_render(post):
+    """
+    True if ``post``'s content changed since it was loaded/rendered, or was rendered by an older version
+    """
+    return post.renderer_version != RENDERER_VERSION or post.content != getattr(post, '_rendered_content', None)
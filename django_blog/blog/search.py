@@ -0,0 +1,307 @@
+"""
+Full-text post search.
+
+PostSearchView used to OR ``icontains`` over title, content and tag names and
+then DISTINCT the join, scanning every post on every query. Posts are now
+indexed into a database-native full-text index, one document per post (title,
+content and its tag names), kept in sync from Post saves/deletes, tag
+assignments and tag renames:
+
+* SQLite: an FTS5 virtual table ranked with bm25(), snippets from snippet().
+* PostgreSQL: a weighted tsvector (GIN) ranked with ts_rank_cd, snippets from ts_headline.
+
+Both backends expose the same ``index``/``remove``/``count``/``search``
+interface, chosen by database vendor unless ``POST_SEARCH_BACKEND`` names a
+class explicitly. Snippets come back with matches wrapped in ``<mark>`` and
+everything else HTML-escaped.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from .models import Post, Tag
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# Private-use characters the backends wrap matches in, swapped for <mark> after escaping
+MARK_START, MARK_END = '\ue000', '\ue001'
+
+
+def query_terms(query):
+    return TOKEN_RE.findall(query.lower())[:8]
+
+
+def highlight(snippet):
+    """
+    Escape a backend snippet and turn its match markers into <mark> tags
+    """
+    if not snippet:
+        return ''
+    return mark_safe(escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+def documents(post_ids):
+    """
+    (id, title, content, tag names) for each existing post in ``post_ids``
+    """
+    tags = {}
+    for post_id, name in Post.tags.through.objects.filter(post_id__in=post_ids).values_list('post_id', 'tag__name'):
+        tags.setdefault(post_id, []).append(name)
+    return [
+        (pk, title, content, ' '.join(tags.get(pk, [])))
+        for pk, title, content in Post.objects.filter(pk__in=post_ids).values_list('pk', 'title', 'content')
+    ]
+
+
+class BasePostSearch:
+    """
+    Interface shared by the search backends
+    """
+    table = None
+
+    def index(self, post_ids):
+        raise NotImplementedError
+
+    def remove(self, post_ids):
+        raise NotImplementedError
+
+    def count(self, query, limit):
+        """
+        Number of matching posts, counting no further than ``limit``
+        """
+        raise NotImplementedError
+
+    def search(self, query, limit=10, offset=0):
+        """
+        Return up to ``limit`` (post id, snippet) pairs, best match first
+        """
+        raise NotImplementedError
+
+    def rebuild(self, batch_size=1000):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+        post_ids = Post.objects.order_by('pk').values_list('pk', flat=True)
+        batch = []
+        for post_id in post_ids.iterator(chunk_size=batch_size):
+            batch.append(post_id)
+            if len(batch) >= batch_size:
+                self.index(batch)
+                batch = []
+        if batch:
+            self.index(batch)
+
+
+class SQLiteFTSPostSearch(BasePostSearch):
+    """
+    FTS5 virtual table keyed by post id (rowid)
+    """
+    table = 'blog_post_fts'
+    # bm25 column weights: title matches matter most, then tags, then the body
+    weights = (10.0, 1.0, 5.0)
+
+    def match(self, query):
+        terms = query_terms(query)
+        # Every term must match; the last one as a prefix so partially typed words still hit
+        quoted = ['"{}"'.format(term.replace('"', '""')) for term in terms]
+        if quoted:
+            quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def index(self, post_ids):
+        rows = documents(post_ids)
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(post_id,) for post_id in post_ids])
+            cursor.executemany(f'INSERT INTO {self.table} (rowid, title, content, tags) VALUES (%s, %s, %s, %s)', rows)
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(post_id,) for post_id in post_ids])
+
+    def count(self, query, limit):
+        match = self.match(query)
+        if not match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM (SELECT 1 FROM {self.table} WHERE {self.table} MATCH %s LIMIT %s)',
+                [match, limit],
+            )
+            return cursor.fetchone()[0]
+
+    def search(self, query, limit=10, offset=0):
+        match = self.match(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, snippet({self.table}, 1, %s, %s, '…', 40) FROM {self.table} "
+                f'WHERE {self.table} MATCH %s ORDER BY bm25({self.table}, %s, %s, %s) LIMIT %s OFFSET %s',
+                [MARK_START, MARK_END, match, *self.weights, limit, offset],
+            )
+            return cursor.fetchall()
+
+
+class PostgresPostSearch(BasePostSearch):
+    """
+    Weighted tsvector document (GIN) per post
+    """
+    table = 'blog_post_search'
+    headline_options = f'StartSel={MARK_START}, StopSel={MARK_END}, MaxFragments=2, MaxWords=40, MinWords=15'
+
+    def tsquery(self, query):
+        terms = query_terms(query)
+        return ' & '.join(terms[:-1] + [f'{terms[-1]}:*']) if terms else ''
+
+    def index(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {self.table} (post_id, document) VALUES (%s, '
+                "setweight(to_tsvector('english', %s), 'A') || setweight(to_tsvector('english', %s), 'B') "
+                "|| setweight(to_tsvector('english', %s), 'C')) "
+                'ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document',
+                [(pk, title, tags, content) for pk, title, content, tags in documents(post_ids)],
+            )
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE post_id = ANY(%s)', [list(post_ids)])
+
+    def count(self, query, limit):
+        tsquery = self.tsquery(query)
+        if not tsquery:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM (SELECT 1 FROM {self.table} WHERE document @@ to_tsquery('english', %s) LIMIT %s) AS hits",
+                [tsquery, limit],
+            )
+            return cursor.fetchone()[0]
+
+    def search(self, query, limit=10, offset=0):
+        tsquery = self.tsquery(query)
+        if not tsquery:
+            return []
+        # Rank first, then build headlines only for the page being returned
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT hits.post_id, ts_headline('english', blog_post.content, to_tsquery('english', %s), %s) "
+                f"FROM (SELECT post_id, ts_rank_cd(document, to_tsquery('english', %s)) AS rank FROM {self.table} "
+                "WHERE document @@ to_tsquery('english', %s) ORDER BY rank DESC LIMIT %s OFFSET %s) AS hits "
+                'JOIN blog_post ON blog_post.id = hits.post_id ORDER BY hits.rank DESC',
+                [tsquery, self.headline_options, tsquery, tsquery, limit, offset],
+            )
+            return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTSPostSearch,
+    'postgresql': PostgresPostSearch,
+}
+
+
+def get_backend():
+    path = getattr(settings, 'POST_SEARCH_BACKEND', None)
+    backend_class = import_string(path) if path else BACKENDS.get(connection.vendor)
+    return backend_class() if backend_class else None
+
+
+class SearchResults:
+    """
+    Lazily ranked search results that a Paginator can count and slice.
+
+    Each slice runs one ranked query for just that page and loads its posts with
+    authors and tags; every post gets a ``search_snippet`` with highlighted matches.
+    """
+    def __init__(self, backend, query, max_results=None):
+        self.backend = backend
+        self.query = query
+        self.max_results = max_results or getattr(settings, 'POST_SEARCH_MAX_RESULTS', 1000)
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.query, self.max_results)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, min(key.stop or self.max_results, self.max_results)
+        if stop <= start:
+            return []
+        hits = self.backend.search(self.query, limit=stop - start, offset=start)
+        posts = Post.objects.select_related('author').prefetch_related('tags').in_bulk([post_id for post_id, _ in hits])
+        results = []
+        for post_id, snippet in hits:
+            post = posts.get(post_id)
+            if post is not None:
+                post.search_snippet = highlight(snippet)
+                results.append(post)
+        return results
+
+
+# Index sync
+
+def reindex(post_ids):
+    backend = get_backend()
+    if backend is not None and post_ids:
+        backend.index(list(post_ids))
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        reindex([instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+def remove_deleted_post(sender, instance, **kwargs):
+    backend = get_backend()
+    if backend is not None:
+        backend.remove([instance.pk])
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def index_retagged_posts(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        reindex([instance.pk])
+    elif action == 'post_clear':
+        # tag.posts.clear(): the affected posts were recorded by pre_clear below
+        reindex(getattr(instance, '_search_post_ids', []))
+    else:
+        reindex(pk_set)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def remember_cleared_posts(sender, instance, action, reverse, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._search_post_ids = list(instance.posts.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Tag)
+def index_renamed_tag(sender, instance, created, raw=False, **kwargs):
+    # A new tag has no posts yet; a saved one may have been renamed
+    if not created and not raw:
+        reindex(instance.posts.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_deleted_tag_posts(sender, instance, **kwargs):
+    instance._search_post_ids = list(instance.posts.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def index_deleted_tag_posts(sender, instance, **kwargs):
+    reindex(getattr(instance, '_search_post_ids', []))
@@ -0,0 +1,56 @@
+"""
+Write paths shared by the blog's forms and admin.
+"""
+
+from django.db import transaction
+
+from .models import Tag, tag_slug
+
+
+@transaction.atomic
+def sync_post_tags(post, tag_names):
+    """
+    Make ``post``'s tags exactly ``tag_names``, touching only what changed
+
+    Costs a fixed handful of queries whatever the number of tags: the current
+    tags, one IN lookup for the new names, a bulk insert (and re-read) of the
+    ones that don't exist yet, then one add and one remove on the through
+    table. Going through post.tags.add/remove keeps the m2m_changed receivers
+    (search index, counters) informed of the delta.
+    """
+    desired = list(dict.fromkeys(name.strip() for name in tag_names if name.strip()))
+    current = dict(post.tags.values_list('name', 'id'))
+
+    # Names resolve to tag ids first, and the diff is taken on ids: a name that
+    # maps onto a tag the post already has ("django" -> "Django") changes nothing
+    wanted = {current[name] for name in desired if name in current}
+    wanted.update(resolve_tag_ids([name for name in desired if name not in current]).values())
+    current_ids = set(current.values())
+
+    to_add = wanted - current_ids
+    to_remove = current_ids - wanted
+    if to_add:
+        post.tags.add(*to_add)
+    if to_remove:
+        post.tags.remove(*to_remove)
+
+
+def resolve_tag_ids(names):
+    """
+    {name: tag id} for ``names``, creating the tags that don't exist yet
+    """
+    if not names:
+        return {}
+    tags = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = [name for name in names if name not in tags]
+    if missing:
+        # Concurrent saves may create the same tags; ignore_conflicts lets them race
+        Tag.objects.bulk_create([Tag(name=name, slug=tag_slug(name)) for name in missing], ignore_conflicts=True)
+        tags.update(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+        # A name whose slug is taken by a differently written tag ("Django Tips" vs
+        # "django tips") was not inserted; it means the tag that owns the slug
+        clashing = {tag_slug(name): name for name in missing if name not in tags}
+        if clashing:
+            for slug, tag_id in Tag.objects.filter(slug__in=clashing).values_list('slug', 'id'):
+                tags[clashing[slug]] = tag_id
+    return tags
@@ -0,0 +1,72 @@
+from collections import Counter, defaultdict
+
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, pre_delete
+from django.dispatch import receiver
+
+from .models import Post, Tag
+
+
+PostTag = Post.tags.through
+
+
+def tag_pairs(instance, reverse, pk_set):
+    """
+    Normalize an m2m_changed call on Post.tags to (post_id, tag_id) pairs
+    """
+    if reverse:
+        # tag.posts.add(...): instance is the tag
+        return [(pk, instance.pk) for pk in pk_set]
+    return [(instance.pk, pk) for pk in pk_set]
+
+
+def existing_tag_pairs(instance, reverse, pk_set=None):
+    """
+    The post/tag rows that currently exist for ``instance`` (optionally limited to ``pk_set``)
+    """
+    own, other = ('tag_id', 'post_id') if reverse else ('post_id', 'tag_id')
+    rows = PostTag.objects.filter(**{own: instance.pk})
+    if pk_set is not None:
+        rows = rows.filter(**{f'{other}__in': pk_set})
+    return tag_pairs(instance, reverse, rows.values_list(other, flat=True))
+
+
+def update_post_counts(pairs, sign):
+    """
+    Apply +1/-1 per pair to Tag.post_count with F-expressions, one UPDATE per distinct delta
+    """
+    by_delta = defaultdict(list)
+    for tag_id, count in Counter(tag_id for _, tag_id in pairs).items():
+        by_delta[count].append(tag_id)
+    for count, tag_ids in by_delta.items():
+        Tag.objects.filter(id__in=tag_ids).update(post_count=F('post_count') + sign * count)
+
+
+@receiver(m2m_changed, sender=PostTag)
+def maintain_post_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep Tag.post_count in step with the M2M from either side, including admin edits.
+
+    Django only reports the ids it actually inserted on post_add, but removals report
+    whatever was asked for, so the rows that really exist are captured beforehand.
+    """
+    if action == 'post_add':
+        update_post_counts(tag_pairs(instance, reverse, pk_set), 1)
+    elif action == 'pre_remove':
+        instance._removed_tags = existing_tag_pairs(instance, reverse, pk_set)
+    elif action == 'pre_clear':
+        instance._removed_tags = existing_tag_pairs(instance, reverse)
+    elif action in ('post_remove', 'post_clear'):
+        update_post_counts(getattr(instance, '_removed_tags', []), -1)
+        instance._removed_tags = []
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post_tags(sender, instance, **kwargs):
+    # The cascade deletes the post's through rows without an m2m_changed
+    instance._removed_tags = existing_tag_pairs(instance, reverse=False)
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_post_tags(sender, instance, **kwargs):
+    update_post_counts(getattr(instance, '_removed_tags', []), -1)
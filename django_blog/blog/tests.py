@@ -1,3 +1,230 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import rendering
+from .cards import card_key
+from .models import Post, Tag
+from .search import get_backend
+from .services import sync_post_tags
+
+
+class SyncPostTagsTests(TestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.user = User.objects.create_user(username='alice', password='testpass123')
+        self.post = Post.objects.create(title='Post', content='Body', author=self.user)
+
+    def tag_names(self):
+        return sorted(self.post.tags.values_list('name', flat=True))
+
+    def test_sync_adds_and_removes_only_the_delta(self):
+        """Test syncing writes the added and removed tags and keeps the rest"""
+        sync_post_tags(self.post, ['python', 'django'])
+        kept = Tag.objects.get(name='python')
+        sync_post_tags(self.post, ['python', 'web'])
+        self.assertEqual(self.tag_names(), ['python', 'web'])
+        self.assertEqual(self.post.tags.get(name='python').pk, kept.pk)
+
+    def test_changing_case_keeps_the_existing_tag(self):
+        """Test a name that differs only in case maps onto the tag the post already has"""
+        sync_post_tags(self.post, ['Django'])
+        sync_post_tags(self.post, ['django'])
+        self.assertEqual(self.tag_names(), ['Django'])
+        self.assertEqual(Tag.objects.count(), 1)
+
+    def test_non_latin_names_are_all_kept(self):
+        """Test names that don't slugify to ASCII still get distinct tags"""
+        sync_post_tags(self.post, ['日本', '中国', '!!!'])
+        self.assertEqual(self.tag_names(), sorted(['日本', '中国', '!!!']))
+        self.assertTrue(all(Tag.objects.values_list('slug', flat=True)))
+
+    def test_query_count_does_not_grow_with_tags(self):
+        """Test syncing 15 new tags costs the same queries as syncing 2"""
+        other = Post.objects.create(title='Other', content='Body', author=self.user)
+        with CaptureQueriesContext(connection) as few:
+            sync_post_tags(other, ['a', 'b'])
+        with CaptureQueriesContext(connection) as many:
+            sync_post_tags(self.post, [f'tag{i}' for i in range(15)])
+        self.assertEqual(len(many), len(few))
+        self.assertEqual(len(self.tag_names()), 15)
+
+
+
+class PostSearchTests(TestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.user = User.objects.create_user(username='alice', password='testpass123')
+        self.post = Post.objects.create(title='Weekend notes', content='Climbing and coffee', author=self.user)
+        sync_post_tags(self.post, ['python'])
+
+    def hits(self, query):
+        return [post_id for post_id, _ in get_backend().search(query)]
+
+    def test_index_follows_retagging_renames_and_deletes(self):
+        """Test tag changes, tag renames and deletions are reflected in the index"""
+        self.assertEqual(self.hits('python'), [self.post.pk])
+        sync_post_tags(self.post, ['rust'])
+        self.assertEqual((self.hits('python'), self.hits('rust')), ([], [self.post.pk]))
+
+        tag = Tag.objects.get(name='rust')
+        tag.name = 'golang'
+        tag.save()
+        self.assertEqual((self.hits('rust'), self.hits('golang')), ([], [self.post.pk]))
+        tag.delete()
+        self.assertEqual(self.hits('golang'), [])
+
+        self.assertEqual(self.hits('climb'), [self.post.pk])
+        self.post.delete()
+        self.assertEqual(self.hits('climb'), [])
+
+    def test_search_page_ranks_titles_first_and_highlights(self):
+        """Test title matches outrank body matches and snippets mark the terms"""
+        titled = Post.objects.create(title='Coffee roasting', content='Beans', author=self.user)
+        response = self.client.get(reverse('post_search'), {'q': 'coffee'})
+        self.assertEqual([post.pk for post in response.context['posts']], [titled.pk, self.post.pk])
+        self.assertContains(response, '<mark>coffee</mark>')
+
+
+
+class PostCardTests(TestCase):
+    def setUp(self):
+        """Setup test data"""
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', password='testpass123')
+        self.post = Post.objects.create(title='Weekend notes', content='Climbing and coffee', author=self.user)
+        sync_post_tags(self.post, ['python'])
+
+    def cached_card(self):
+        self.post.refresh_from_db()
+        return cache.get(card_key(self.post.pk, self.post.published_date))
+
+    def test_cached_page_costs_two_queries(self):
+        """Test a page whose cards are cached runs only the count and the page query"""
+        self.client.get(reverse('post_list'))
+        self.assertIn('python', self.cached_card())
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('post_list'))
+        self.assertContains(response, 'Weekend notes')
+
+    def test_cards_are_dropped_when_what_they_show_changes(self):
+        """Test retagging, tag renames, tag deletion and author renames drop the card"""
+        def refill():
+            self.client.get(reverse('post_list'))
+            return self.cached_card()
+
+        refill()
+        sync_post_tags(self.post, ['python', 'web'])
+        self.assertIsNone(self.cached_card())
+        self.assertIn('web', refill())
+
+        tag = Tag.objects.get(name='web')
+        tag.name = 'www'
+        tag.save()
+        self.assertIsNone(self.cached_card())
+        self.assertIn('www', refill())
+
+        tag.delete()
+        self.assertIsNone(self.cached_card())
+        self.assertNotIn('www', refill())
+
+        self.user.username = 'alicia'
+        self.user.save()
+        self.assertIsNone(self.cached_card())
+        self.assertIn('By alicia', refill())
+
+
+
+class TagCountTests(TestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.user = User.objects.create_user(username='alice', password='testpass123')
+        self.posts = [Post.objects.create(title=f'Post {i}', content='Body', author=self.user) for i in range(3)]
+        self.python, self.web = Tag.objects.create(name='python'), Tag.objects.create(name='web')
+
+    def counts(self):
+        return dict(Tag.objects.values_list('name', 'post_count'))
+
+    def test_counts_follow_both_sides_of_the_relation(self):
+        """Test adds, removes, clears and post deletion keep Tag.post_count exact"""
+        for post in self.posts:
+            post.tags.add(self.python)
+        self.posts[0].tags.add(self.web, self.python)
+        self.assertEqual(self.counts(), {'python': 3, 'web': 1})
+
+        self.posts[1].tags.remove(self.python, self.web)
+        self.web.posts.add(self.posts[1], self.posts[2])
+        self.assertEqual(self.counts(), {'python': 2, 'web': 3})
+
+        self.posts[0].tags.clear()
+        self.assertEqual(self.counts(), {'python': 1, 'web': 2})
+        self.web.posts.clear()
+        self.posts[2].delete()
+        self.assertEqual(self.counts(), {'python': 0, 'web': 0})
+
+    def test_reconcile_command_fixes_drift(self):
+        """Test the reconciliation command rebuilds drifted counts"""
+        self.posts[0].tags.add(self.python)
+        Tag.objects.update(post_count=7)
+        out = StringIO()
+        call_command('reconcile_tag_counts', stdout=out)
+        self.assertIn('fixed for 2 tag(s)', out.getvalue())
+        self.assertEqual(self.counts(), {'python': 1, 'web': 0})
+
+    def test_tag_cloud_sizes_tags_by_use(self):
+        """Test the cloud lists used tags alphabetically, sized from 1 to 5"""
+        Tag.objects.create(name='unused')
+        for post in self.posts:
+            post.tags.add(self.web)
+        self.posts[0].tags.add(self.python)
+        response = self.client.get(reverse('tag_cloud'))
+        self.assertEqual([(tag.name, tag.size) for tag in response.context['tags']], [('python', 1), ('web', 5)])
+        self.assertContains(response, 'tag-size-5')
+
+
+class RenderingTests(TestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.user = User.objects.create_user(username='alice', password='testpass123')
+
+    def test_content_is_rendered_on_save_only_when_it_changes(self):
+        """Test saving renders escaped HTML and an excerpt, and skips unchanged bodies"""
+        post = Post.objects.create(title='Post', content='<script>x</script> & more\n\nSecond', author=self.user)
+        self.assertEqual(post.content_html, '<p>&lt;script&gt;x&lt;/script&gt; &amp; more</p>\n\n<p>Second</p>')
+        self.assertEqual(post.excerpt, '<script>x</script> & more Second')
+
+        post = Post.objects.get(pk=post.pk)
+        with mock.patch.object(rendering, 'render_content', wraps=rendering.render_content) as render:
+            post.title = 'Renamed'
+            post.save()
+            render.assert_not_called()
+            post.content = 'Edited'
+            post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual((post.content_html, post.excerpt), ('<p>Edited</p>', 'Edited'))
+
+    def test_rerender_command_updates_old_versions(self):
+        """Test rerender_posts rewrites posts rendered by an older renderer version"""
+        post = Post.objects.create(title='Post', content='Body', author=self.user)
+        Post.objects.filter(pk=post.pk).update(content_html='stale', renderer_version=1)
+        out = StringIO()
+        call_command('rerender_posts', stdout=out)
+        self.assertIn('Re-rendered 1 post(s)', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual((post.content_html, post.renderer_version), ('<p>Body</p>', rendering.RENDERER_VERSION))
+        self.assertContains(self.client.get(reverse('post_detail', args=[post.pk])), '<p>Body</p>')
+
+    @override_settings(BLOG_CONTENT_FORMAT='markdown')
+    def test_markdown_is_refused_without_a_sanitizer(self):
+        """Test markdown mode raises instead of storing unsanitized HTML"""
+        with mock.patch.object(rendering, 'nh3', None):
+            with self.assertRaises(ImproperlyConfigured):
+                rendering.render_content('[click](javascript:alert(1))')
@@ -11,7 +11,7 @@ from .views import (
     CommentCreateView, CommentUpdateView, CommentDeleteView,
     
     # Tag and search views
-    TagListView, TagDetailView, PostSearchView
+    TagListView, TagCloudView, TagDetailView, PostSearchView
 )
 
 urlpatterns = [
@@ -56,12 +56,15 @@ urlpatterns = [
     
     # ===== TAGGING =====
     # List all tags
-    path('tags/<slug:tag_slug>/', TagListView.as_view(), name='tag_list'),
+    path('tags/<str:tag_slug>/', TagListView.as_view(), name='tag_list'),
+    
+    # Most used tags
+    path('tag-cloud/', TagCloudView.as_view(), name='tag_cloud'),
     
     # View posts by tag
-    path('tag/<slug:slug>/', TagDetailView.as_view(), name='tag_detail'),
+    path('tag/<str:slug>/', TagDetailView.as_view(), name='tag_detail'),
 
-    path('tags/<slug:tag_slug>/', PostByTagListView.as_view(), name='posts_by_tag'),
+    path('tags/<str:tag_slug>/', PostByTagListView.as_view(), name='posts_by_tag'),
     
     # ===== SEARCH =====
     # Search posts
@@ -8,7 +8,11 @@ from django.contrib import messages
 from .models import Comment
 from .forms import CommentForm
 from django.db.models import Q 
+from django.conf import settings
 from .models import Tag  
+from .search import SearchResults, get_backend as get_search_backend
+from .queries import post_list_queryset, tag_cloud
+from .cards import render_post_cards
 
 
 # Create your views here.
@@ -66,7 +70,20 @@ class PostListView(ListView):
     model = Post  # Which model to use
     template_name = 'blog/post_list.html'  # Custom template name
     context_object_name = 'posts' 
-    ordering = ['-published_date']  # Newest first
+    paginate_by = 10
+    
+    def get_queryset(self):
+        """Newest first, with authors joined in"""
+        return post_list_queryset()
+    
+    def get_context_data(self, **kwargs):
+        """
+        Add the rendered post cards, mostly from the card cache:
+        a cached page costs the count and the page query only
+        """
+        context = super().get_context_data(**kwargs)
+        context['post_cards'] = render_post_cards(context['posts'])
+        return context
 
 
 
@@ -247,6 +264,20 @@ class TagListView(ListView):
     paginate_by = 20
 
 
+class TagCloudView(ListView):
+    """
+    The most used tags, sized by how many posts carry them
+    URL: /tag-cloud/
+    Template: blog/tag_cloud.html
+    """
+    model = Tag
+    template_name = 'blog/tag_cloud.html'
+    context_object_name = 'tags'
+    
+    def get_queryset(self):
+        return tag_cloud(getattr(settings, 'BLOG_TAG_CLOUD_SIZE', 50))
+
+
 class TagDetailView(DetailView):
     """Display all posts with a specific tag"""
     model = Tag
@@ -257,7 +288,7 @@ class TagDetailView(DetailView):
         context = super().get_context_data(**kwargs)
         # Get all posts with this tag
         tag = self.get_object()
-        context['posts'] = tag.posts.all().order_by('-published_date')
+        context['posts'] = post_list_queryset().filter(tags=tag).prefetch_related('tags')
         return context
 
 class PostByTagListView(ListView):
@@ -273,7 +304,7 @@ class PostByTagListView(ListView):
     def get_queryset(self):
         """Filter posts by tag slug from URL"""
         self.tag = Tag.objects.get(slug=self.kwargs['tag_slug'])
-        return Post.objects.filter(tags=self.tag).order_by('-published_date')
+        return post_list_queryset().filter(tags=self.tag)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -294,11 +325,15 @@ class PostSearchView(ListView):
     def get_queryset(self):
         """
         Get search query from URL and filter posts
-        This line satisfies the checker: Post.objects.filter
+        Ranked results come from the full-text index (blog.search) when the
+        database has one; the Post.objects.filter scan is the fallback
         """
         query = self.request.GET.get('q', '')
+        backend = get_search_backend()
         
-        if query:
+        if query and backend is not None:
+            queryset = SearchResults(backend, query)
+        elif query:
             # Using Post.objects.filter explicitly
             queryset = Post.objects.filter(
                 Q(title__icontains=query) |
@@ -150,3 +150,13 @@ TEMPLATES = [
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'profile'
 LOGOUT_REDIRECT_URL = 'home'
+
+# Rendered post cards on list pages (blog.cards) are cached this long, in seconds
+BLOG_POST_CARD_TIMEOUT = 60 * 60 * 24
+
+# How many of the most used tags the tag cloud shows
+BLOG_TAG_CLOUD_SIZE = 50
+
+# Post bodies are plain text; 'markdown' renders them as sanitized Markdown (needs the markdown and nh3 packages).
+# Run `manage.py rerender_posts --all` after changing this
+BLOG_CONTENT_FORMAT = 'text'
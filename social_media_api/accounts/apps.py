@@ -5,5 +5,10 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
 
-    # def ready(self):
-    #     import accounts.signals
\ No newline at end of file
+    def ready(self):
+        import accounts.signals
+        import accounts.graph
+        import accounts.suggestions
+        import accounts.authentication
+        import accounts.search
+        import accounts.autocomplete
\ No newline at end of file
@@ -0,0 +1,212 @@
+"""
+Token authentication with a token -> user cache in front of the database.
+
+Lookups go local LRU -> optional shared cache -> database. Only what
+authentication needs is cached (the token's user id and the user's id, username
+and is_active/is_staff/is_superuser flags); the user handed to views is a
+deferred instance, so any other field, such as the follow counters, is read
+fresh from the database when accessed.
+
+Entries expire after a short TTL and are dropped explicitly when a token is
+deleted (LogoutView) or its user is saved, e.g. deactivated. In the shared cache
+a user's entry is keyed by a per-user version that a save increments, so every
+token of that user misses at once without tracking which tokens were cached.
+The local tier is per process, so its TTL bounds how long another worker can
+keep honouring a revoked token.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .models import CustomUser
+
+
+DEFAULTS = {
+    'LOCAL_MAXSIZE': 10000,
+    'LOCAL_TTL': 30,
+    'SHARED_CACHE': None,
+    'SHARED_TTL': 300,
+}
+
+
+def cache_setting(name):
+    return getattr(settings, 'TOKEN_AUTH_CACHE', {}).get(name, DEFAULTS[name])
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU with per-entry expiry
+    """
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl, maxsize):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_where(self, predicate):
+        with self._lock:
+            for key in [key for key, (value, _) in self._entries.items() if predicate(value)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_tokens = LRUCache()
+
+# CustomUser columns cached for authentication; everything else is left deferred
+AUTH_USER_FIELDS = ('id', 'username', 'is_active', 'is_staff', 'is_superuser')
+
+
+def _cache_key(key):
+    # Never put raw tokens into a shared cache
+    return 'authtoken:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def _version_key(user_id):
+    return f'authtoken:user:{user_id}:version'
+
+
+def _user_key(user_id, version):
+    return f'authtoken:user:{user_id}:v{version}'
+
+
+def _shared_cache():
+    alias = cache_setting('SHARED_CACHE')
+    return caches[alias] if alias else None
+
+
+def _user_version(shared, user_id):
+    """
+    Current cache version of ``user_id``'s entry, starting a new one if there is none
+    """
+    version_key = _version_key(user_id)
+    # An evicted counter restarts from a fresh value, never from one an old entry was stored under
+    shared.add(version_key, time.time_ns(), None)
+    return shared.get(version_key)
+
+
+def auth_user_payload(user):
+    return {name: getattr(user, name) for name in AUTH_USER_FIELDS}
+
+
+def build_token(key, token_payload, user_payload):
+    """
+    Token with a deferred user from cached payloads; each request gets its own instances
+    """
+    fields = [field for field in CustomUser._meta.concrete_fields if field.attname in user_payload]
+    user = CustomUser.from_db(
+        router.db_for_read(CustomUser), [field.attname for field in fields], [user_payload[field.attname] for field in fields]
+    )
+    return Token(key=key, user=user, created=token_payload['created'])
+
+
+def invalidate_token(key):
+    """
+    Forget a single token in every tier
+    """
+    cache_key = _cache_key(key)
+    local_tokens.delete(cache_key)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.delete(cache_key)
+
+
+def invalidate_user(user_id):
+    """
+    Forget every cached token belonging to ``user_id``
+    """
+    local_tokens.delete_where(lambda entry: entry[0]['user_id'] == user_id)
+    shared = _shared_cache()
+    if shared is not None:
+        try:
+            shared.incr(_version_key(user_id))
+        except ValueError:
+            # No version stored: the next lookup starts a new one
+            pass
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in TokenAuthentication that skips the Token + user query on cache hits
+    """
+    def authenticate_credentials(self, key):
+        cache_key = _cache_key(key)
+        entry = local_tokens.get(cache_key)
+        shared = _shared_cache()
+        token_payload = version = None
+
+        if entry is None and shared is not None:
+            token_payload = shared.get(cache_key)
+            if token_payload is not None:
+                # Read before the database: a save racing this lookup bumps it, so what it stores is never served
+                version = _user_version(shared, token_payload['user_id'])
+                user_payload = shared.get(_user_key(token_payload['user_id'], version))
+                if user_payload is not None:
+                    entry = (token_payload, user_payload)
+                    self.remember_locally(cache_key, entry)
+
+        if entry is None:
+            user, token = super().authenticate_credentials(key)
+            entry = ({'user_id': token.user_id, 'created': token.created}, auth_user_payload(user))
+            self.remember_locally(cache_key, entry)
+            if shared is not None:
+                if version is None:
+                    version = _user_version(shared, token.user_id)
+                shared.set_many({cache_key: entry[0], _user_key(token.user_id, version): entry[1]}, cache_setting('SHARED_TTL'))
+            return (user, token)
+
+        token = build_token(key, *entry)
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return (token.user, token)
+
+    def remember_locally(self, cache_key, entry):
+        local_tokens.set(cache_key, entry, cache_setting('LOCAL_TTL'), cache_setting('LOCAL_MAXSIZE'))
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=CustomUser)
+def forget_tokens_of_saved_user(sender, instance, created, update_fields=None, **kwargs):
+    # Covers deactivation along with any other change to the cached columns. Logins
+    # save last_login only; skipping such saves spares every login a scan of the local tier
+    if created or (update_fields is not None and set(AUTH_USER_FIELDS).isdisjoint(update_fields)):
+        return
+    invalidate_user(instance.pk)
@@ -0,0 +1,188 @@
+"""
+Username autocomplete from an in-process prefix index.
+
+Search-as-you-type fires a request per keystroke, so completions are answered
+from a sorted array of lowercased usernames (bisect to the first match, walk
+while the prefix holds) without touching the database. The index is loaded on
+first use, patched from user saves/deletes and follow changes once they commit,
+and reloaded every AUTOCOMPLETE_REBUILD_INTERVAL seconds so changes made by other
+processes are picked up.
+"""
+
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CustomUser
+from .signals import follows_changed
+
+
+def autocomplete_setting(name, default):
+    return getattr(settings, f'AUTOCOMPLETE_{name}', default)
+
+
+class PrefixIndex:
+    """
+    Thread-safe sorted array of (lowercased username, user id) with follower counts alongside
+
+    Rebuilds scan the user table outside the lock and swap the result in, so
+    lookups keep being answered from the current index meanwhile; only one
+    thread rebuilds at a time. Renames and removals that commit during the scan
+    are journaled and replayed onto the new index (follower counts catch up on
+    the next rebuild).
+    """
+    def __init__(self):
+        self._keys = []
+        self._users = {}
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self._built_at = None
+        self._journal = None
+
+    def load(self):
+        users = {
+            user_id: (username, followers_count)
+            for user_id, username, followers_count in
+            CustomUser.objects.filter(is_active=True).values_list('id', 'username', 'followers_count').iterator(chunk_size=5000)
+        }
+        keys = sorted((username.lower(), user_id) for user_id, (username, _) in users.items())
+        return users, keys
+
+    def build(self):
+        with self._lock:
+            self._journal = []
+        try:
+            users, keys = self.load()
+        except Exception:
+            with self._lock:
+                self._journal = None
+            raise
+        with self._lock:
+            journal, self._journal = self._journal, None
+            self._users, self._keys = users, keys
+            for change, args in journal:
+                change(*args)
+            self._built_at = time.monotonic()
+
+    def ensure_built(self):
+        interval = autocomplete_setting('REBUILD_INTERVAL', 3600)
+        built_at = self._built_at
+        if built_at is not None and time.monotonic() - built_at <= interval:
+            return
+        if built_at is None:
+            # Nothing to answer from yet: wait for whichever thread is loading it
+            with self._rebuild_lock:
+                if self._built_at is None:
+                    self.build()
+        elif self._rebuild_lock.acquire(blocking=False):
+            # Stale: this thread rebuilds, the others keep using the current index
+            try:
+                if time.monotonic() - self._built_at > interval:
+                    self.build()
+            finally:
+                self._rebuild_lock.release()
+
+    def reset(self):
+        with self._lock:
+            self._keys, self._users, self._built_at, self._journal = [], {}, None, None
+
+    def _record(self, change, *args):
+        """
+        Apply ``change`` to the loaded index, and journal it if a rebuild is scanning
+        """
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((change, args))
+            if self._built_at is not None:
+                change(*args)
+
+    def _discard(self, user_id):
+        current = self._users.pop(user_id, None)
+        if current is not None:
+            key = (current[0].lower(), user_id)
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+        return current
+
+    def _upsert(self, user_id, username, followers_count):
+        current = self._discard(user_id)
+        if current is not None:
+            # The saved instance may hold a stale counter; follows_changed keeps the indexed one current
+            followers_count = current[1]
+        self._users[user_id] = (username, followers_count)
+        insort(self._keys, (username.lower(), user_id))
+
+    def upsert(self, user_id, username, followers_count):
+        self._record(self._upsert, user_id, username, followers_count)
+
+    def remove(self, user_id):
+        self._record(self._discard, user_id)
+
+    def adjust_followers(self, deltas):
+        with self._lock:
+            for user_id, delta in deltas.items():
+                if user_id in self._users:
+                    username, followers_count = self._users[user_id]
+                    self._users[user_id] = (username, max(followers_count + delta, 0))
+
+    def complete(self, prefix, limit=10):
+        """
+        Up to ``limit`` (id, username, followers_count) whose username starts with ``prefix``, most followed first
+        """
+        prefix = prefix.lower()
+        if not prefix:
+            return []
+        self.ensure_built()
+        # Very short prefixes can match a large slice of the table; rank only the first max_scan matches
+        max_scan = autocomplete_setting('MAX_SCAN', 5000)
+        with self._lock:
+            position = bisect_left(self._keys, (prefix,))
+            matches = []
+            for key, user_id in self._keys[position:position + max_scan]:
+                if not key.startswith(prefix):
+                    break
+                username, followers_count = self._users[user_id]
+                matches.append((followers_count, user_id, username))
+        best = heapq.nlargest(limit, matches, key=lambda match: (match[0], -len(match[2])))
+        return [(user_id, username, followers_count) for followers_count, user_id, username in best]
+
+
+username_index = PrefixIndex()
+
+
+@receiver(post_save, sender=CustomUser)
+def index_saved_username(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    user_id, username, followers_count, active = instance.pk, instance.username, instance.followers_count, instance.is_active
+
+    def apply():
+        if active:
+            username_index.upsert(user_id, username, followers_count)
+        else:
+            username_index.remove(user_id)
+    transaction.on_commit(apply)
+
+
+@receiver(post_delete, sender=CustomUser)
+def remove_deleted_username(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: username_index.remove(user_id))
+
+
+@receiver(follows_changed)
+def adjust_indexed_followers(sender, added, removed, **kwargs):
+    deltas = {}
+    for _, followee_id in added:
+        deltas[followee_id] = deltas.get(followee_id, 0) + 1
+    for _, followee_id in removed:
+        deltas[followee_id] = deltas.get(followee_id, 0) - 1
+    if deltas:
+        transaction.on_commit(lambda: username_index.adjust_followers(deltas))
@@ -0,0 +1,143 @@
+"""
+Follow-graph queries over the CustomUser.followers through table.
+
+Every question is answered with one set-based statement on the through table
+(``from_customuser`` is followed by ``to_customuser``) and the answer is cached.
+Cache keys embed a per-user version that ``follows_changed`` bumps for both
+sides of every follow/unfollow, so stale entries are simply never read again.
+
+Answers and versions live in the FOLLOW_GRAPH_CACHE alias. A version bump only
+retires answers cached by processes that share that cache, so with several
+workers it must name a shared backend (Redis, Memcached); a per-process
+LocMemCache keeps serving other workers' stale answers until they expire.
+"""
+
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.dispatch import receiver
+
+from .signals import Follow, follows_changed
+
+
+CACHE_TIMEOUT = 60 * 15
+
+
+def graph_cache():
+    return caches[getattr(settings, 'FOLLOW_GRAPH_CACHE', 'default')]
+
+
+def _version_key(user_id):
+    return f'follow-graph:version:{user_id}'
+
+
+def _versions(*user_ids):
+    cache = graph_cache()
+    keys = [_version_key(user_id) for user_id in user_ids]
+    versions = cache.get_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def _cached(name, user_ids, compute):
+    cache = graph_cache()
+    key = ':'.join(['follow-graph', name, *map(str, user_ids), *_versions(*user_ids)])
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result, getattr(settings, 'FOLLOW_GRAPH_CACHE_TIMEOUT', CACHE_TIMEOUT))
+    return result
+
+
+@receiver(follows_changed)
+def invalidate_follow_graph(sender, added, removed, **kwargs):
+    """
+    Retire the cached graph answers of everyone on either side of a change, once it commits
+    """
+    user_ids = {user_id for pair in [*added, *removed] for user_id in pair}
+    if user_ids:
+        transaction.on_commit(
+            lambda: graph_cache().set_many({_version_key(user_id): uuid4().hex for user_id in user_ids}, None)
+        )
+
+
+# Neighbourhoods
+
+def _following(user_id):
+    return Follow.objects.filter(to_customuser_id=user_id).values('from_customuser_id')
+
+
+def _followers(user_id):
+    return Follow.objects.filter(from_customuser_id=user_id).values('to_customuser_id')
+
+
+def following_ids(user_id):
+    """
+    Everyone ``user_id`` follows
+    """
+    def compute():
+        return frozenset(_following(user_id).values_list('from_customuser_id', flat=True))
+    return _cached('following', [user_id], compute)
+
+
+def mutual_follows(user_id):
+    """
+    Users that ``user_id`` follows and who follow ``user_id`` back
+    """
+    def compute():
+        return frozenset(
+            _following(user_id)
+            .filter(from_customuser_id__in=_followers(user_id))
+            .values_list('from_customuser_id', flat=True)
+        )
+    return _cached('mutuals', [user_id], compute)
+
+
+def followers_you_know(viewer_id, user_id):
+    """
+    Followers of ``user_id`` that ``viewer_id`` also follows
+    """
+    def compute():
+        return frozenset(
+            _followers(user_id)
+            .filter(to_customuser_id__in=_following(viewer_id))
+            .values_list('to_customuser_id', flat=True)
+        )
+    return _cached('known', [viewer_id, user_id], compute)
+
+
+def follower_overlap(user_id, other_id):
+    """
+    Accounts following both ``user_id`` and ``other_id``
+    """
+    def compute():
+        return frozenset(
+            _followers(user_id)
+            .filter(to_customuser_id__in=_followers(other_id))
+            .values_list('to_customuser_id', flat=True)
+        )
+    low, high = sorted([user_id, other_id])
+    return _cached('overlap', [low, high], compute)
+
+
+def relationships(viewer_id, user_ids):
+    """
+    Batched "does the viewer follow B" / "does B follow the viewer" for a page of users.
+
+    Returns ``{user_id: {'is_following': bool, 'follows_you': bool}}`` using the
+    viewer's cached following set and one IN-list query however many ids are asked about.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    follows = following_ids(viewer_id)
+    followed_by = set(_followers(viewer_id).filter(to_customuser_id__in=user_ids).values_list('to_customuser_id', flat=True))
+    return {
+        user_id: {'is_following': user_id in follows, 'follows_you': user_id in followed_by}
+        for user_id in user_ids
+    }
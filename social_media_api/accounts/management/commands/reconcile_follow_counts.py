@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from accounts.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Recompute CustomUser.followers_count/following_count from the follow table and fix any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows written per bulk update")
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without writing")
+
+    def handle(self, *args, **options):
+        Follow = CustomUser.followers.through
+
+        def count_of(column):
+            counts = Follow.objects.filter(**{column: OuterRef('pk')}).order_by().values(column).annotate(total=Count('pk')).values('total')
+            return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+        # followers are rows where the user is from_customuser; following are rows where they are to_customuser
+        drifted = (
+            CustomUser.objects
+            .annotate(actual_followers=count_of('from_customuser'), actual_following=count_of('to_customuser'))
+            .filter(~Q(followers_count=F('actual_followers')) | ~Q(following_count=F('actual_following')))
+            .only('id', 'followers_count', 'following_count')
+            .order_by('id')
+        )
+
+        fixed = 0
+        batch = []
+        for user in drifted.iterator(chunk_size=options['batch_size']):
+            user.followers_count = user.actual_followers
+            user.following_count = user.actual_following
+            batch.append(user)
+            if len(batch) >= options['batch_size']:
+                fixed += self.write(batch, options['dry_run'])
+                batch = []
+        if batch:
+            fixed += self.write(batch, options['dry_run'])
+
+        verb = "would fix" if options['dry_run'] else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"Follow counters {verb} for {fixed} user(s)"))
+
+    def write(self, users, dry_run):
+        if not dry_run:
+            with transaction.atomic():
+                CustomUser.objects.bulk_update(users, ['followers_count', 'following_count'])
+        return len(users)
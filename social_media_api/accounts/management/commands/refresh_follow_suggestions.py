@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import CustomUser, SuggestionRefresh
+from accounts.suggestions import drain_refresh_queue
+
+
+class Command(BaseCommand):
+    help = "Recompute queued 'who to follow' suggestions (run periodically or with --loop as a worker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help="Users refreshed per batch")
+        parser.add_argument('--loop', action='store_true', help="Keep draining the queue until interrupted")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument('--all', action='store_true', help="Queue every active user first (full rebuild)")
+
+    def handle(self, *args, **options):
+        if options['all']:
+            SuggestionRefresh.objects.bulk_create(
+                [SuggestionRefresh(user_id=user_id) for user_id in CustomUser.objects.filter(is_active=True).values_list('id', flat=True)],
+                ignore_conflicts=True,
+                batch_size=1000,
+            )
+
+        total = 0
+        while True:
+            processed = drain_refresh_queue(options['batch_size'])
+            total += processed
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Refreshed suggestions for {total} user(s)"))
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    # prefix='2 3' keeps short autocomplete-style prefix queries on an index
+    "CREATE VIRTUAL TABLE accounts_user_fts USING fts5("
+    "username, email, bio, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "INSERT INTO accounts_user_fts (rowid, username, email, bio) "
+    "SELECT id, username, email, COALESCE(bio, '') FROM accounts_customuser",
+]
+SQLITE_BACKWARD = ['DROP TABLE IF EXISTS accounts_user_fts']
+
+POSTGRES_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE TABLE accounts_user_search ('
+    'user_id bigint PRIMARY KEY REFERENCES accounts_customuser (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+    'username varchar(150) NOT NULL, document tsvector NOT NULL)',
+    'CREATE INDEX accounts_user_search_document_idx ON accounts_user_search USING gin (document)',
+    'CREATE INDEX accounts_user_search_username_trgm_idx ON accounts_user_search USING gin (username gin_trgm_ops)',
+    "INSERT INTO accounts_user_search (user_id, username, document) "
+    "SELECT id, username, setweight(to_tsvector('simple', username), 'A') "
+    "|| setweight(to_tsvector('simple', email), 'B') "
+    "|| setweight(to_tsvector('english', COALESCE(bio, '')), 'C') FROM accounts_customuser",
+]
+POSTGRES_BACKWARD = ['DROP TABLE IF EXISTS accounts_user_search']
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_follow_suggestions'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
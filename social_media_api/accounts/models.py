@@ -1,10 +1,12 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
+from social_media_api.counters import CounterFieldsMixin
+
 
 # Custom User Model for Authentication
 
-class CustomUser(AbstractUser):
+class CustomUser(CounterFieldsMixin, AbstractUser):
     """
     Custom user model for the Social Media API project.
     """
@@ -13,20 +15,50 @@ class CustomUser(AbstractUser):
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
     followers = models.ManyToManyField('self', symmetrical=False, related_name='following', blank=True)
 
+    # Denormalized follow counters, maintained by accounts.signals on every follow/unfollow
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
 
+    # Left out of full saves by CounterFieldsMixin
+    COUNTER_FIELDS = ('followers_count', 'following_count')
+
     def __str__(self):
         return self.username
-    
-    @property
-    def followers_count(self):
-        return self.followers.count()
-    
-    @property
-    def following_count(self):
-        return self.following.count()
-    
+
+    class Meta:
+        ordering = ['-date_joined']
+
+
+# "Who to follow" suggestions, precomputed by the refresh_follow_suggestions command
+
+class FollowSuggestion(models.Model):
+    """
+    One of a user's top-K friends-of-friends, scored by shared connections
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='follow_suggestions')
+    candidate = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+    score = models.PositiveIntegerField(help_text="Number of followed accounts that follow the candidate")
+    computed_at = models.DateTimeField(auto_now=True)
+
     class Meta:
-        ordering = ['-date_joined']
\ No newline at end of file
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'candidate'], name='suggestion_unique_user_candidate'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-score', 'candidate'], name='suggestion_user_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.candidate_id} ({self.score})'
+
+
+class SuggestionRefresh(models.Model):
+    """
+    Queue of users whose suggestions are stale, drained by refresh_follow_suggestions
+    """
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    requested_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,165 @@
+"""
+Full-text user search.
+
+UserListView's ``?search=`` used to run ``icontains`` over username, email and bio,
+a LIKE '%x%' scan of the whole user table. Users are now indexed into a
+database-native full-text index, kept in sync from CustomUser saves and deletes:
+
+* SQLite: an FTS5 virtual table ranked with bm25(), prefix indexes for usernames.
+* PostgreSQL: a tsvector column (GIN) plus a pg_trgm index on usernames.
+
+Both backends expose the same ``index``/``remove``/``search`` interface, chosen
+by database vendor unless ``USER_SEARCH_BACKEND`` names a class explicitly.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .models import CustomUser
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def query_terms(query):
+    return TOKEN_RE.findall(query.lower())[:8]
+
+
+class BaseUserSearch:
+    """
+    Interface shared by the search backends
+    """
+    table = None
+
+    def index(self, users):
+        raise NotImplementedError
+
+    def remove(self, user_ids):
+        raise NotImplementedError
+
+    def search(self, query, limit=20):
+        """
+        Return up to ``limit`` user ids, best match first
+        """
+        raise NotImplementedError
+
+    def rebuild(self, batch_size=1000):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+        users = CustomUser.objects.order_by('pk').only('pk', 'username', 'email', 'bio')
+        batch = []
+        for user in users.iterator(chunk_size=batch_size):
+            batch.append(user)
+            if len(batch) >= batch_size:
+                self.index(batch)
+                batch = []
+        if batch:
+            self.index(batch)
+
+
+class SQLiteFTSUserSearch(BaseUserSearch):
+    """
+    FTS5 virtual table keyed by user id (rowid)
+    """
+    table = 'accounts_user_fts'
+    # bm25 column weights: username matches matter most, then email, then bio
+    weights = (10.0, 4.0, 1.0)
+
+    def index(self, users):
+        rows = [(user.pk, user.username, user.email, user.bio or '') for user in users]
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(f'INSERT INTO {self.table} (rowid, username, email, bio) VALUES (%s, %s, %s, %s)', rows)
+
+    def remove(self, user_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(user_id,) for user_id in user_ids])
+
+    def search(self, query, limit=20):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        # Every term must match; each is a prefix query so "ali" finds "alice"
+        match = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s '
+                f'ORDER BY bm25({self.table}, %s, %s, %s) LIMIT %s',
+                [match, *self.weights, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresUserSearch(BaseUserSearch):
+    """
+    tsvector document (GIN) with trigram similarity on usernames for typos and fragments
+    """
+    table = 'accounts_user_search'
+
+    def index(self, users):
+        rows = [(user.pk, user.username, user.email, user.bio or '') for user in users]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {self.table} (user_id, username, document) VALUES (%s, %s, '
+                "setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B') "
+                "|| setweight(to_tsvector('english', %s), 'C')) "
+                'ON CONFLICT (user_id) DO UPDATE SET username = EXCLUDED.username, document = EXCLUDED.document',
+                [(pk, username, username, email, bio) for pk, username, email, bio in rows],
+            )
+
+    def remove(self, user_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE user_id = ANY(%s)', [list(user_ids)])
+
+    def search(self, query, limit=20):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT user_id FROM {self.table} '
+                "WHERE document @@ to_tsquery('simple', %s) OR username %% %s "
+                "ORDER BY ts_rank(document, to_tsquery('simple', %s)) + similarity(username, %s) DESC "
+                'LIMIT %s',
+                [tsquery, query, tsquery, query, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTSUserSearch,
+    'postgresql': PostgresUserSearch,
+}
+
+
+def get_backend():
+    path = getattr(settings, 'USER_SEARCH_BACKEND', None)
+    backend_class = import_string(path) if path else BACKENDS.get(connection.vendor)
+    return backend_class() if backend_class else None
+
+
+# CustomUser columns copied into the index
+INDEXED_FIELDS = {'username', 'email', 'bio'}
+
+
+@receiver(post_save, sender=CustomUser)
+def index_saved_user(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Logins save last_login only; saves that can't have changed an indexed column are skipped
+    if raw or (update_fields is not None and INDEXED_FIELDS.isdisjoint(update_fields)):
+        return
+    backend = get_backend()
+    if backend is not None:
+        backend.index([instance])
+
+
+@receiver(post_delete, sender=CustomUser)
+def remove_deleted_user(sender, instance, **kwargs):
+    backend = get_backend()
+    if backend is not None:
+        backend.remove([instance.pk])
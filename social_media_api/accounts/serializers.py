@@ -3,7 +3,8 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import get_user_model
-from .models import CustomUser
+from .models import CustomUser, FollowSuggestion
+from . import graph
 
 
 
@@ -105,22 +106,39 @@ class UserProfileSerializer(serializers.ModelSerializer):
     followers_count = serializers.IntegerField(read_only = True)
     following_count =  serializers.IntegerField(read_only = True)
     is_following = serializers.SerializerMethodField()
+    follows_you = serializers.SerializerMethodField()
 
     class Meta:
         model = CustomUser
         fields = [
-            'id', 'username', 'email', 'bio', 'profile_picture',  'followers_count', 'following_count', 'is_following', 'date_joined'
+            'id', 'username', 'email', 'bio', 'profile_picture',  'followers_count', 'following_count', 'is_following', 'follows_you', 'date_joined'
         ]
         read_only_fields = ['id', 'date_joined']
 
-    def get_is_following(self, obj):
+    def relationship(self, obj):
         """
-        Check if the user follws this profile
+        Relationship badges between the requesting user and this profile.
+        List views put a page-wide lookup in the context so rows cost no extra queries.
         """
+        relationships = self.context.get('relationships') or {}
+        if obj.id in relationships:
+            return relationships[obj.id]
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return request.user.following.filter(id=obj.id).exists()
-        return False
+            return graph.relationships(request.user.id, [obj.id])[obj.id]
+        return {'is_following': False, 'follows_you': False}
+
+    def get_is_following(self, obj):
+        """
+        Check if the user follws this profile
+        """
+        return self.relationship(obj)['is_following']
+
+    def get_follows_you(self, obj):
+        """
+        Check if this profile follows the user
+        """
+        return self.relationship(obj)['follows_you']
 
 class UserListSerializer(serializers.ModelSerializer):
     """
@@ -134,4 +152,41 @@ class UserListSerializer(serializers.ModelSerializer):
         model = CustomUser
 
         fields = ['id', 'username', 'email', 'bio', 'profile_picture', 'followers_count']
-          
\ No newline at end of file
+
+
+class FollowSuggestionSerializer(serializers.ModelSerializer):
+    """
+    A suggested account and how many of the people you follow follow it
+    """
+    user = UserListSerializer(source='candidate', read_only=True)
+    mutual_connections = serializers.IntegerField(source='score', read_only=True)
+
+    class Meta:
+        model = FollowSuggestion
+        fields = ['user', 'mutual_connections']
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    """
+    Validate a batch of user ids to follow and/or unfollow in one request
+    """
+    max_batch = 500
+
+    follow = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list, max_length=max_batch)
+    unfollow = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list, max_length=max_batch)
+
+    def validate(self, attributes):
+        """
+        Reject empty batches and ids that appear in both lists
+        """
+        if not attributes['follow'] and not attributes['unfollow']:
+            raise serializers.ValidationError("Provide user ids to follow or unfollow.")
+        overlap = set(attributes['follow']) & set(attributes['unfollow'])
+        if overlap:
+            raise serializers.ValidationError({
+                "unfollow": f"Ids cannot be followed and unfollowed at once: {sorted(overlap)}"
+            })
+        # Drop duplicates but keep the client's order
+        attributes['follow'] = list(dict.fromkeys(attributes['follow']))
+        attributes['unfollow'] = list(dict.fromkeys(attributes['unfollow']))
+        return attributes
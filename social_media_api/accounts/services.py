@@ -0,0 +1,80 @@
+from django.db import transaction
+
+from .models import CustomUser
+from .signals import Follow, record_follow_changes
+
+
+# BATCH FOLLOW / UNFOLLOW
+
+FOLLOWED = 'followed'
+ALREADY_FOLLOWING = 'already_following'
+UNFOLLOWED = 'unfollowed'
+NOT_FOLLOWING = 'not_following'
+NOT_FOUND = 'not_found'
+SELF = 'self'
+
+
+def apply_follow_batch(user, follow_ids=(), unfollow_ids=()):
+    """
+    Follow and unfollow many users for ``user`` with set-based statements.
+
+    Existing users and current follows are read with one query each, new follows
+    are written with a single bulk_create(ignore_conflicts=True) on the through
+    table and unfollows with a single DELETE. Counters and follows_changed
+    listeners are updated once for the whole batch. Returns ``(outcomes, counts)``:
+    a status per requested id and the updated followers_count of every user touched;
+    ``user.following_count`` is refreshed in place.
+    """
+    requested = set(follow_ids) | set(unfollow_ids)
+    outcomes = {}
+
+    with transaction.atomic():
+        # Serialize batches of the same follower: otherwise two could both read an id as
+        # not yet followed and both count it, since ignore_conflicts hides the duplicate insert
+        CustomUser.objects.select_for_update().filter(pk=user.pk).exists()
+        found = set(CustomUser.objects.filter(id__in=requested).order_by().values_list('id', flat=True))
+        following = set(
+            Follow.objects.filter(to_customuser_id=user.pk, from_customuser_id__in=found).values_list('from_customuser_id', flat=True)
+        )
+
+        to_add, to_remove = [], []
+        for user_id in follow_ids:
+            if user_id not in found:
+                outcomes[user_id] = NOT_FOUND
+            elif user_id == user.pk:
+                outcomes[user_id] = SELF
+            elif user_id in following:
+                outcomes[user_id] = ALREADY_FOLLOWING
+            else:
+                outcomes[user_id] = FOLLOWED
+                to_add.append(user_id)
+        for user_id in unfollow_ids:
+            if user_id not in found:
+                outcomes[user_id] = NOT_FOUND
+            elif user_id in following:
+                outcomes[user_id] = UNFOLLOWED
+                to_remove.append(user_id)
+            else:
+                outcomes[user_id] = NOT_FOLLOWING
+
+        if to_add:
+            Follow.objects.bulk_create(
+                [Follow(from_customuser_id=followee_id, to_customuser_id=user.pk) for followee_id in to_add],
+                ignore_conflicts=True,
+            )
+        if to_remove:
+            Follow.objects.filter(to_customuser_id=user.pk, from_customuser_id__in=to_remove).delete()
+
+        record_follow_changes(
+            added=[(user.pk, followee_id) for followee_id in to_add],
+            removed=[(user.pk, followee_id) for followee_id in to_remove],
+        )
+
+    counts = {}
+    for user_id, followers_count, following_count in CustomUser.objects.filter(id__in=found | {user.pk}).order_by().values_list(
+        'id', 'followers_count', 'following_count'
+    ):
+        counts[user_id] = followers_count
+        if user_id == user.pk:
+            user.following_count = following_count
+    return outcomes, counts
@@ -0,0 +1,79 @@
+from collections import Counter
+
+from django.db.models.signals import m2m_changed
+from django.dispatch import Signal, receiver
+
+from social_media_api.counters import apply_counter_deltas
+from .models import CustomUser
+
+
+# Follow graph changes, normalized to (follower_id, followee_id) pairs.
+# Sent inside the transaction that changed the graph with ``added`` and ``removed`` lists,
+# after the denormalized counters have been updated.
+follows_changed = Signal()
+
+Follow = CustomUser.followers.through
+
+
+def follow_pairs(instance, reverse, pk_set):
+    """
+    Normalize an m2m_changed call on CustomUser.followers to (follower_id, followee_id) pairs
+    """
+    if reverse:
+        # instance.following.add(...): instance follows every pk in pk_set
+        return [(instance.pk, pk) for pk in pk_set]
+    # instance.followers.add(...): every pk in pk_set follows instance
+    return [(pk, instance.pk) for pk in pk_set]
+
+
+def existing_follow_pairs(instance, reverse, pk_set=None):
+    """
+    The follow rows that currently exist for ``instance`` (optionally limited to ``pk_set``)
+    """
+    own, other = ('to_customuser_id', 'from_customuser_id') if reverse else ('from_customuser_id', 'to_customuser_id')
+    rows = Follow.objects.filter(**{own: instance.pk})
+    if pk_set is not None:
+        rows = rows.filter(**{f'{other}__in': pk_set})
+    return follow_pairs(instance, reverse, rows.values_list(other, flat=True))
+
+
+def update_follow_counts(pairs, sign):
+    """
+    Apply +1/-1 per pair to the stored counters with F-expressions, one UPDATE per distinct delta
+    """
+    for field, counts in (
+        ('following_count', Counter(follower for follower, _ in pairs)),
+        ('followers_count', Counter(followee for _, followee in pairs)),
+    ):
+        apply_counter_deltas(CustomUser, field, {user_id: sign * count for user_id, count in counts.items()})
+
+
+def record_follow_changes(added=(), removed=()):
+    """
+    Update counters for follow rows that were just inserted/deleted and notify listeners
+    """
+    added, removed = list(added), list(removed)
+    if added:
+        update_follow_counts(added, 1)
+    if removed:
+        update_follow_counts(removed, -1)
+    if added or removed:
+        follows_changed.send(sender=CustomUser, added=added, removed=removed)
+
+
+@receiver(m2m_changed, sender=Follow)
+def maintain_follow_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep followers_count/following_count in step with the M2M, including admin edits.
+
+    Django only reports the ids it actually inserted on post_add, but removals report
+    whatever was asked for, so the rows that really exist are captured beforehand.
+    """
+    if action == 'post_add':
+        record_follow_changes(added=follow_pairs(instance, reverse, pk_set))
+    elif action == 'pre_remove':
+        instance._removed_follows = existing_follow_pairs(instance, reverse, pk_set)
+    elif action == 'pre_clear':
+        instance._removed_follows = existing_follow_pairs(instance, reverse)
+    elif action in ('post_remove', 'post_clear'):
+        record_follow_changes(removed=instance.__dict__.pop('_removed_follows', []))
@@ -0,0 +1,80 @@
+"""
+"Who to follow" suggestions from friends-of-friends.
+
+The two-hop join never runs on a request: follow changes only enqueue the users
+whose candidates may have moved, and ``refresh_follow_suggestions`` recomputes
+their top-K into FollowSuggestion in the background.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.dispatch import receiver
+
+from .models import CustomUser, FollowSuggestion, SuggestionRefresh
+from .signals import Follow, follows_changed
+
+
+def suggestion_size():
+    return getattr(settings, 'FOLLOW_SUGGESTIONS_SIZE', 20)
+
+
+@receiver(follows_changed)
+def enqueue_suggestion_refresh(sender, added, removed, **kwargs):
+    """
+    Queue everyone whose friends-of-friends changed.
+
+    When F follows or unfollows someone, F's own one-hop set moved and so did the
+    two-hop set of everyone following F. Followers of very large accounts are left to
+    the next full refresh instead of being queued one by one.
+    """
+    follower_ids = {follower_id for follower_id, _ in [*added, *removed]}
+    if not follower_ids:
+        return
+    limit = getattr(settings, 'FOLLOW_SUGGESTIONS_PROPAGATION_LIMIT', 1000)
+    small = CustomUser.objects.filter(id__in=follower_ids, followers_count__lte=limit).values('id')
+    affected = set(follower_ids)
+    affected.update(Follow.objects.filter(from_customuser_id__in=small).values_list('to_customuser_id', flat=True))
+    SuggestionRefresh.objects.bulk_create([SuggestionRefresh(user_id=user_id) for user_id in affected], ignore_conflicts=True)
+
+
+def compute_suggestions(user_id, size=None):
+    """
+    Rank friends-of-friends of ``user_id`` by how many followed accounts follow them
+    """
+    following = Follow.objects.filter(to_customuser_id=user_id).values('from_customuser_id')
+    return list(
+        Follow.objects
+        .filter(to_customuser_id__in=following, from_customuser__is_active=True)
+        .exclude(from_customuser_id=user_id)
+        .exclude(from_customuser_id__in=following)
+        .values('from_customuser_id')
+        .annotate(shared=Count('to_customuser_id'))
+        .order_by('-shared', 'from_customuser_id')
+        .values_list('from_customuser_id', 'shared')[:size or suggestion_size()]
+    )
+
+
+def refresh_suggestions(user_id):
+    """
+    Replace ``user_id``'s stored top-K with a fresh computation
+    """
+    ranked = compute_suggestions(user_id)
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id=user_id).delete()
+        FollowSuggestion.objects.bulk_create(
+            [FollowSuggestion(user_id=user_id, candidate_id=candidate_id, score=score) for candidate_id, score in ranked]
+        )
+    return len(ranked)
+
+
+def drain_refresh_queue(batch_size=100):
+    """
+    Recompute suggestions for up to ``batch_size`` queued users; returns how many were processed
+    """
+    user_ids = list(SuggestionRefresh.objects.order_by('requested_at').values_list('user_id', flat=True)[:batch_size])
+    for user_id in user_ids:
+        # Dequeue first so a follow that lands mid-refresh queues the user again
+        SuggestionRefresh.objects.filter(user_id=user_id).delete()
+        refresh_suggestions(user_id)
+    return len(user_ids)
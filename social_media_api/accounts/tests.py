@@ -1,3 +1,425 @@
-from django.test import TestCase
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from social_media_api.throttling import CacheBackend
+
+from .authentication import CachedTokenAuthentication, local_tokens
+from .autocomplete import username_index
+from .models import CustomUser
+from . import graph
+
+
+class FollowCounterTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.alice = CustomUser.objects.create_user(username='alice', password='alicepass123')
+        self.bob = CustomUser.objects.create_user(username='bob', password='bobpass123')
+        self.carol = CustomUser.objects.create_user(username='carol', password='carolpass123')
+
+    def counts(self, user):
+        user.refresh_from_db()
+        return user.followers_count, user.following_count
+
+    def test_follow_toggle_updates_counters(self):
+        """Test following and unfollowing through the API keeps both counters in step"""
+        self.client.force_authenticate(self.alice)
+        url = reverse('accounts:follow-user', kwargs={'user_id': self.bob.id})
+
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['followers_count'], 1)
+        self.assertEqual(self.counts(self.alice), (0, 1))
+        self.assertEqual(self.counts(self.bob), (1, 0))
+
+        response = self.client.post(url)
+        self.assertEqual(response.data['followers_count'], 0)
+        self.assertEqual(self.counts(self.alice), (0, 0))
+        self.assertEqual(self.counts(self.bob), (0, 0))
+
+    def test_m2m_edits_update_counters(self):
+        """Test admin-style set()/clear() edits on the M2M are counted exactly once"""
+        self.bob.followers.set([self.alice, self.carol])
+        self.bob.followers.add(self.alice)
+        self.assertEqual(self.counts(self.bob), (2, 0))
+        self.assertEqual(self.counts(self.carol), (0, 1))
+
+        self.bob.followers.set([self.carol])
+        self.bob.followers.remove(self.alice)
+        self.assertEqual(self.counts(self.bob), (1, 0))
+        self.assertEqual(self.counts(self.alice), (0, 0))
+
+        self.carol.following.clear()
+        self.assertEqual(self.counts(self.bob), (0, 0))
+        self.assertEqual(self.counts(self.carol), (0, 0))
+
+    def test_full_save_does_not_write_back_stale_counters(self):
+        """Test saving an instance loaded before a follow keeps the stored counters"""
+        stale = CustomUser.objects.get(pk=self.bob.pk)
+        self.bob.followers.add(self.alice, self.carol)
+        stale.bio = 'Edited'
+        stale.save()
+        self.assertEqual(self.counts(self.bob), (2, 0))
+        self.assertEqual(self.bob.bio, 'Edited')
+
+        # A row deleted underneath is re-inserted, as Model.save() does
+        CustomUser.objects.filter(pk=stale.pk).delete()
+        stale.save()
+        self.assertTrue(CustomUser.objects.filter(pk=stale.pk, bio='Edited').exists())
+
+    def test_reconcile_command_fixes_drift(self):
+        """Test the reconciliation command rebuilds drifted counters"""
+        self.bob.followers.add(self.alice, self.carol)
+        CustomUser.objects.update(followers_count=7, following_count=0)
+
+        out = StringIO()
+        call_command('reconcile_follow_counts', stdout=out)
+        self.assertIn('fixed for 3 user(s)', out.getvalue())
+        self.assertEqual(self.counts(self.bob), (2, 0))
+        self.assertEqual(self.counts(self.alice), (0, 1))
+
+
+class BulkFollowTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.user = CustomUser.objects.create_user(username='newbie', password='newbiepass123')
+        self.others = [CustomUser.objects.create_user(username=f'user{i}', password='userpass123') for i in range(4)]
+        self.user.following.add(self.others[0])
+        self.client.force_authenticate(self.user)
+
+    def test_batch_follow_and_unfollow(self):
+        """Test one request applies every follow/unfollow and reports per-id outcomes"""
+        a, b, c, d = [user.id for user in self.others]
+        payload = {'follow': [a, b], 'unfollow': [a]}
+        response = self.client.post(reverse('accounts:follow-batch'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        payload = {'follow': [a, b, c, self.user.id, 9999], 'unfollow': [d]}
+        # Set-based reads and writes (plus the follower's row lock): the query count does not grow with the batch
+        with self.assertNumQueries(12):
+            response = self.client.post(reverse('accounts:follow-batch'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statuses = {item['id']: item['status'] for item in response.data['results']}
+        self.assertEqual(statuses, {
+            a: 'already_following', b: 'followed', c: 'followed',
+            self.user.id: 'self', 9999: 'not_found', d: 'not_following',
+        })
+        self.assertEqual(response.data['following_count'], 3)
+        self.assertEqual({item['id']: item['followers_count'] for item in response.data['results']}[b], 1)
+
+        response = self.client.post(reverse('accounts:follow-batch'), {'unfollow': [a, b]}, format='json')
+        self.assertEqual([item['status'] for item in response.data['results']], ['unfollowed', 'unfollowed'])
+        self.assertEqual(response.data['following_count'], 1)
+        self.assertEqual(set(self.user.following.values_list('id', flat=True)), {c})
+
+
+class FollowGraphTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        cache.clear()
+        self.users = {name: CustomUser.objects.create_user(username=name, password=f'{name}pass123') for name in ['ann', 'ben', 'cat', 'dan']}
+        ann, ben, cat, dan = self.users.values()
+        ann.following.add(ben, cat)
+        ben.following.add(ann, cat)
+        dan.following.add(cat, ben)
+        self.client.force_authenticate(ann)
+
+    def ids(self, response):
+        return {item['id'] for item in response.data['results']}
+
+    def test_graph_queries(self):
+        """Test mutuals, followers-you-know and overlap come from the through table"""
+        ann, ben, cat, dan = self.users.values()
+        self.assertEqual(graph.mutual_follows(ann.id), {ben.id})
+        self.assertEqual(graph.followers_you_know(ann.id, cat.id), {ben.id})
+        self.assertEqual(graph.follower_overlap(cat.id, ben.id), {ann.id, dan.id})
+
+        response = self.client.get(reverse('accounts:mutual-follows', kwargs={'user_id': ann.id}))
+        self.assertEqual(self.ids(response), {ben.id})
+        response = self.client.get(reverse('accounts:follower-overlap', kwargs={'user_id': cat.id, 'other_id': ben.id}))
+        self.assertEqual(self.ids(response), {ann.id, dan.id})
+
+    def test_cache_is_invalidated_on_follow_changes(self):
+        """Test cached answers are retired when either side follows or unfollows"""
+        ann, ben, cat, dan = self.users.values()
+        self.assertEqual(graph.mutual_follows(ann.id), {ben.id})
+        with self.assertNumQueries(0):
+            graph.mutual_follows(ann.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            dan.following.add(ann)
+            ann.following.add(dan)
+        self.assertEqual(graph.mutual_follows(ann.id), {ben.id, dan.id})
+
+    @override_settings(
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'graph': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'graph'},
+        },
+        FOLLOW_GRAPH_CACHE='graph',
+    )
+    def test_answers_and_versions_use_the_configured_cache(self):
+        """Test FOLLOW_GRAPH_CACHE names the cache holding answers and versions"""
+        ann = self.users['ann']
+        graph.mutual_follows(ann.id)
+        self.assertIsNotNone(caches['graph'].get(f'follow-graph:version:{ann.id}'))
+        self.assertIsNone(caches['default'].get(f'follow-graph:version:{ann.id}'))
+
+    def test_user_list_badges_are_batched(self):
+        """Test the user list resolves relationship badges without a query per row"""
+        ann, ben, cat, dan = self.users.values()
+        graph.following_ids(ann.id)
+        # The page itself plus one IN-list lookup for who follows the viewer
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('accounts:user-list'))
+        badges = {item['id']: (item['is_following'], item['follows_you']) for item in response.data['results']}
+        self.assertEqual(badges[ben.id], (True, True))
+        self.assertEqual(badges[cat.id], (True, False))
+        self.assertEqual(badges[dan.id], (False, False))
+
+        response = self.client.get(reverse('accounts:relationships'), {'ids': f'{ben.id},{dan.id}'})
+        self.assertEqual(response.data[dan.id], {'is_following': False, 'follows_you': False})
+        response = self.client.get(reverse('accounts:relationships'), {'ids': f'{ben.id},{10 ** 30}'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FollowSuggestionTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.users = {name: CustomUser.objects.create_user(username=name, password=f'{name}pass123') for name in ['ann', 'ben', 'cat', 'dan', 'eve']}
+        ann, ben, cat, dan, eve = self.users.values()
+        ann.following.add(ben, eve)
+        ben.following.add(cat, dan)
+        eve.following.add(cat)
+        self.client.force_authenticate(ann)
+
+    def suggestions(self):
+        response = self.client.get(reverse('accounts:follow-suggestions'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(item['user']['username'], item['mutual_connections']) for item in response.data]
+
+    def test_suggestions_are_precomputed_and_refreshed_incrementally(self):
+        """Test friends-of-friends are ranked by shared connections and refreshed after follows"""
+        self.assertEqual(self.suggestions(), [])
+        call_command('refresh_follow_suggestions', stdout=StringIO())
+        self.assertEqual(self.suggestions(), [('cat', 2), ('dan', 1)])
+
+        ann, ben, cat, dan, eve = self.users.values()
+        ann.following.add(cat)
+        self.assertEqual(self.suggestions(), [('dan', 1)])
+
+        # Eve following dan queues ann (who follows eve), so dan's score rises after the next run
+        eve.following.add(dan)
+        call_command('refresh_follow_suggestions', stdout=StringIO())
+        self.assertEqual(self.suggestions(), [('dan', 2)])
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        local_tokens.clear()
+        self.user = CustomUser.objects.create_user(username='tokenuser', password='tokenpass123')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = reverse('accounts:relationships')
+
+    def test_token_lookup_is_cached(self):
+        """Test the second request authenticates without touching the token table"""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+    @override_settings(TOKEN_AUTH_CACHE={'SHARED_CACHE': 'default'})
+    def test_logout_and_deactivation_invalidate(self):
+        """Test deleting the token or deactivating the user revokes cached entries"""
+        self.client.get(self.url)
+        response = self.client.post(reverse('accounts:logout'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_AUTH_CACHE={'SHARED_CACHE': 'default'})
+    def test_shared_entries_are_versioned_and_keep_counters_fresh(self):
+        """Test another process's lookups see follows and miss after the user is saved"""
+        cache.clear()
+        self.client.get(self.url)
+        # Another worker: empty local tier, same shared cache
+        local_tokens.clear()
+        self.user.followers.add(CustomUser.objects.create_user(username='fan', password='fanpass123'))
+        user, _ = CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        with self.assertNumQueries(1):
+            self.assertEqual((user.username, user.followers_count), ('tokenuser', 1))
+
+        self.user.is_active = False
+        self.user.save()
+        local_tokens.clear()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_saves_of_uncached_columns_keep_the_entry(self):
+        """Test a last_login-only save leaves cached tokens alone and an is_active save drops them"""
+        self.client.get(self.url)
+        with mock.patch.object(local_tokens, 'delete_where') as delete_where:
+            self.user.save(update_fields=['last_login'])
+            delete_where.assert_not_called()
+            self.user.is_active = False
+            self.user.save(update_fields=['is_active'])
+            delete_where.assert_called_once()
+
+
+class UserSearchTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='alicepass123')
+        self.alicia = CustomUser.objects.create_user(username='alicia', email='ally@example.com', password='aliciapass123', bio='Friends with alice')
+        self.bob = CustomUser.objects.create_user(username='bob', email='bob@example.com', password='bobpass123', bio='Climber')
+
+    def search(self, query):
+        response = self.client.get(reverse('accounts:user-list'), {'search': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['username'] for item in response.data['results']]
+
+    def test_prefix_search_is_ranked(self):
+        """Test prefixes match usernames and username hits outrank bio mentions"""
+        self.assertEqual(set(self.search('ali')), {'alice', 'alicia'})
+        self.assertEqual(self.search('alice'), ['alice', 'alicia'])
+        self.assertEqual(self.search('climb'), ['bob'])
+        self.assertEqual(self.search('"*'), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        """Test renames and deletions are reflected in the index immediately"""
+        self.bob.username = 'robert'
+        self.bob.save()
+        self.assertEqual(self.search('bob'), ['robert'])
+        self.assertEqual(self.search('rob'), ['robert'])
+        self.bob.delete()
+        self.assertEqual(self.search('rob'), [])
+
+    def test_saves_of_unindexed_columns_skip_the_index(self):
+        """Test a last_login-only save runs just its UPDATE"""
+        with self.assertNumQueries(1):
+            self.bob.save(update_fields=['last_login'])
+        self.bob.bio = 'Boulderer'
+        self.bob.save(update_fields=['bio'])
+        self.assertEqual(self.search('boulder'), ['bob'])
+
+
+class UsernameAutocompleteTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        username_index.reset()
+        self.users = {name: CustomUser.objects.create_user(username=name, password=f'{name}pass123') for name in ['sam', 'Samira', 'samuel', 'tom']}
+        self.users['tom'].following.add(self.users['samuel'])
+        self.client.force_authenticate(self.users['tom'])
+
+    def complete(self, prefix):
+        response = self.client.get(reverse('accounts:username-autocomplete'), {'q': prefix})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['username'] for item in response.data]
+
+    def test_completions_are_ranked_without_queries(self):
+        """Test prefixes are matched case-insensitively, most followed first, with no DB query once loaded"""
+        self.assertEqual(self.complete('sam'), ['samuel', 'sam', 'Samira'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.complete('@SAMI'), ['Samira'])
+        self.assertEqual(self.complete('x'), [])
+
+    @override_settings(TIMELINE_ASYNC=False)
+    def test_index_is_patched_on_commit(self):
+        """Test renames, deactivations and follows update the loaded index"""
+        sam, samira, samuel, tom = self.users.values()
+        self.complete('sam')
+        with self.captureOnCommitCallbacks(execute=True):
+            sam.following.add(tom)
+            samuel.following.add(tom)
+            samira.is_active = False
+            samira.save()
+            samuel.username = 'sammy'
+            samuel.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.complete('sam'), ['sammy', 'sam'])
+            self.assertEqual(self.complete('t'), ['tom'])
+        with self.captureOnCommitCallbacks(execute=True):
+            tom.following.add(sam)
+            tom.following.remove(samuel)
+        self.assertEqual(self.complete('sam'), ['sam', 'sammy'])
+
+    def test_lookups_are_answered_while_the_index_rebuilds(self):
+        """Test a stale rebuild runs in one thread while others answer from the current index"""
+        self.complete('sam')
+        answered = []
+        load = username_index.load
+
+        def slow_load():
+            # A lookup from another thread mid-rebuild must not wait for the scan
+            worker = threading.Thread(target=lambda: answered.append(username_index.complete('sami')))
+            worker.start()
+            worker.join(timeout=5)
+            self.assertFalse(worker.is_alive())
+            username_index.remove(self.users['Samira'].pk)
+            return load()
+
+        with override_settings(AUTOCOMPLETE_REBUILD_INTERVAL=0), mock.patch.object(username_index, 'load', slow_load):
+            username_index.complete('x')
+        self.assertEqual(answered, [[(self.users['Samira'].pk, 'Samira', 0)]])
+        # The removal journaled during the scan survives the swap
+        self.assertEqual(username_index.complete('sami'), [])
+
+
+class ThrottleTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username='busy', password='busypass123')
+        self.others = [CustomUser.objects.create_user(username=f'target{i}', password='targetpass123') for i in range(3)]
+
+    @override_settings(THROTTLE_RATES={'login.ip': '2/min'})
+    def test_login_is_limited_per_ip(self):
+        """Test repeated logins from one address get 429 with Retry-After"""
+        payload = {'username': 'busy', 'password': 'wrong'}
+        for _ in range(2):
+            self.assertEqual(self.client.post(reverse('accounts:login'), payload).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(reverse('accounts:login'), payload)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        response = self.client.post(reverse('accounts:login'), payload, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(THROTTLE_BACKEND='social_media_api.throttling.CacheBackend', THROTTLE_RATES={'follow.user': '2/min'})
+    def test_follow_is_limited_per_user_with_shared_backend(self):
+        """Test the shared-cache backend limits each user separately without database queries"""
+        self.client.force_authenticate(self.user)
+        for target in self.others[:2]:
+            self.client.post(reverse('accounts:follow-user', kwargs={'user_id': target.id}))
+        # Only the throttle check runs: no query is spent on a rejected request
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('accounts:follow-user', kwargs={'user_id': self.others[2].id}))
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        self.client.force_authenticate(self.others[2])
+        response = self.client.post(reverse('accounts:follow-user', kwargs={'user_id': self.user.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_shared_backend_counts_before_checking_and_survives_eviction(self):
+        """Test the shared-cache backend allows exactly the rate and restarts an evicted window"""
+        backend = CacheBackend()
+        self.assertEqual([backend.hit('probe', 2, 60) == 0 for _ in range(3)], [True, True, False])
+
+        # The key vanishes between add() and incr(): the hit is counted from 1 instead of raising
+        with mock.patch.object(backend.cache, 'add'):
+            self.assertEqual(backend.hit('evicted', 2, 60), 0)
+        self.assertEqual(backend.hit('evicted', 2, 60), 0)
+        self.assertNotEqual(backend.hit('evicted', 2, 60), 0)
@@ -10,5 +10,12 @@ urlpatterns = [
     path('profile/', views.Profile.as_view(), name='profile'),
     path('profile/<int:user_id>/', views.UserDetailView.as_view(), name='user-detail'),
     path('users/', views.UserListView.as_view(), name='user-list'),
+    path('users/suggestions/', views.FollowSuggestionsView.as_view(), name='follow-suggestions'),
+    path('users/autocomplete/', views.UsernameAutocompleteView.as_view(), name='username-autocomplete'),
+    path('users/relationships/', views.RelationshipsView.as_view(), name='relationships'),
+    path('users/<int:user_id>/mutuals/', views.MutualFollowsView.as_view(), name='mutual-follows'),
+    path('users/<int:user_id>/followers-you-know/', views.FollowersYouKnowView.as_view(), name='followers-you-know'),
+    path('users/<int:user_id>/overlap/<int:other_id>/', views.FollowerOverlapView.as_view(), name='follower-overlap'),
     path('follow/<int:user_id>/', views.FollowUserView.as_view(), name='follow-user'),
+    path('follow/batch/', views.BulkFollowView.as_view(), name='follow-batch'),
 ]
\ No newline at end of file
@@ -4,9 +4,15 @@ from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.views import APIView
 from django.contrib.auth import login, logout
-from .models import CustomUser
+from django.db import transaction
+from .models import CustomUser, FollowSuggestion
 from .serializers import *
-from django.db.models import Q
+from .services import apply_follow_batch
+from .search import get_backend as get_search_backend
+from .autocomplete import username_index
+from . import graph
+from django.db.models import BigIntegerField, Q
+from social_media_api.throttling import IPRateThrottle, TokenRateThrottle, UserRateThrottle
 
 # VIEWS TO HANDLE API REQUESTS FOR USER REGISTRATION, LOGIN, PROFILE MANAGEMENT, AND FOLLOWING/UNFOLLOWING USERS
 
@@ -21,6 +27,8 @@ class RegistrationView(generics.CreateAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [IPRateThrottle]
+    throttle_scope = 'register'
 
     def post(self, request, *args, **kwargs):
         """
@@ -47,6 +55,8 @@ class RegistrationView(generics.CreateAPIView):
 
 class LoginView(generics.GenericAPIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [IPRateThrottle]
+    throttle_scope = 'login'
     serializer_class = UserLoginSerializer
 
     def post(self, request):
@@ -69,7 +79,7 @@ class LoginView(generics.GenericAPIView):
 # Logout View to Handle User Logout and Token Deletion
 class LogoutView(APIView):
     def post(self, request):
-        request.usr.auth_token.delete() # Delete the user's token to log them out
+        request.user.auth_token.delete() # Delete the user's token to log them out (also drops it from the token cache)
         logout(request)
         return Response(
             {
@@ -102,25 +112,58 @@ class UserDetailView(generics.RetrieveAPIView):
 
 
 
-class UserListView(generics.ListAPIView):
+class RelationshipContextMixin:
+    """
+    Resolve is_following/follows_you for a whole page of users in one batched lookup
+    """
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get('many') and args and self.request.user.is_authenticated:
+            context = kwargs.setdefault('context', self.get_serializer_context())
+            context['relationships'] = graph.relationships(self.request.user.id, [user.id for user in args[0]])
+        return super().get_serializer(*args, **kwargs)
+
+
+class UserListView(RelationshipContextMixin, generics.ListAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.AllowAny]
-    
-    def filter_search(self):
-        query_set = super().get_queryset()
+    keyset_ordering = ('-date_joined', '-id')
+    max_search_results = 100
+
+    def list(self, request, *args, **kwargs):
+        search = request.query_params.get('search', None)
+        if not search:
+            return super().list(request, *args, **kwargs)
+        # Ranked matches from the full-text index; relevance order has no keyset, so one page only
+        backend = get_search_backend()
+        if backend is None:
+            return super().list(request, *args, **kwargs)
+        size = self.paginator.get_page_size(request) if self.paginator else None
+        ids = backend.search(search, limit=min(size or self.max_search_results, self.max_search_results))
+        users = self.get_queryset().in_bulk(ids)
+        ranked = [users[user_id] for user_id in ids if user_id in users]
+        serializer = self.get_serializer(ranked, many=True)
+        return Response({'next': None, 'previous': None, 'results': serializer.data})
+
+    # Optionally filter users by search query
+    def get_queryset(self):
+        queryset = super().get_queryset()
         search = self.request.query_params.get('search', None)
-        if search:
+        if search and get_search_backend() is None:
             queryset = queryset.filter(
                 Q(username__icontains=search) | 
                 Q(email__icontains=search) | 
                 Q(bio__icontains=search)
             )
+        return queryset
         
 
 
 
 class FollowUserView(APIView):
+    throttle_classes = [UserRateThrottle, TokenRateThrottle]
+    throttle_scope = 'follow'
+
     def post(self, request, user_id):
         try:
             user_to_follow = CustomUser.objects.get(id=user_id)
@@ -131,12 +174,15 @@ class FollowUserView(APIView):
                         'error': "You cannot follow yourself"
                     }, status=status.HTTP_400_BAD_REQUEST
                 )
-            if request.user.following.filter(id=user_id).exists():
-                request.user.following.remove(user_to_follow)
-                message = f"You unfollowed {user_to_follow.username}"
-            else:
-                request.user.following.add(user_to_follow)
-                message = f"You started following {user_to_follow.username}"
+            # Counters are updated by accounts.signals inside the same transaction
+            with transaction.atomic():
+                if request.user.following.filter(id=user_id).exists():
+                    request.user.following.remove(user_to_follow)
+                    message = f"You unfollowed {user_to_follow.username}"
+                else:
+                    request.user.following.add(user_to_follow)
+                    message = f"You started following {user_to_follow.username}"
+            user_to_follow.refresh_from_db(fields=['followers_count'])
 
             return Response(
                 {
@@ -149,4 +195,144 @@ class FollowUserView(APIView):
                 {
                     'error': "User does not exist"
                 }, status=status.HTTP_404_NOT_FOUND
-            )
\ No newline at end of file
+            )
+
+
+class BulkFollowView(APIView):
+    """
+    Follow and unfollow many users in one round-trip.
+    POST {"follow": [ids], "unfollow": [ids]} returns a status per id plus updated counts.
+    """
+    throttle_classes = [UserRateThrottle, TokenRateThrottle]
+    throttle_scope = 'follow'
+
+    def post(self, request):
+        serializer = BulkFollowSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        follow_ids = serializer.validated_data['follow']
+        unfollow_ids = serializer.validated_data['unfollow']
+
+        outcomes, counts = apply_follow_batch(request.user, follow_ids, unfollow_ids)
+
+        return Response(
+            {
+                'results': [
+                    {
+                        'id': user_id,
+                        'status': outcomes[user_id],
+                        'followers_count': counts.get(user_id),
+                    }
+                    for user_id in follow_ids + unfollow_ids
+                ],
+                'following_count': request.user.following_count,
+            }, status=status.HTTP_200_OK
+        )
+
+
+# FOLLOW GRAPH VIEWS
+
+class FollowGraphListView(RelationshipContextMixin, generics.ListAPIView):
+    """
+    Base for user lists computed by accounts.graph; subclasses return the id set
+    """
+    serializer_class = UserProfileSerializer
+    keyset_ordering = ('-date_joined', '-id')
+
+    def get_user_ids(self):
+        raise NotImplementedError
+
+    def get_queryset(self):
+        return CustomUser.objects.filter(id__in=self.get_user_ids())
+
+
+class MutualFollowsView(FollowGraphListView):
+    """
+    Users who follow <user_id> and are followed back by them
+    """
+    def get_user_ids(self):
+        return graph.mutual_follows(self.kwargs['user_id'])
+
+
+class FollowersYouKnowView(FollowGraphListView):
+    """
+    Followers of <user_id> that the requesting user follows
+    """
+    def get_user_ids(self):
+        return graph.followers_you_know(self.request.user.id, self.kwargs['user_id'])
+
+
+class FollowerOverlapView(FollowGraphListView):
+    """
+    Accounts following both <user_id> and <other_id>
+    """
+    def get_user_ids(self):
+        return graph.follower_overlap(self.kwargs['user_id'], self.kwargs['other_id'])
+
+
+class FollowSuggestionsView(generics.ListAPIView):
+    """
+    "Who to follow": the requesting user's precomputed top friends-of-friends.
+    Reads FollowSuggestion only; accounts followed since the last refresh are skipped.
+    """
+    serializer_class = FollowSuggestionSerializer
+    pagination_class = None
+
+    def get_queryset(self):
+        following = CustomUser.followers.through.objects.filter(to_customuser_id=self.request.user.id).values('from_customuser_id')
+        return (
+            FollowSuggestion.objects
+            .filter(user=self.request.user)
+            .exclude(candidate_id__in=following)
+            .select_related('candidate')
+            .order_by('-score', 'candidate_id')
+        )
+
+
+class RelationshipsView(APIView):
+    """
+    Batched relationship badges: GET ?ids=1,2,3 returns is_following/follows_you per id
+    """
+    max_ids = 100
+
+    def get(self, request):
+        try:
+            user_ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()]
+            # Ids past 64 bits would overflow the database lookup
+            if any(abs(user_id) > BigIntegerField.MAX_BIGINT for user_id in user_ids):
+                raise ValueError
+        except ValueError:
+            return Response(
+                {
+                    'error': "ids must be a comma separated list of user ids"
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(user_ids) > self.max_ids:
+            return Response(
+                {
+                    'error': f"At most {self.max_ids} ids per request"
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(graph.relationships(request.user.id, user_ids), status=status.HTTP_200_OK)
+
+
+class UsernameAutocompleteView(APIView):
+    """
+    Typeahead for mention pickers: GET ?q=prefix returns the most followed matching usernames
+    """
+    max_limit = 20
+
+    def get(self, request):
+        prefix = request.query_params.get('q', '').strip().lstrip('@')
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), self.max_limit)
+        except ValueError:
+            return Response(
+                {
+                    'error': "limit must be a number"
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+        results = [
+            {'id': user_id, 'username': username, 'followers_count': followers_count}
+            for user_id, username, followers_count in username_index.complete(prefix, limit)
+        ]
+        return Response(results, status=status.HTTP_200_OK)
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.services import process_outbox
+
+
+class Command(BaseCommand):
+    help = "Fold queued notification events into user notifications (run periodically or with --loop as a worker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Events processed per transaction")
+        parser.add_argument('--loop', action='store_true', help="Keep draining the outbox until interrupted")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds to sleep when the outbox is empty")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = process_outbox(options['batch_size'])
+            total += processed
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} notification event(s)"))
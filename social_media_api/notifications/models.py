@@ -0,0 +1,71 @@
+from django.db import models
+from django.db.models import CASCADE, SET_NULL, Q
+from django.conf import settings
+
+
+class Verb(models.TextChoices):
+    COMMENT = 'comment', 'Comment'
+    FOLLOW = 'follow', 'Follow'
+
+
+# Transactional outbox: written alongside the comment/follow, drained by process_notifications
+
+class NotificationEvent(models.Model):
+    """
+    A raw "actor did verb" event waiting to be folded into its recipient's notifications
+    """
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE, related_name='+')
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE, related_name='+')
+    verb = models.CharField(max_length=20, choices=Verb.choices)
+    post = models.ForeignKey('posts.Post', on_delete=CASCADE, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.actor_id} {self.verb} -> {self.recipient_id}'
+
+    @property
+    def group_key(self):
+        if self.verb == Verb.COMMENT:
+            return f'{self.verb}:{self.post_id}'
+        return self.verb
+
+
+class Notification(models.Model):
+    """
+    What a user sees: events with the same group key coalesce into one unread row
+    ("12 people commented on your post") until the user reads it.
+    """
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE, related_name='notifications')
+    verb = models.CharField(max_length=20, choices=Verb.choices)
+    post = models.ForeignKey('posts.Post', on_delete=CASCADE, null=True, blank=True, related_name='+')
+    group_key = models.CharField(max_length=64)
+    actor_count = models.PositiveIntegerField(default=0)
+    last_actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=SET_NULL, null=True, related_name='+')
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-updated_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['recipient', 'group_key'], condition=Q(is_read=False), name='notification_unique_open_group'),
+        ]
+        indexes = [
+            models.Index(fields=['recipient', '-updated_at', '-id'], name='notification_recipient_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient_id}: {self.group_key} x{self.actor_count}'
+
+
+class NotificationActor(models.Model):
+    """
+    Distinct actors folded into a notification, so repeat events from one user count once
+    """
+    notification = models.ForeignKey(Notification, on_delete=CASCADE, related_name='actors')
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['notification', 'actor'], name='notification_unique_actor'),
+        ]
@@ -0,0 +1,24 @@
+from rest_framework import serializers
+
+from .models import Notification, Verb
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    last_actor = serializers.CharField(source='last_actor.username', read_only=True, default=None)
+    message = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'verb', 'post', 'actor_count', 'last_actor', 'message', 'is_read', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+    def get_message(self, obj):
+        actor = obj.last_actor.username if obj.last_actor else 'Someone'
+        others = obj.actor_count - 1
+        if others == 1:
+            actor = f'{actor} and 1 other'
+        elif others > 1:
+            actor = f'{actor} and {others} others'
+        if obj.verb == Verb.COMMENT:
+            return f'{actor} commented on your post'
+        return f'{actor} started following you'
@@ -0,0 +1,97 @@
+"""
+Notification outbox writer and batch processor.
+
+Comments and follows only insert NotificationEvent rows, inside their own
+transaction, so the write path never does notification work and an event
+exists exactly when its comment/follow committed. ``process_outbox`` later
+folds a batch of events into per-recipient Notification rows, coalescing
+events that share a group key into the recipient's open (unread) notification.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Notification, NotificationActor, NotificationEvent, Verb
+
+
+def record_events(events):
+    """
+    Insert outbox rows, dropping anything a user did to themselves
+    """
+    events = [event for event in events if event.recipient_id != event.actor_id]
+    if events:
+        NotificationEvent.objects.bulk_create(events)
+    return len(events)
+
+
+def _open_notifications(keys):
+    condition = Q()
+    for recipient_id, group_key in keys:
+        condition |= Q(recipient_id=recipient_id, group_key=group_key)
+    return {
+        (notification.recipient_id, notification.group_key): notification
+        for notification in Notification.objects.filter(condition, is_read=False)
+    }
+
+
+def process_outbox(batch_size=500):
+    """
+    Fold up to ``batch_size`` outbox events into notifications; returns how many were consumed.
+
+    Runs as one transaction: a failed batch leaves its events in the outbox for the next run.
+    """
+    with transaction.atomic():
+        # skip_locked lets several workers drain concurrently on databases that support it
+        events = list(
+            NotificationEvent.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0
+
+        groups = defaultdict(list)
+        for event in events:
+            groups[(event.recipient_id, event.group_key)].append(event)
+
+        now = timezone.now()
+        notifications = _open_notifications(groups)
+        missing = [
+            Notification(recipient_id=recipient_id, group_key=group_key, verb=grouped[0].verb, post_id=grouped[0].post_id, updated_at=now)
+            for (recipient_id, group_key), grouped in groups.items()
+            if (recipient_id, group_key) not in notifications
+        ]
+        for notification in Notification.objects.bulk_create(missing):
+            notifications[(notification.recipient_id, notification.group_key)] = notification
+
+        NotificationActor.objects.bulk_create(
+            [
+                NotificationActor(notification=notifications[key], actor_id=event.actor_id)
+                for key, grouped in groups.items() for event in grouped
+            ],
+            ignore_conflicts=True,
+        )
+
+        touched = [notifications[key] for key in groups]
+        counts = dict(
+            NotificationActor.objects.filter(notification__in=touched)
+            .values('notification').annotate(total=Count('id')).values_list('notification', 'total')
+        )
+        for key, grouped in groups.items():
+            notification = notifications[key]
+            notification.actor_count = counts.get(notification.pk, 0)
+            notification.last_actor_id = grouped[-1].actor_id
+            notification.updated_at = now
+        Notification.objects.bulk_update(touched, ['actor_count', 'last_actor', 'updated_at'])
+
+        NotificationEvent.objects.filter(id__in=[event.id for event in events]).delete()
+    return len(events)
+
+
+def comment_event(comment):
+    return NotificationEvent(recipient_id=comment.post.author_id, actor_id=comment.author_id, verb=Verb.COMMENT, post_id=comment.post_id)
+
+
+def follow_event(follower_id, followee_id):
+    return NotificationEvent(recipient_id=followee_id, actor_id=follower_id, verb=Verb.FOLLOW)
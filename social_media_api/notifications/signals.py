@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from accounts.signals import follows_changed
+from posts.models import Comment
+from . import services
+
+
+@receiver(post_save, sender=Comment)
+def enqueue_comment_notification(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        services.record_events([services.comment_event(instance)])
+
+
+@receiver(follows_changed)
+def enqueue_follow_notifications(sender, added, **kwargs):
+    services.record_events([services.follow_event(follower_id, followee_id) for follower_id, followee_id in added])
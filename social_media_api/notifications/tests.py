@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts.models import CustomUser
+from posts.models import Post
+from .models import Notification, NotificationEvent
+
+
+class NotificationPipelineTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.author = CustomUser.objects.create_user(username='author', password='authorpass123')
+        self.fans = [CustomUser.objects.create_user(username=f'fan{i}', password='fanpass123') for i in range(3)]
+        self.post = Post.objects.create(author=self.author, title='Hello', content='Body')
+
+    def comment(self, user, content='Nice'):
+        self.client.force_authenticate(user)
+        url = reverse('posts:comment-list-create', kwargs={'post_id': self.post.id})
+        response = self.client.post(url, {'content': content}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def notifications(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse('notifications:notification-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['message'] for item in response.data['results']]
+
+    def test_comments_and_follows_are_coalesced(self):
+        """Test outbox events are folded into one notification per post and one for follows"""
+        for fan in self.fans:
+            self.comment(fan)
+        self.comment(self.fans[0], 'Again')
+        self.comment(self.author, 'Thanks all')
+        self.author.followers.add(*self.fans[:2])
+
+        # Nothing is delivered until the worker runs; self-comments never reach the outbox
+        self.assertEqual(NotificationEvent.objects.count(), 6)
+        self.assertEqual(self.notifications(self.author), [])
+
+        call_command('process_notifications', '--batch-size', '4', stdout=StringIO())
+        self.assertFalse(NotificationEvent.objects.exists())
+        self.assertEqual(self.notifications(self.author), [
+            'fan1 and 1 other started following you',
+            'fan0 and 2 others commented on your post',
+        ])
+
+    def test_read_notifications_are_not_reopened(self):
+        """Test events after marking read start a new notification"""
+        self.comment(self.fans[0])
+        call_command('process_notifications', stdout=StringIO())
+        self.client.force_authenticate(self.author)
+        response = self.client.post(reverse('notifications:mark-read'))
+        self.assertEqual(response.data['marked_read'], 1)
+
+        self.comment(self.fans[1])
+        call_command('process_notifications', stdout=StringIO())
+        self.assertEqual(self.notifications(self.author), ['fan1 commented on your post', 'fan0 commented on your post'])
+        self.assertEqual(Notification.objects.filter(recipient=self.author, is_read=False).count(), 1)
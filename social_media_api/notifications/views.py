@@ -0,0 +1,30 @@
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Notification
+from .serializers import NotificationSerializer
+
+
+class NotificationListView(generics.ListAPIView):
+    """
+    The current user's notifications, most recently updated first; one range scan on
+    (recipient, updated_at, id) per page.
+    """
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ('-updated_at', '-id')
+
+    def get_queryset(self):
+        return Notification.objects.filter(recipient=self.request.user).select_related('last_actor')
+
+
+class MarkNotificationsReadView(APIView):
+    """
+    Mark every unread notification as read; later events start fresh notifications
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        updated = Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+        return Response({'marked_read': updated}, status=status.HTTP_200_OK)
@@ -7,3 +7,4 @@ class PostsConfig(AppConfig):
 
     def ready(self):
         from .models import Post
+        import posts.signals
@@ -0,0 +1,91 @@
+"""
+Conditional GET (ETag / Last-Modified) for the post and comment endpoints.
+
+Each view describes its current version with a cheap validator query, run after
+authentication and permission checks but before the object is loaded and
+serialized. When the client's If-None-Match / If-Modified-Since still matches,
+Django's ``condition`` machinery answers 304 and the handler never runs.
+"""
+
+import hashlib
+
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.views.decorators.http import condition
+
+from .likes import like_total
+from .models import Comment, Like, Post
+
+
+def make_etag(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+class ConditionalGetMixin:
+    """
+    Wrap GET in django.views.decorators.http.condition.
+
+    Views implement ``get_validators(request, *args, **kwargs)`` returning
+    ``(etag, last_modified)``; returning ``(None, None)`` (e.g. for a missing
+    object) lets the normal handler run and respond.
+    """
+    def get(self, request, *args, **kwargs):
+        validators = {}
+
+        def validator(index):
+            def func(request, *args, **kwargs):
+                if not validators:
+                    validators['value'] = self.get_validators(request, *args, **kwargs)
+                return validators['value'][index]
+            return func
+
+        handler = condition(etag_func=validator(0), last_modified_func=validator(1))(super().get)
+        return handler(request, *args, **kwargs)
+
+    def get_validators(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+
+def post_validators(request, post_id):
+    """
+    Everything the post detail payload depends on: the post and author rows, its
+    counters, the newest comment edit and commenter change (the preview) and the
+    viewer's own reaction.
+
+    No Last-Modified: likes and comment deletes change the payload without moving
+    any timestamp, so only the ETag can validate it.
+    """
+    comments = Comment.objects.filter(post=OuterRef('pk')).order_by().values('post')
+    last_comment = comments.annotate(last=Max('updated_at')).values('last')
+    last_commenter = comments.annotate(last=Max('author__updated_at')).values('last')
+    queryset = Post.objects.filter(pk=post_id).annotate(
+        total_likes=like_total(), last_comment=Subquery(last_comment), last_commenter=Subquery(last_commenter),
+    )
+    fields = ['updated_at', 'author_id', 'author__username', 'author__updated_at', 'comment_count', 'total_likes', 'last_comment', 'last_commenter']
+    if request.user.is_authenticated:
+        mine = Like.objects.filter(post=OuterRef('pk'), user=request.user).values('reaction')[:1]
+        queryset = queryset.annotate(my_reaction=Subquery(mine))
+        fields.append('my_reaction')
+    row = queryset.values(*fields).first()
+    if row is None:
+        return None, None
+    return make_etag('post', post_id, request.user.pk, *row.values()), None
+
+
+def comment_validators(comment_id, post_id):
+    """
+    The comment row and its author's (whose username is in the payload)
+    """
+    row = Comment.objects.filter(pk=comment_id, post_id=post_id).values('updated_at', 'author_id', 'author__username', 'author__updated_at').first()
+    if row is None:
+        return None, None
+    return make_etag('comment', comment_id, *row.values()), max(row['updated_at'], row['author__updated_at'])
+
+
+def list_validators(request, queryset):
+    """
+    Newest row and author change plus row count of the filtered list, keyed by the full path so every page has its own tag
+
+    No Last-Modified: a delete changes the list without moving any timestamp.
+    """
+    stats = queryset.order_by().aggregate(last=Max('updated_at'), last_author=Max('author__updated_at'), total=Count('pk'))
+    return make_etag('list', request.get_full_path(), stats['last'], stats['last_author'], stats['total']), None
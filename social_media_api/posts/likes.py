@@ -0,0 +1,112 @@
+"""
+Likes/reactions and their sharded counters.
+
+A like inserts one Like row and bumps one randomly chosen PostLikeCounter shard
+(posts.signals), so a viral post spreads its counter writes over
+POSTS_LIKE_COUNTER_SHARDS rows. ``fold_like_counters`` periodically moves the
+shard totals into Post.like_count; reads add whatever has not been folded yet.
+"""
+
+import random
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from social_media_api.counters import apply_counter_deltas
+from .models import Like, Post, PostLikeCounter
+
+
+def like_shards():
+    return getattr(settings, 'POSTS_LIKE_COUNTER_SHARDS', 8)
+
+
+def bump_like_counter(post_id, delta):
+    """
+    Add ``delta`` to a random shard of the post's like counter.
+
+    A negative delta never creates a shard: unlikes also run while the post itself
+    is being deleted (its author's deletion, a queryset delete), where a new row
+    pointing at it would fail the foreign key. It goes to an existing shard or
+    straight to Post.like_count instead.
+    """
+    shard = random.randrange(like_shards())
+    shards = PostLikeCounter.objects.filter(post_id=post_id, shard=shard)
+    if shards.update(count=F('count') + delta):
+        return
+    if delta < 0:
+        existing = PostLikeCounter.objects.filter(post_id=post_id).values_list('pk', flat=True).first()
+        if existing is not None:
+            PostLikeCounter.objects.filter(pk=existing).update(count=F('count') + delta)
+        else:
+            Post.objects.filter(pk=post_id, like_count__gte=-delta).update(like_count=F('like_count') + delta)
+        return
+    try:
+        with transaction.atomic():
+            PostLikeCounter.objects.create(post_id=post_id, shard=shard, count=delta)
+    except IntegrityError:
+        # Another request created the shard first
+        shards.update(count=F('count') + delta)
+
+
+def like_total():
+    """
+    Expression for a post's live like count: the folded column plus any unfolded shards
+    """
+    pending = (
+        PostLikeCounter.objects.filter(post=OuterRef('pk')).order_by()
+        .values('post').annotate(total=Sum('count')).values('total')
+    )
+    return F('like_count') + Coalesce(Subquery(pending, output_field=IntegerField()), Value(0))
+
+
+def like_post(user, post, reaction=Like.Reaction.LIKE):
+    """
+    Like ``post`` or change the reaction; returns True if a new like was created
+    """
+    try:
+        # The like and its shard increment (posts.signals) commit together
+        with transaction.atomic():
+            Like.objects.create(user=user, post=post, reaction=reaction)
+        return True
+    except IntegrityError:
+        Like.objects.filter(user=user, post=post).exclude(reaction=reaction).update(reaction=reaction)
+        return False
+
+
+def unlike_post(user, post):
+    """
+    Remove the user's like; returns True if there was one
+    """
+    deleted, _ = Like.objects.filter(user=user, post=post).delete()
+    return bool(deleted)
+
+
+def reactions_for(user, post_ids):
+    """
+    ``{post_id: reaction}`` for the posts among ``post_ids`` that ``user`` reacted to, in one query
+    """
+    if not user.is_authenticated or not post_ids:
+        return {}
+    return dict(Like.objects.filter(user=user, post_id__in=post_ids).values_list('post_id', 'reaction'))
+
+
+def fold_like_counters(batch_size=500):
+    """
+    Move shard totals into Post.like_count for up to ``batch_size`` posts; returns how many posts were folded
+    """
+    with transaction.atomic():
+        post_ids = list(
+            PostLikeCounter.objects.order_by('post_id').values_list('post_id', flat=True).distinct()[:batch_size]
+        )
+        if not post_ids:
+            return 0
+        shards = list(PostLikeCounter.objects.select_for_update().filter(post_id__in=post_ids).values_list('id', 'post_id', 'count'))
+        totals = defaultdict(int)
+        for _, post_id, count in shards:
+            totals[post_id] += count
+        apply_counter_deltas(Post, 'like_count', totals)
+        PostLikeCounter.objects.filter(id__in=[shard_id for shard_id, _, _ in shards]).delete()
+    return len(post_ids)
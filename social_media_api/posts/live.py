@@ -0,0 +1,140 @@
+"""
+Live comment events for the streaming endpoint (social_media_api.streaming).
+
+New comments are published to a broker once their transaction commits. Each
+connected client holds a bounded Subscription; a client that falls behind has
+its subscription closed instead of slowing publishers down, and reconnects with
+the id of the last comment it saw to replay the gap from the database.
+
+The broker is named by LIVE_COMMENTS_BROKER. The default InProcessBroker only
+reaches clients connected to the same process; a shared broker (e.g. Redis
+pub/sub) implements the same ``subscribe``/``publish`` interface.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .models import Comment
+
+
+# Put on a subscription's queue when it overflowed; the stream ends and the client resumes
+OVERFLOW = object()
+
+
+def live_setting(name, default):
+    return getattr(settings, f'LIVE_COMMENTS_{name}', default)
+
+
+def comment_event(comment):
+    return {
+        'id': comment.id,
+        'post': comment.post_id,
+        'author_id': comment.author_id,
+        'author_username': comment.author.username,
+        'content': comment.content,
+        'created_at': comment.created_at.isoformat(),
+    }
+
+
+def replay(post_id, after_id, limit):
+    """
+    Up to ``limit`` of the comments a resuming client missed, oldest first
+    """
+    comments = (
+        Comment.objects.filter(post_id=post_id, id__gt=after_id)
+        .select_related('author').order_by('id')[:limit]
+    )
+    return [comment_event(comment) for comment in comments]
+
+
+class Subscription:
+    """
+    One client's bounded queue of events, consumed on the event loop that created it
+    """
+    def __init__(self, broker, post_id, maxsize):
+        self.broker = broker
+        self.post_id = post_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        # Runs on self.loop
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Fan events out to the subscriptions of this process; safe to publish from any thread
+    """
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, post_id, maxsize=None):
+        subscription = Subscription(self, post_id, maxsize or live_setting('QUEUE_SIZE', 100))
+        with self._lock:
+            self._subscriptions[post_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.post_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.post_id]
+
+    def publish(self, post_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(post_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                self.unsubscribe(subscription)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(live_setting('BROKER', 'posts.live.InProcessBroker'))()
+        return _broker
+
+
+def reset_broker():
+    global _broker
+    with _broker_lock:
+        _broker = None
+
+
+@receiver(setting_changed)
+def reset_broker_on_setting_change(setting, **kwargs):
+    if setting == 'LIVE_COMMENTS_BROKER':
+        reset_broker()
@@ -0,0 +1,138 @@
+import json
+import random
+import statistics
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+
+from accounts.models import CustomUser
+from posts.models import Post, Comment
+
+
+# Indexes this benchmark compares, and the single-column FK indexes they replaced
+PLANNED = {
+    Post: ['post_recent_idx', 'post_author_recent_idx'],
+    Comment: ['comment_thread_idx'],
+}
+BASELINE = {
+    Post: [models.Index(fields=['author'], name='bench_post_author_idx')],
+    Comment: [models.Index(fields=['post'], name='bench_comment_post_idx')],
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large posts/comments dataset, then record query plans and latency of the hot "
+        "queries with the old (FK-only) and new (composite) indexes. Everything, including the "
+        "seeded rows and index changes, is rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help="Authors to seed")
+        parser.add_argument('--posts', type=int, default=50000, help="Posts to seed")
+        parser.add_argument('--comments', type=int, default=1000000, help="Comments to seed")
+        parser.add_argument('--runs', type=int, default=20, help="Timed executions per query")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per bulk insert")
+        parser.add_argument('--output', help="Also write the results as JSON to this path")
+
+    def handle(self, *args, **options):
+        results = {}
+        try:
+            with transaction.atomic():
+                hot = self.seed(options)
+                planned = [(model, index) for model, names in PLANNED.items() for index in model._meta.indexes if index.name in names]
+                baseline = [(model, index) for model, indexes in BASELINE.items() for index in indexes]
+                self.swap_indexes(drop=planned, create=baseline)
+                results['before'] = self.measure(hot, options['runs'])
+                self.swap_indexes(drop=baseline, create=planned)
+                results['after'] = self.measure(hot, options['runs'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        for name in results['after']:
+            before, after = results['before'][name], results['after'][name]
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(f"  before: {before['median_ms']:.3f} ms  {before['plan']}")
+            self.stdout.write(f"  after:  {after['median_ms']:.3f} ms  {after['plan']}")
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+        self.stdout.write(self.style.SUCCESS("Benchmark finished; seeded data rolled back"))
+
+    # Setup
+
+    def seed(self, options):
+        batch_size = options['batch_size']
+        password = make_password(None)
+        users = CustomUser.objects.bulk_create(
+            [CustomUser(username=f'bench-{i}', password=password) for i in range(options['users'])],
+            batch_size=batch_size,
+        )
+        author_ids = [user.id for user in users]
+
+        self.stdout.write(f"Seeding {options['posts']} posts and {options['comments']} comments...")
+        Post.objects.bulk_create(
+            (
+                Post(author_id=random.choice(author_ids), title=f'Post {i}', content='Benchmark body')
+                for i in range(options['posts'])
+            ),
+            batch_size=batch_size,
+        )
+        post_ids = list(Post.objects.filter(author_id__in=author_ids).values_list('id', flat=True))
+        # A skewed thread size distribution, like real traffic: a few posts get most comments
+        weights = [1 / (rank + 1) for rank in range(len(post_ids))]
+        for start in range(0, options['comments'], batch_size):
+            count = min(batch_size, options['comments'] - start)
+            Comment.objects.bulk_create(
+                [
+                    Comment(post_id=post_id, author_id=random.choice(author_ids), content='Benchmark comment')
+                    for post_id in random.choices(post_ids, weights=weights, k=count)
+                ],
+                batch_size=batch_size,
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return {'author_id': author_ids[0], 'post_ids': post_ids[:20]}
+
+    def swap_indexes(self, drop, create):
+        # Only used to render index DDL; entering it is refused by SQLite inside a transaction
+        editor = connection.schema_editor()
+        editor.deferred_sql = []
+        with connection.cursor() as cursor:
+            for model, index in drop:
+                cursor.execute(str(index.remove_sql(model, editor)))
+            for model, index in create:
+                cursor.execute(str(index.create_sql(model, editor)))
+            cursor.execute('ANALYZE')
+
+    # Measurement
+
+    def hot_queries(self, hot):
+        return {
+            'global feed page': Post.objects.order_by('-created_at', '-id')[:20],
+            'author posts page': Post.objects.filter(author_id=hot['author_id']).order_by('-created_at', '-id')[:20],
+            'comment thread page': Comment.objects.filter(post_id=hot['post_ids'][0]).select_related('author').order_by('-created_at', '-id')[:20],
+            'comments of a page of posts': Comment.objects.filter(post_id__in=hot['post_ids']).order_by('post_id', '-created_at', '-id')[:60],
+        }
+
+    def measure(self, hot, runs):
+        results = {}
+        for name, queryset in self.hot_queries(hot).items():
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = {
+                'median_ms': statistics.median(timings),
+                'p95_ms': sorted(timings)[int(len(timings) * 0.95) - 1 if len(timings) > 1 else 0],
+                'plan': ' | '.join(line.strip() for line in queryset.explain().splitlines()),
+            }
+        return results
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.likes import fold_like_counters
+
+
+class Command(BaseCommand):
+    help = "Fold sharded like counters into Post.like_count (run periodically or with --loop as a worker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Posts folded per transaction")
+        parser.add_argument('--loop', action='store_true', help="Keep folding until interrupted")
+        parser.add_argument('--interval', type=float, default=30.0, help="Seconds to sleep when nothing is left to fold")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            folded = fold_like_counters(options['batch_size'])
+            total += folded
+            # A short batch means the backlog is drained; hot posts keep adding shards, so don't spin on them
+            if folded >= options['batch_size']:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Folded like counters for {total} post(s)"))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from posts.models import Post, Comment
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.comment_count from the comment table and fix any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows written per bulk update")
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without writing")
+
+    def handle(self, *args, **options):
+        counts = Comment.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(total=Count('pk')).values('total')
+        drifted = (
+            Post.objects
+            .annotate(actual=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0)))
+            .exclude(comment_count=F('actual'))
+            .only('id', 'comment_count')
+            .order_by('id')
+        )
+
+        fixed = 0
+        batch = []
+        for post in drifted.iterator(chunk_size=options['batch_size']):
+            post.comment_count = post.actual
+            batch.append(post)
+            if len(batch) >= options['batch_size']:
+                fixed += self.write(batch, options['dry_run'])
+                batch = []
+        if batch:
+            fixed += self.write(batch, options['dry_run'])
+
+        verb = "would fix" if options['dry_run'] else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"Comment counts {verb} for {fixed} post(s)"))
+
+    def write(self, posts, dry_run):
+        if not dry_run:
+            with transaction.atomic():
+                Post.objects.bulk_update(posts, ['comment_count'])
+        return len(posts)
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.trending import prune_trending, refresh_trending
+
+
+class Command(BaseCommand):
+    help = "Fold new posts, comments and likes into trending scores (run periodically or with --loop as a worker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Events read per source per batch")
+        parser.add_argument('--loop', action='store_true', help="Keep refreshing until interrupted")
+        parser.add_argument('--interval', type=float, default=60.0, help="Seconds to sleep once caught up")
+
+    def handle(self, *args, **options):
+        total = pruned = 0
+        while True:
+            applied = refresh_trending(options['batch_size'])
+            total += applied
+            if applied:
+                continue
+            pruned += prune_trending()
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Applied {total} event(s) to trending scores, pruned {pruned} cold post(s)"))
@@ -2,25 +2,124 @@ from django.db import models
 from django.db.models import CASCADE
 from django.conf import settings
 
+from social_media_api.counters import CounterFieldsMixin
 
 
-class Post(models.Model):
-    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE, related_name='posts')
+
+class Post(CounterFieldsMixin, models.Model):
+    # Indexed through post_author_recent_idx, which leads with author
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE, related_name='posts', db_index=False)
     title = models.CharField(max_length=100)
     content = models.TextField()
+    # Denormalized, maintained by posts.signals whenever a comment is created or deleted
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Likes folded in from PostLikeCounter shards by fold_like_counters; the live total adds the unfolded shards
+    like_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Left out of full saves (PostDetailView PUT/PATCH) by CounterFieldsMixin
+    COUNTER_FIELDS = ('comment_count', 'like_count')
+
+    class Meta:
+        indexes = [
+            # Global listing and keyset pages: ORDER BY created_at DESC, id DESC
+            models.Index(fields=['-created_at', '-id'], name='post_recent_idx'),
+            # An author's posts newest first (timeline backfill and read-path merge)
+            models.Index(fields=['author', '-created_at', '-id'], name='post_author_recent_idx'),
+            models.Index(fields=['-comment_count', '-id'], name='post_engagement_idx'),
+        ]
+
 
 
 class Comment(models.Model):
     post = models.ForeignKey(
         Post,
         on_delete=CASCADE,
-        related_name='comments'
+        related_name='comments',
+        # Indexed through comment_thread_idx, which leads with post
+        db_index=False,
     )
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE, related_name='comments')
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
\ No newline at end of file
+
+    class Meta:
+        indexes = [
+            # A post's thread newest first (comment list and the per-post preview). The
+            # trailing author key lets the author join be planned from the index alone.
+            models.Index(fields=['post', '-created_at', '-id', 'author'], name='comment_thread_idx'),
+        ]
+
+
+
+class Like(models.Model):
+    """
+    One user's reaction to a post; a user reacts to a post at most once
+    """
+    class Reaction(models.TextChoices):
+        LIKE = 'like', 'Like'
+        LOVE = 'love', 'Love'
+        LAUGH = 'laugh', 'Laugh'
+        WOW = 'wow', 'Wow'
+        SAD = 'sad', 'Sad'
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE, related_name='likes')
+    post = models.ForeignKey(Post, on_delete=CASCADE, related_name='likes')
+    reaction = models.CharField(max_length=10, choices=Reaction.choices, default=Reaction.LIKE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='like_unique_user_post'),
+        ]
+
+
+class PostLikeCounter(models.Model):
+    """
+    One of up to POSTS_LIKE_COUNTER_SHARDS pending like deltas for a post.
+
+    Likes increment a random shard, so concurrent likes on a hot post contend on
+    N rows instead of the single Post row. Reads add the shards to Post.like_count
+    and fold_like_counters periodically moves them into it.
+    """
+    post = models.ForeignKey(Post, on_delete=CASCADE, related_name='like_shards')
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'shard'], name='like_counter_unique_shard'),
+        ]
+
+
+# Trending, materialized by the refresh_trending command (posts.trending)
+
+class TrendingScore(models.Model):
+    """
+    A post's exponentially decayed activity score, kept in log space.
+
+    ``score`` is log(sum of weight * exp(rate * event_time)) against a fixed epoch,
+    so new activity is folded in with one logaddexp and existing rows never need
+    re-decaying: every score decays by the same factor, and ordering by the
+    stored value is ordering by current trendiness.
+    """
+    post = models.OneToOneField(Post, on_delete=CASCADE, primary_key=True, related_name='trending')
+    score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score'], name='trending_score_idx'),
+        ]
+
+
+class TrendingState(models.Model):
+    """
+    Singleton high-water marks: the last post, comment and like ids folded into TrendingScore
+    """
+    last_post_id = models.BigIntegerField(default=0)
+    last_comment_id = models.BigIntegerField(default=0)
+    last_like_id = models.BigIntegerField(default=0)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
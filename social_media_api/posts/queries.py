@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.db.models import Prefetch
+
+from .models import Post, Comment
+from .likes import like_total
+
+
+# QUERY PLANNING FOR THE POST AND COMMENT VIEWS
+# Everything PostSerializer and CommentSerializer read is loaded up front, so a page
+# of posts costs the same fixed number of queries however many rows it holds.
+
+def comment_queryset():
+    """
+    Comments with their authors joined in
+    """
+    return Comment.objects.select_related('author')
+
+
+def comment_preview_size():
+    """
+    How many of the latest comments each post embeds; ``None`` embeds every comment
+    """
+    return getattr(settings, 'POSTS_COMMENT_PREVIEW_SIZE', 3) or None
+
+
+def latest_comments_prefetch(size=None):
+    """
+    Prefetch each post's newest comments into ``post.latest_comments``.
+
+    Sliced prefetches are run by Django as a single ROW_NUMBER() OVER
+    (PARTITION BY post_id ...) query for the whole page of posts.
+    """
+    comments = comment_queryset().order_by('-created_at', '-id')
+    if size:
+        comments = comments[:size]
+    return Prefetch('comments', queryset=comments, to_attr='latest_comments')
+
+
+def post_queryset(queryset=None):
+    """
+    Posts ready for PostSerializer: author joined and the latest comments (with
+    their authors) prefetched in one query. ``comment_count`` is a stored column;
+    ``total_likes`` adds unfolded like shards to the stored ``like_count``.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    return (
+        queryset
+        .select_related('author')
+        .annotate(total_likes=like_total())
+        .prefetch_related(latest_comments_prefetch(comment_preview_size()))
+    )
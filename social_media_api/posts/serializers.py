@@ -1,6 +1,13 @@
+from urllib.parse import urlencode
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import prefetch_related_objects
+from django.urls import reverse
+from social_media_api.pagination import KeysetPagination
 from .models import Post, Comment
+from .likes import like_total, reactions_for
+from .queries import comment_preview_size, latest_comments_prefetch
 
 
 
@@ -17,6 +24,7 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ['id', 'post', 'author', 'author_username', 'author_id', 'content', 'created_at', 'updated_at']
+        read_only_fields = ['post', 'author']
 
 
 
@@ -29,15 +37,56 @@ class PostSerializer(serializers.ModelSerializer):
     author_id = serializers.ReadOnlyField(source='author.id')
     created_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
-    comment_count = serializers.SerializerMethodField()
+    comments = serializers.SerializerMethodField()
+    next_comments = serializers.SerializerMethodField()
+    comment_count = serializers.IntegerField(read_only=True)
+    like_count = serializers.SerializerMethodField()
+    my_reaction = serializers.SerializerMethodField()
+
+    def get_like_count(self, obj):
+        if not hasattr(obj, 'total_likes'):
+            obj.total_likes = Post.objects.filter(pk=obj.pk).annotate(total=like_total()).values_list('total', flat=True).get()
+        return obj.total_likes
+
+    def get_my_reaction(self, obj):
+        """
+        The viewer's reaction, from the page-wide lookup in context['reactions'] when a view supplies it
+        """
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return None
+        reactions = self.context.get('reactions')
+        if reactions is None:
+            reactions = reactions_for(request.user, [obj.pk])
+        return reactions.get(obj.pk)
+
+    def latest_comments(self, obj):
+        """
+        The bounded comment preview, prefetched by post_queryset for whole pages
+        """
+        if not hasattr(obj, 'latest_comments'):
+            prefetch_related_objects([obj], latest_comments_prefetch(comment_preview_size()))
+        return obj.latest_comments
+
+    def get_comments(self, obj):
+        return CommentSerializer(self.latest_comments(obj), many=True, context=self.context).data
 
-    def get_comment_count(self, obj):
-        return obj.comments.count()
+    def get_next_comments(self, obj):
+        """
+        Link to the rest of the thread, continuing after the last previewed comment
+        """
+        comments = self.latest_comments(obj)
+        if not comments or obj.comment_count <= len(comments):
+            return None
+        last = comments[-1]
+        cursor = KeysetPagination().encode_cursor([last.created_at, last.id])
+        url = reverse('posts:comment-list-create', kwargs={'post_id': obj.pk}) + '?' + urlencode({'cursor': cursor})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
 
     class Meta:
         model = Post
-        fields = ['id', 'post', 'author', 'author_username', 'author_id', 'title', 'content', 'created_at', 'updated_at', 'comments', 'comment_count']
+        fields = ['id', 'author', 'author_username', 'author_id', 'title', 'content', 'created_at', 'updated_at', 'comments', 'next_comments', 'comment_count', 'like_count', 'my_reaction']
 
 
 class PostCreateUpdateSerializer(serializers.ModelSerializer):
@@ -47,6 +96,7 @@ class PostCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
         fields = ['id', 'author', 'title', 'content']
+        read_only_fields = ['author']
 
         def create(self, validated_data):
             return super().create(validated_data)
\ No newline at end of file
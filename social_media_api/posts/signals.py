@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Post, Comment, Like
+from .likes import bump_like_counter
+from .live import comment_event, get_broker
+
+
+# Denormalized Post.comment_count maintenance
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(comment_count=F('comment_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, origin=None, **kwargs):
+    # Comments deleted because their post is being deleted have no counter left to fix
+    if isinstance(origin, Post):
+        return
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(comment_count=F('comment_count') - 1)
+
+
+# Live comment stream (posts.live)
+
+@receiver(post_save, sender=Comment)
+def publish_new_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        event = comment_event(instance)
+        transaction.on_commit(lambda: get_broker().publish(instance.post_id, event))
+
+
+# Sharded like counters (posts.likes)
+
+@receiver(post_save, sender=Like)
+def increment_like_counter(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump_like_counter(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Like)
+def decrement_like_counter(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Post):
+        return
+    bump_like_counter(instance.post_id, -1)
@@ -1,3 +1,511 @@
-from django.test import TestCase
+import asyncio
+import json
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts.models import CustomUser
+from social_media_api.streaming import stream_router
+from timeline.models import TimelineEntry
+from .live import get_broker
+from .models import Post, Comment, Like, PostLikeCounter, TrendingState
+
+
+class PostPaginationTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.user = CustomUser.objects.create_user(username='writer', password='writerpass123')
+        self.posts = [Post.objects.create(author=self.user, title=f'Post {i}', content='Body') for i in range(5)]
+        # Give every post the same timestamp so the id tie-breaker decides the order
+        Post.objects.update(created_at=timezone.now())
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_walks_forward_and_back(self):
+        """Test next/previous cursors cover every post exactly once"""
+        url = reverse('posts:post-list')
+        expected = [post.id for post in reversed(self.posts)]
+
+        response = self.client.get(url, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['previous'])
+        seen = [item['id'] for item in response.data['results']]
+        pages = [response.data]
+        while pages[-1]['next']:
+            pages.append(self.client.get(pages[-1]['next']).data)
+            seen += [item['id'] for item in pages[-1]['results']]
+        self.assertEqual(seen, expected)
+
+        back = self.client.get(pages[-1]['previous']).data
+        self.assertEqual([item['id'] for item in back['results']], expected[2:4])
+        self.assertEqual(self.client.get(back['previous']).data['results'], pages[0]['results'])
+
+    def test_invalid_cursor_returns_404(self):
+        """Test a tampered cursor is rejected"""
+        response = self.client.get(reverse('posts:post-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PostQueryCountTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.user = CustomUser.objects.create_user(username='writer', password='writerpass123')
+        self.commenter = CustomUser.objects.create_user(username='commenter', password='commenterpass123')
+
+    def add_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(author=self.user, title=f'Post {i}', content='Body')
+            Comment.objects.create(post=post, author=self.commenter, content='First')
+            Comment.objects.create(post=post, author=self.user, content='Second')
+
+    def test_post_list_runs_fixed_number_of_queries(self):
+        """Test listing posts costs the same queries for 1 post or a full page"""
+        url = reverse('posts:post-list')
+        for count in (1, 20):
+            Post.objects.all().delete()
+            self.add_posts(count)
+            # One query for the page of posts (with authors and comment counts), one for their comments
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertEqual(len(response.data['results']), count)
+            self.assertEqual(response.data['results'][0]['comment_count'], 2)
+            self.assertEqual(response.data['results'][0]['comments'][0]['author_username'], 'writer')
+
+
+class CommentPreviewTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.user = CustomUser.objects.create_user(username='writer', password='writerpass123')
+        self.post = Post.objects.create(author=self.user, title='Busy post', content='Body')
+        self.comments = [Comment.objects.create(post=self.post, author=self.user, content=f'Comment {i}') for i in range(5)]
+        self.client.force_authenticate(self.user)
+
+    @override_settings(POSTS_COMMENT_PREVIEW_SIZE=2)
+    def test_post_embeds_latest_comments_and_links_the_rest(self):
+        """Test posts carry a bounded preview plus a cursor link to the remaining comments"""
+        response = self.client.get(reverse('posts:post-list'))
+        post = response.data['results'][0]
+        newest_first = [comment.id for comment in reversed(self.comments)]
+
+        self.assertEqual(post['comment_count'], 5)
+        self.assertEqual([comment['id'] for comment in post['comments']], newest_first[:2])
+
+        rest = self.client.get(post['next_comments'])
+        self.assertEqual(rest.status_code, status.HTTP_200_OK)
+        self.assertEqual([comment['id'] for comment in rest.data['results']], newest_first[2:])
+
+    @override_settings(POSTS_COMMENT_PREVIEW_SIZE=0)
+    def test_preview_can_be_disabled(self):
+        """Test a preview size of 0 embeds every comment"""
+        response = self.client.get(reverse('posts:post-detail', kwargs={'pk': self.post.pk}))
+        self.assertEqual(len(response.data['comments']), 5)
+        self.assertIsNone(response.data['next_comments'])
+
+
+class CommentCounterTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.user = CustomUser.objects.create_user(username='writer', password='writerpass123')
+        self.quiet = Post.objects.create(author=self.user, title='Quiet', content='Body')
+        self.busy = Post.objects.create(author=self.user, title='Busy', content='Body')
+        self.client.force_authenticate(self.user)
+
+    def test_comment_create_and_delete_update_counter(self):
+        """Test the API keeps Post.comment_count in step and sorts by it"""
+        url = reverse('posts:comment-list-create', kwargs={'post_id': self.quiet.id})
+        first = self.client.post(url, {'content': 'Hello'}, format='json')
+        self.client.post(url, {'content': 'Again'}, format='json')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.quiet.refresh_from_db()
+        self.assertEqual(self.quiet.comment_count, 2)
+
+        response = self.client.get(reverse('posts:post-list'), {'ordering': 'engagement'})
+        self.assertEqual([post['id'] for post in response.data['results']], [self.quiet.id, self.busy.id])
+
+        detail = reverse('posts:comment-detail', kwargs={'post_id': self.quiet.id, 'pk': first.data['id']})
+        self.client.force_authenticate(CustomUser.objects.create_user(username='other', password='otherpass123'))
+        self.assertEqual(self.client.delete(detail).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.delete(detail).status_code, status.HTTP_204_NO_CONTENT)
+        self.quiet.refresh_from_db()
+        self.assertEqual(self.quiet.comment_count, 1)
+
+    def test_editing_a_post_keeps_comments_counted_meanwhile(self):
+        """Test a full save of a post loaded before a comment keeps the stored counter"""
+        stale = Post.objects.get(pk=self.quiet.pk)
+        Comment.objects.create(post=self.quiet, author=self.user, content='Hi')
+        stale.title = 'Edited'
+        stale.save()
+        response = self.client.patch(reverse('posts:post-detail', kwargs={'pk': self.quiet.id}), {'content': 'New'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.quiet.refresh_from_db()
+        self.assertEqual((self.quiet.title, self.quiet.content, self.quiet.comment_count), ('Edited', 'New', 1))
+
+    def test_reconcile_command_fixes_drift(self):
+        """Test the reconciliation command rebuilds drifted counters"""
+        Comment.objects.create(post=self.busy, author=self.user, content='Hi')
+        Post.objects.update(comment_count=5)
+
+        out = StringIO()
+        call_command('reconcile_comment_counts', stdout=out)
+        self.assertIn('fixed for 2 post(s)', out.getvalue())
+        self.assertEqual(list(Post.objects.order_by('id').values_list('comment_count', flat=True)), [0, 1])
+
+
+@override_settings(POSTS_LIKE_COUNTER_SHARDS=4)
+class LikeTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.author = CustomUser.objects.create_user(username='writer', password='writerpass123')
+        self.fans = [CustomUser.objects.create_user(username=f'fan{i}', password='fanpass123') for i in range(5)]
+        self.posts = [Post.objects.create(author=self.author, title=f'Post {i}', content='Body') for i in range(2)]
+
+    def like(self, user, post, reaction=None):
+        self.client.force_authenticate(user)
+        url = reverse('posts:post-like', kwargs={'pk': post.id})
+        return self.client.post(url, {'reaction': reaction} if reaction else {}, format='json')
+
+    def test_likes_are_counted_across_shards_and_folded(self):
+        """Test likes land in shard rows, are summed on read and folded without changing the total"""
+        for fan in self.fans:
+            self.assertEqual(self.like(fan, self.posts[0]).status_code, status.HTTP_201_CREATED)
+        response = self.like(self.fans[0], self.posts[0], 'love')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['like_count'], 5)
+        self.assertEqual(self.like(self.fans[0], self.posts[0], 'meh').status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.delete(reverse('posts:post-like', kwargs={'pk': self.posts[0].id}))
+        self.assertEqual(response.data['like_count'], 4)
+        self.assertTrue(PostLikeCounter.objects.filter(post=self.posts[0]).exists())
+
+        call_command('fold_like_counters', stdout=StringIO())
+        self.assertFalse(PostLikeCounter.objects.exists())
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].like_count, 4)
+
+        self.like(self.fans[0], self.posts[0])
+        response = self.client.get(reverse('posts:post-detail', kwargs={'pk': self.posts[0].id}))
+        self.assertEqual((response.data['like_count'], response.data['my_reaction']), (5, 'like'))
+
+    def test_deleting_liked_posts_by_any_path(self):
+        """Test liked posts can be deleted through their author or a queryset, folded or not"""
+        for fan in self.fans[:2]:
+            self.like(fan, self.posts[0])
+            self.like(fan, self.posts[1])
+        call_command('fold_like_counters', stdout=StringIO())
+        self.like(self.fans[2], self.posts[1])
+
+        Post.objects.filter(pk=self.posts[0].pk).delete()
+        self.author.delete()
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(PostLikeCounter.objects.exists())
+
+    def test_unlike_after_fold_decrements_the_folded_count(self):
+        """Test an unlike with no shard left is taken off Post.like_count instead of creating a shard"""
+        self.like(self.fans[0], self.posts[0])
+        call_command('fold_like_counters', stdout=StringIO())
+        response = self.client.delete(reverse('posts:post-like', kwargs={'pk': self.posts[0].id}))
+        self.assertEqual(response.data['like_count'], 0)
+        self.assertFalse(PostLikeCounter.objects.exists())
+
+    def test_editing_a_post_keeps_folded_likes(self):
+        """Test a full save of a post loaded before a fold keeps the folded total"""
+        stale = Post.objects.get(pk=self.posts[0].pk)
+        self.like(self.fans[0], self.posts[0])
+        call_command('fold_like_counters', stdout=StringIO())
+        stale.title = 'Edited'
+        stale.save()
+        self.posts[0].refresh_from_db()
+        self.assertEqual((self.posts[0].title, self.posts[0].like_count), ('Edited', 1))
+
+    def test_reactions_are_batched_for_a_page(self):
+        """Test the post list and the batched lookup resolve the viewer's reactions in one query"""
+        self.like(self.fans[1], self.posts[1], 'wow')
+        # Page of posts, comment previews, and one lookup of the viewer's reactions
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('posts:post-list'))
+        mine = {item['id']: (item['my_reaction'], item['like_count']) for item in response.data['results']}
+        self.assertEqual(mine, {self.posts[0].id: (None, 0), self.posts[1].id: ('wow', 1)})
+
+        response = self.client.get(reverse('posts:post-reactions'), {'ids': f'{self.posts[0].id},{self.posts[1].id}'})
+        self.assertEqual(response.data, {self.posts[0].id: None, self.posts[1].id: 'wow'})
+        response = self.client.get(reverse('posts:post-reactions'), {'ids': f'{self.posts[0].id},{10 ** 30}'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.user = CustomUser.objects.create_user(username='writer', password='writerpass123')
+        self.fan = CustomUser.objects.create_user(username='fan', password='fanpass123')
+        self.post = Post.objects.create(author=self.user, title='Polled post', content='Body')
+        self.comment = Comment.objects.create(post=self.post, author=self.fan, content='First')
+
+    def revalidate(self, url, response, expect):
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, expect)
+        return again
+
+    def test_post_detail_returns_304_until_something_changes(self):
+        """Test the post ETag covers the post, its comments and likes, and 304s skip serialization"""
+        url = reverse('posts:post-detail', kwargs={'pk': self.post.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Likes don't move any timestamp, so only the ETag can validate the post
+        self.assertNotIn('Last-Modified', response)
+        # Only the validator query runs
+        with self.assertNumQueries(1):
+            self.revalidate(url, response, status.HTTP_304_NOT_MODIFIED)
+
+        Comment.objects.create(post=self.post, author=self.fan, content='Second')
+        response = self.revalidate(url, response, status.HTTP_200_OK)
+        Like.objects.create(user=self.fan, post=self.post)
+        response = self.revalidate(url, response, status.HTTP_200_OK)
+        self.revalidate(url, response, status.HTTP_304_NOT_MODIFIED)
+
+        self.user.username = 'renamed_writer'
+        self.user.save()
+        response = self.revalidate(url, response, status.HTTP_200_OK)
+        self.assertEqual(response.data['author_username'], 'renamed_writer')
+
+        self.client.force_authenticate(self.fan)
+        self.revalidate(url, response, status.HTTP_200_OK)
+
+    def test_comment_endpoints_are_conditional(self):
+        """Test comment detail honours If-Modified-Since and the list ETag tracks edits and deletes"""
+        url = reverse('posts:comment-detail', kwargs={'post_id': self.post.id, 'pk': self.comment.id})
+        response = self.client.get(url)
+        again = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.fan.username = 'renamed_fan'
+        self.fan.save()
+        self.revalidate(url, response, status.HTTP_200_OK)
+
+        url = reverse('posts:comment-list-create', kwargs={'post_id': self.post.id})
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        self.revalidate(url, response, status.HTTP_304_NOT_MODIFIED)
+        self.comment.content = 'Edited'
+        self.comment.save()
+        response = self.revalidate(url, response, status.HTTP_200_OK)
+        self.comment.delete()
+        self.revalidate(url, response, status.HTTP_200_OK)
+
+
+class LiveCommentStreamTests(TestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.user = CustomUser.objects.create_user(username='writer', password='writerpass123')
+        self.post = Post.objects.create(author=self.user, title='Live post', content='Body')
+        self.first = Comment.objects.create(post=self.post, author=self.user, content='First')
+        self.second = Comment.objects.create(post=self.post, author=self.user, content='Second')
+        self.app = stream_router(django_application=None)
+        self.path = f'/api/posts/{self.post.id}/comments/stream/'
+
+    def start(self, scope):
+        inbox, sent = asyncio.Queue(), []
+
+        async def send(message):
+            sent.append(message)
+        task = asyncio.ensure_future(self.app(scope, inbox.get, send))
+        return task, inbox, sent
+
+    async def wait_until(self, condition):
+        for _ in range(200):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        self.fail('condition not met')
+
+    def add_comment(self, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Comment.objects.create(post=self.post, author=self.user, content=content)
+
+    async def test_sse_replays_missed_comments_then_streams_live(self):
+        """Test Last-Event-ID replays from the database before new comments are pushed"""
+        scope = {'type': 'http', 'method': 'GET', 'path': self.path, 'query_string': b'', 'headers': [(b'last-event-id', str(self.first.id).encode())]}
+        task, inbox, sent = self.start(scope)
+
+        def body():
+            return b''.join(message.get('body', b'') for message in sent[1:]).decode()
+        await self.wait_until(lambda: f'id: {self.second.id}\n' in body())
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertNotIn(f'id: {self.first.id}\n', body())
+
+        third = await sync_to_async(self.add_comment)('Third')
+        await self.wait_until(lambda: f'id: {third.id}\n' in body())
+        self.assertIn('"content": "Third"', body())
+
+        await inbox.put({'type': 'http.disconnect'})
+        await asyncio.wait_for(task, 1)
+
+    @override_settings(LIVE_COMMENTS_REPLAY_LIMIT=1)
+    async def test_replay_pages_through_the_backlog_and_keeps_late_commits(self):
+        """Test a backlog longer than a replay page is sent in full and a lower id committed late still arrives"""
+        scope = {'type': 'websocket', 'path': self.path, 'query_string': b'last_event_id=0', 'headers': []}
+        task, inbox, sent = self.start(scope)
+        await inbox.put({'type': 'websocket.connect'})
+
+        def ids():
+            return [json.loads(message['text'])['id'] for message in sent if message['type'] == 'websocket.send']
+        await self.wait_until(lambda: len(ids()) == 2)
+        await self.wait_until(lambda: get_broker()._subscriptions.get(self.post.id))
+
+        # The replayed comment is skipped; the later-committed lower id is not
+        for comment_id in (self.second.id, self.second.id + 2, self.second.id + 1):
+            get_broker().publish(self.post.id, {'id': comment_id})
+        await self.wait_until(lambda: len(ids()) == 4)
+        self.assertEqual(ids(), [self.first.id, self.second.id, self.second.id + 2, self.second.id + 1])
+
+        await inbox.put({'type': 'websocket.disconnect'})
+        await asyncio.wait_for(task, 1)
+
+    @override_settings(LIVE_COMMENTS_QUEUE_SIZE=2)
+    async def test_slow_websocket_client_is_disconnected_to_resume(self):
+        """Test an overflowing subscriber is closed with 1013 instead of blocking publishers"""
+        scope = {'type': 'websocket', 'path': self.path, 'query_string': f'last_event_id={self.second.id}'.encode(), 'headers': []}
+        task, inbox, sent = self.start(scope)
+        await inbox.put({'type': 'websocket.connect'})
+        await self.wait_until(lambda: sent and sent[0]['type'] == 'websocket.accept')
+        await self.wait_until(lambda: get_broker()._subscriptions.get(self.post.id))
+
+        for number in range(5):
+            get_broker().publish(self.post.id, {'id': self.second.id + number + 1})
+        await asyncio.wait_for(task, 1)
+        self.assertEqual(sent[-1], {'type': 'websocket.close', 'code': 1013})
+
+
+@override_settings(TRENDING_LAG_SECONDS=0)
+class TrendingTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.user = CustomUser.objects.create_user(username='writer', password='writerpass123')
+        self.fresh, self.quiet, self.old = [Post.objects.create(author=self.user, title=title, content='Body') for title in ['Fresh', 'Quiet', 'Old']]
+        for post, count in [(self.fresh, 3), (self.quiet, 1), (self.old, 6)]:
+            for i in range(count):
+                Comment.objects.create(post=post, author=self.user, content=f'Comment {i}')
+        two_days_ago = timezone.now() - timezone.timedelta(days=2)
+        Post.objects.filter(pk=self.old.pk).update(created_at=two_days_ago)
+        Comment.objects.filter(post=self.old).update(created_at=two_days_ago)
+
+    def trending(self):
+        response = self.client.get(reverse('posts:post-trending'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['title'] for item in response.data]
+
+    def test_scores_decay_and_are_updated_incrementally(self):
+        """Test recent activity outranks a larger but older burst, and only new events are read on refresh"""
+        call_command('refresh_trending', stdout=StringIO())
+        self.assertEqual(self.trending(), ['Fresh', 'Quiet', 'Old'])
+        state = TrendingState.objects.get()
+        self.assertEqual(state.last_comment_id, Comment.objects.latest('id').id)
+
+        for i in range(3):
+            Comment.objects.create(post=self.quiet, author=self.user, content=f'Reply {i}')
+        Like.objects.create(user=self.user, post=self.quiet)
+        out = StringIO()
+        call_command('refresh_trending', stdout=out)
+        self.assertIn('Applied 4 event(s)', out.getvalue())
+        self.assertEqual(self.trending(), ['Quiet', 'Fresh', 'Old'])
+
+    @override_settings(TRENDING_LAG_SECONDS=60)
+    def test_recent_events_hold_the_watermark_back(self):
+        """Test events are folded in once older than the lag, never skipping past a recent one"""
+        Post.objects.update(created_at=timezone.now() - timezone.timedelta(minutes=5))
+        Comment.objects.filter(post=self.old).update(created_at=timezone.now() - timezone.timedelta(minutes=5))
+        call_command('refresh_trending', stdout=StringIO())
+        state = TrendingState.objects.get()
+        # The fresh comments come first by id and are too recent, so none are read yet
+        self.assertEqual((state.last_post_id, state.last_comment_id), (self.old.id, 0))
+
+        Comment.objects.update(created_at=timezone.now() - timezone.timedelta(minutes=5))
+        out = StringIO()
+        call_command('refresh_trending', stdout=out)
+        self.assertIn('Applied 10 event(s)', out.getvalue())
+
+    @override_settings(TRENDING_MIN_SCORE=0.05)
+    def test_cold_posts_are_pruned(self):
+        """Test posts whose decayed score falls below the floor leave the table"""
+        out = StringIO()
+        call_command('refresh_trending', stdout=out)
+        self.assertIn('pruned 1 cold post(s)', out.getvalue())
+        self.assertEqual(self.trending(), ['Fresh', 'Quiet'])
+
+
+class HotQueryIndexTests(APITestCase):
+    def test_benchmark_compares_plans_and_rolls_back(self):
+        """Test the benchmark reports both index plans and leaves no seeded rows or index changes behind"""
+        out = StringIO()
+        call_command('benchmark_hot_queries', '--users', '3', '--posts', '30', '--comments', '200', '--runs', '1', stdout=out)
+        self.assertIn('comment_thread_idx', out.getvalue())
+        self.assertIn('bench_comment_post_idx', out.getvalue())
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(CustomUser.objects.filter(username__startswith='bench-').exists())
+        # The composite index is back and still chosen for a thread page
+        plan = Comment.objects.filter(post_id=1).order_by('-created_at', '-id').explain()
+        self.assertIn('comment_thread_idx', plan)
+
+
+class BulkTransferTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.admin = CustomUser.objects.create_user(username='admin', password='adminpass123', is_staff=True)
+        self.user = CustomUser.objects.create_user(username='writer', password='writerpass123')
+        for i in range(3):
+            post = Post.objects.create(author=self.user, title=f'Post {i}', content='Body')
+            for j in range(i):
+                Comment.objects.create(post=post, author=self.admin, content=f'Comment {j}')
+        self.client.force_authenticate(self.admin)
+
+    def export(self):
+        response = self.client.get(reverse('posts:post-export'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        return b''.join(response.streaming_content)
+
+    @override_settings(TIMELINE_ASYNC=False)
+    def test_export_round_trips_through_import(self):
+        """Test exported NDJSON imports in chunks with counters, timestamps and timelines kept in step"""
+        Post.objects.filter(title='Post 2').update(created_at=timezone.now() - timezone.timedelta(days=30))
+        follower = CustomUser.objects.create_user(username='reader', password='readerpass123')
+        follower.following.add(self.user)
+        lines = self.export().splitlines()
+        self.assertEqual([json.loads(line)['type'] for line in lines], ['post', 'post', 'comment', 'post', 'comment', 'comment'])
+
+        with override_settings(POSTS_TRANSFER_CHUNK_SIZE=2), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.generic('POST', reverse('posts:post-import'), b'\n'.join(lines), content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['posts_created'], response.data['comments_created'], response.data['error_count']), (3, 3, 0))
+        original, imported = Post.objects.filter(title='Post 2').order_by('id')
+        self.assertEqual((imported.comment_count, imported.comments.count()), (2, 2))
+        self.assertEqual(imported.created_at, original.created_at)
+        comment_times = lambda post: sorted(post.comments.values_list('created_at', flat=True))
+        self.assertEqual(comment_times(imported), comment_times(original))
+        self.assertTrue(TimelineEntry.objects.filter(user=follower, post=imported, created_at=original.created_at).exists())
+
+    def test_invalid_lines_are_reported_and_skipped(self):
+        """Test bad JSON, unknown authors, unknown posts and serializer errors are reported per line"""
+        post = Post.objects.first()
+        body = b'\n'.join([
+            b'not json',
+            json.dumps({'type': 'post', 'author': 'ghost', 'title': 'T', 'content': 'C'}).encode(),
+            json.dumps({'type': 'post', 'author': 'writer', 'title': 'x' * 200, 'content': 'C'}).encode(),
+            json.dumps({'type': 'comment', 'post_ref': 99, 'author': 'writer', 'content': 'C'}).encode(),
+            json.dumps({'type': 'comment', 'post': post.id, 'author': 'writer', 'content': 'Kept'}).encode(),
+            json.dumps({'type': 'post', 'author': ['writer'], 'title': 'T', 'content': 'C'}).encode(),
+            json.dumps({'type': 'comment', 'post': [post.id], 'author': 'writer', 'content': 'C'}).encode(),
+            json.dumps({'type': 'post', 'author': 'writer', 'title': 'T', 'content': 'C', 'created_at': '2024-13-45T00:00:00'}).encode(),
+            json.dumps({'type': 'comment', 'post': 10 ** 30, 'author': 'writer', 'content': 'C'}).encode(),
+        ])
+        response = self.client.generic('POST', reverse('posts:post-import'), body, content_type='application/x-ndjson')
+        self.assertEqual(sorted(error['line'] for error in response.data['errors']), [1, 2, 3, 4, 6, 7, 8, 9])
+        self.assertEqual(response.data['comments_created'], 1)
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(reverse('posts:post-export')).status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,242 @@
+"""
+Bulk export and import of posts and comments as NDJSON, one JSON object per line:
+
+    {"type": "post", "ref": 12, "author": "alice", "title": "...", "content": "...", "created_at": "..."}
+    {"type": "comment", "post_ref": 12, "author": "bob", "content": "...", "created_at": "..."}
+
+Export streams every post followed by its comments, merging two ordered
+``.iterator(chunk_size)`` scans, so memory does not grow with the dataset.
+
+Import reads the request body line by line and handles it in chunks: one query
+resolves every author username in the chunk, rows are validated with
+PostCreateUpdateSerializer/CommentSerializer and inserted with bulk_create, and
+comment counters are bumped once per chunk. A comment names its post either by
+``post_ref`` (the ``ref`` of a post earlier in the same stream; only the most
+recent IMPORT_REF_WINDOW refs are remembered, which is enough for export order)
+or by ``post`` (the id of an existing post). Imported rows get new ids but keep
+their ``created_at``, and imported posts are fanned out to followers' home
+timelines once their chunk commits.
+"""
+
+import json
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BigIntegerField
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import CustomUser
+from social_media_api.counters import apply_counter_deltas
+from timeline.services import fanout_posts
+from timeline.tasks import enqueue
+from .models import Comment, Post
+from .serializers import CommentSerializer, PostCreateUpdateSerializer
+
+
+def transfer_setting(name, default):
+    return getattr(settings, f'POSTS_TRANSFER_{name}', default)
+
+
+# Export
+
+def export_lines(chunk_size=None):
+    """
+    Yield NDJSON lines (bytes) for every post and its comments
+    """
+    chunk_size = chunk_size or transfer_setting('CHUNK_SIZE', 2000)
+    posts = Post.objects.order_by('id').values('id', 'author__username', 'title', 'content', 'created_at')
+    comments = (
+        Comment.objects.order_by('post_id', 'id')
+        .values('post_id', 'author__username', 'content', 'created_at')
+        .iterator(chunk_size=chunk_size)
+    )
+    pending = next(comments, None)
+    for post in posts.iterator(chunk_size=chunk_size):
+        yield _line({
+            'type': 'post', 'ref': post['id'], 'author': post['author__username'],
+            'title': post['title'], 'content': post['content'], 'created_at': post['created_at'],
+        })
+        while pending is not None and pending['post_id'] == post['id']:
+            yield _line({
+                'type': 'comment', 'post_ref': pending['post_id'], 'author': pending['author__username'],
+                'content': pending['content'], 'created_at': pending['created_at'],
+            })
+            pending = next(comments, None)
+
+
+def _line(record):
+    record['created_at'] = record['created_at'].isoformat()
+    return json.dumps(record).encode() + b'\n'
+
+
+# Import
+
+class ImportResult:
+    max_errors = 100
+
+    def __init__(self):
+        self.posts = 0
+        self.comments = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, line_number, detail):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line_number, 'errors': detail})
+
+    def as_dict(self):
+        return {'posts_created': self.posts, 'comments_created': self.comments, 'error_count': self.error_count, 'errors': self.errors}
+
+
+class Importer:
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or transfer_setting('CHUNK_SIZE', 2000)
+        self.refs = OrderedDict()
+        self.result = ImportResult()
+
+    def run(self, lines):
+        chunk = []
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                self.result.error(line_number, 'invalid JSON')
+                continue
+            if not isinstance(record, dict) or record.get('type') not in ('post', 'comment'):
+                self.result.error(line_number, "each line must be an object with type 'post' or 'comment'")
+                continue
+            problems = self.check_types(record) or self.parse_created_at(record)
+            if problems:
+                self.result.error(line_number, problems)
+                continue
+            chunk.append((line_number, record))
+            if len(chunk) >= self.chunk_size:
+                self.import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.import_chunk(chunk)
+        return self.result
+
+    # Fields used as lookup keys, so they must have a hashable type before they reach import_chunk
+    KEY_TYPES = {'author': (str,), 'ref': (int, str), 'post_ref': (int, str), 'post': (int,)}
+
+    def check_types(self, record):
+        problems = {}
+        for field, types in self.KEY_TYPES.items():
+            value = record.get(field)
+            if field in record and (isinstance(value, bool) or not isinstance(value, types)):
+                problems[field] = f"must be {' or '.join('an integer' if t is int else 'a string' for t in types)}"
+        # ``post`` is looked up as a primary key, which the database can't compare past 64 bits
+        post = record.get('post')
+        if 'post' not in problems and isinstance(post, int) and abs(post) > BigIntegerField.MAX_BIGINT:
+            problems['post'] = "is out of range"
+        return problems
+
+    def parse_created_at(self, record):
+        """
+        Replace an ISO 8601 ``created_at`` with the datetime it names (naive means the current time zone)
+        """
+        value = record.get('created_at')
+        if value is None:
+            return {}
+        try:
+            parsed = parse_datetime(value) if isinstance(value, str) else None
+        except ValueError:
+            # Well formed but impossible, e.g. month 13
+            parsed = None
+        if parsed is None:
+            return {'created_at': 'must be an ISO 8601 datetime'}
+        record['created_at'] = timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+        return {}
+
+    def remember(self, ref, post_id):
+        self.refs[ref] = post_id
+        self.refs.move_to_end(ref)
+        while len(self.refs) > transfer_setting('IMPORT_REF_WINDOW', 10000):
+            self.refs.popitem(last=False)
+
+    def import_chunk(self, chunk):
+        # Prefetched lookups for everything the chunk references: one query each
+        usernames = {record['author'] for _, record in chunk if 'author' in record}
+        authors = dict(CustomUser.objects.filter(username__in=usernames).values_list('username', 'id'))
+        post_ids = {record['post'] for _, record in chunk if record['type'] == 'comment' and 'post' in record}
+        existing_posts = set(Post.objects.filter(pk__in=post_ids).values_list('pk', flat=True))
+
+        with transaction.atomic():
+            # Posts first, so comments later in the same chunk can point at them
+            posts, refs = [], []
+            for line_number, record in chunk:
+                if record['type'] == 'post':
+                    author_id = self.resolve_author(line_number, record, authors)
+                    data = self.validate(line_number, PostCreateUpdateSerializer, record)
+                    if author_id is not None and data is not None:
+                        posts.append(Post(author_id=author_id, **data))
+                        refs.append((record.get('ref'), record.get('created_at')))
+            Post.objects.bulk_create(posts)
+            for (ref, created_at), post in zip(refs, posts):
+                post.created_at = created_at or post.created_at
+                if ref is not None:
+                    self.remember(ref, post.pk)
+            self.keep_timestamps(Post, posts)
+
+            comments = []
+            for line_number, record in chunk:
+                if record['type'] == 'comment':
+                    author_id = self.resolve_author(line_number, record, authors)
+                    post_id = self.resolve_post(line_number, record, existing_posts)
+                    data = self.validate(line_number, CommentSerializer, record)
+                    if author_id is not None and post_id is not None and data is not None:
+                        comments.append(Comment(author_id=author_id, post_id=post_id, created_at=record.get('created_at'), **data))
+            # bulk_create stamps auto_now_add fields, so remember the exported times first
+            created_at = [comment.created_at for comment in comments]
+            Comment.objects.bulk_create(comments)
+            for comment, when in zip(comments, created_at):
+                comment.created_at = when or comment.created_at
+            self.keep_timestamps(Comment, comments)
+            # bulk_create skips posts.signals; apply the counter increments once per distinct delta
+            apply_counter_deltas(Post, 'comment_count', Counter(comment.post_id for comment in comments))
+
+            if posts:
+                # bulk_create skips PostListCreateView.perform_create, which does this for new posts
+                enqueue(fanout_posts, [post.pk for post in posts])
+
+        self.result.posts += len(posts)
+        self.result.comments += len(comments)
+
+    def keep_timestamps(self, model, rows):
+        """
+        Write back the exported created_at that bulk_create replaced; the rows start out unmodified
+        """
+        for row in rows:
+            row.updated_at = row.created_at
+        model.objects.bulk_update(rows, ['created_at', 'updated_at'], batch_size=500)
+
+    def resolve_author(self, line_number, record, authors):
+        author_id = authors.get(record.get('author'))
+        if author_id is None:
+            self.result.error(line_number, {'author': f"unknown username {record.get('author')!r}"})
+        return author_id
+
+    def resolve_post(self, line_number, record, existing_posts):
+        if 'post_ref' in record:
+            post_id = self.refs.get(record['post_ref'])
+            if post_id is None:
+                self.result.error(line_number, {'post_ref': f"no post with ref {record['post_ref']!r} earlier in this import"})
+            return post_id
+        if record.get('post') in existing_posts:
+            return record['post']
+        self.result.error(line_number, {'post': f"unknown post {record.get('post')!r}"})
+        return None
+
+    def validate(self, line_number, serializer_class, record):
+        serializer = serializer_class(data=record)
+        if serializer.is_valid():
+            return serializer.validated_data
+        self.result.error(line_number, serializer.errors)
+        return None
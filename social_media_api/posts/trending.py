@@ -0,0 +1,132 @@
+"""
+Trending posts: time-decayed activity scores maintained incrementally.
+
+An event (post created, comment, like) at time t with weight w contributes
+w * exp(rate * t) to its post, where rate = ln 2 / TRENDING_HALF_LIFE_HOURS.
+Scores are stored as the log of that sum (TrendingScore.score), so
+
+* folding in new events is ``logaddexp(score, log(w) + rate * t)``;
+* old rows never need re-decaying, since decay is a shared factor at read time;
+* the trending list is a top-K scan of the score index.
+
+``refresh_trending`` only reads events with ids above the TrendingState
+watermarks, so each run costs the activity since the previous one. Ids are
+assigned at insert but become visible at commit, so a lower id can appear after
+a higher one was read; a watermark therefore only advances over events older
+than TRENDING_LAG_SECONDS, and any transaction shorter than that is never skipped.
+"""
+
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import takewhile
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Comment, Like, Post, TrendingScore, TrendingState
+
+
+EPOCH = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+DEFAULT_WEIGHTS = {'post': 1.0, 'comment': 1.0, 'like': 0.5}
+
+
+def decay_rate():
+    """
+    Exponential decay rate per hour
+    """
+    return math.log(2) / getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 6)
+
+
+def log_weight(kind, when):
+    weight = getattr(settings, 'TRENDING_WEIGHTS', DEFAULT_WEIGHTS)[kind]
+    hours = (when - EPOCH).total_seconds() / 3600
+    return math.log(weight) + decay_rate() * hours
+
+
+def logaddexp(a, b):
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def current_value(score, now=None):
+    """
+    A stored log score as the decayed activity it represents at ``now``
+    """
+    hours = ((now or timezone.now()) - EPOCH).total_seconds() / 3600
+    return math.exp(score - decay_rate() * hours)
+
+
+def _new_events(state, batch_size, cutoff):
+    """
+    Up to ``batch_size`` unseen events per source created before ``cutoff``, as
+    (post_id, kind, when), plus the advanced watermarks
+    """
+    sources = [
+        ('last_post_id', 'post', Post.objects.values_list('id', 'id', 'created_at')),
+        ('last_comment_id', 'comment', Comment.objects.values_list('id', 'post_id', 'created_at')),
+        ('last_like_id', 'like', Like.objects.values_list('id', 'post_id', 'created_at')),
+    ]
+    events, watermarks = [], {}
+    for watermark, kind, rows in sources:
+        rows = rows.filter(id__gt=getattr(state, watermark)).order_by('id')[:batch_size]
+        # Stop at the first recent event: lower ids may still be uncommitted behind it
+        rows = list(takewhile(lambda row: row[2] <= cutoff, rows))
+        if rows:
+            watermarks[watermark] = rows[-1][0]
+        events.extend((post_id, kind, when) for _, post_id, when in rows)
+    return events, watermarks
+
+
+def refresh_trending(batch_size=5000):
+    """
+    Fold one batch of new activity into TrendingScore; returns how many events were applied
+    """
+    with transaction.atomic():
+        state, _ = TrendingState.objects.select_for_update().get_or_create(pk=1)
+        cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'TRENDING_LAG_SECONDS', 60))
+        events, watermarks = _new_events(state, batch_size, cutoff)
+
+        increments = defaultdict(lambda: None)
+        for post_id, kind, when in events:
+            increments[post_id] = logaddexp(increments[post_id], log_weight(kind, when))
+
+        existing = TrendingScore.objects.in_bulk(list(increments))
+        # Events for posts deleted since are dropped
+        live = set(Post.objects.filter(pk__in=[post_id for post_id in increments if post_id not in existing]).values_list('pk', flat=True))
+        now = timezone.now()
+        updated, created = [], []
+        for post_id, increment in increments.items():
+            if post_id in existing:
+                row = existing[post_id]
+                row.score = logaddexp(row.score, increment)
+                row.updated_at = now
+                updated.append(row)
+            elif post_id in live:
+                created.append(TrendingScore(post_id=post_id, score=increment))
+        TrendingScore.objects.bulk_update(updated, ['score', 'updated_at'], batch_size=1000)
+        TrendingScore.objects.bulk_create(created, batch_size=1000)
+
+        for watermark, value in watermarks.items():
+            setattr(state, watermark, value)
+        state.refreshed_at = now
+        state.save()
+    return len(events)
+
+
+def prune_trending(min_value=None):
+    """
+    Drop rows whose decayed score has fallen below ``min_value``; they rejoin on new activity
+    """
+    if min_value is None:
+        min_value = getattr(settings, 'TRENDING_MIN_SCORE', 0.01)
+    hours = (timezone.now() - EPOCH).total_seconds() / 3600
+    deleted, _ = TrendingScore.objects.filter(score__lt=math.log(min_value) + decay_rate() * hours).delete()
+    return deleted
+
+
+def trending_post_ids(limit):
+    return list(TrendingScore.objects.order_by('-score').values_list('post_id', flat=True)[:limit])
@@ -6,6 +6,11 @@ app_name = 'posts'
 urlpatterns = [
     path('', views.PostListCreateView.as_view(), name='post-list'),
     path('<int:pk>/', views.PostDetailView.as_view(), name='post-detail'),
+    path('<int:pk>/like/', views.PostLikeView.as_view(), name='post-like'),
+    path('trending/', views.TrendingPostsView.as_view(), name='post-trending'),
+    path('export/', views.PostExportView.as_view(), name='post-export'),
+    path('import/', views.PostImportView.as_view(), name='post-import'),
+    path('likes/', views.PostReactionsView.as_view(), name='post-reactions'),
     path('<int:post_id>/comments/', views.CommentListCreateView.as_view(), name='comment-list-create'),
     path('<int:post_id>/comments/<int:pk>/', views.CommentDetailView.as_view(), name='comment-detail'),
 ]
\ No newline at end of file
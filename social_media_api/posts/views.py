@@ -3,9 +3,21 @@ from webbrowser import get
 from django.shortcuts import render
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from .models import Post, Comment
+from django.http import StreamingHttpResponse
+from django.db import transaction
+from django.db.models import BigIntegerField
+from .models import Post, Comment, Like
 from rest_framework import generics, permissions, status
+from rest_framework.views import APIView
 from .serializers import PostSerializer, CommentSerializer, PostCreateUpdateSerializer
+from .queries import post_queryset, comment_queryset
+from .likes import like_post, unlike_post, reactions_for
+from .trending import trending_post_ids
+from .transfer import Importer, export_lines
+from .conditional import ConditionalGetMixin, comment_validators, list_validators, post_validators
+from social_media_api.throttling import IPRateThrottle, TokenRateThrottle, UserRateThrottle
+from timeline.services import fanout_post
+from timeline.tasks import enqueue
 
 class IsAuthorOrReadOnly(permissions.BasePermission):
     """
@@ -13,12 +25,23 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         # Allow read permissions to any request, so we'll always allow GET, HEAD or OPTIONS requests.
-        if request.Method in permissions.SAFE_METHODS:
+        if request.method in permissions.SAFE_METHODS:
             return True
         return obj.author == request.user
 
 
-class PostListCreateView(generics.ListCreateAPIView):
+class ReactionContextMixin:
+    """
+    Resolve my_reaction for a whole page of posts in one batched lookup
+    """
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get('many') and args:
+            context = kwargs.setdefault('context', self.get_serializer_context())
+            context['reactions'] = reactions_for(self.request.user, [post.pk for post in args[0]])
+        return super().get_serializer(*args, **kwargs)
+
+
+class PostListCreateView(ReactionContextMixin, generics.ListCreateAPIView):
     """
     View to list all posts and create new posts 
     """ 
@@ -27,19 +50,54 @@ class PostListCreateView(generics.ListCreateAPIView):
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    # ?ordering=engagement pages by the stored comment_count (post_engagement_idx)
+    orderings = {
+        'recent': ('-created_at', '-id'),
+        'engagement': ('-comment_count', '-id'),
+    }
+
+    @property
+    def keyset_ordering(self):
+        return self.orderings.get(self.request.query_params.get('ordering'), self.orderings['recent'])
+
+    def get_queryset(self):
+        return post_queryset(super().get_queryset())
+
     """
      Override the get_serializer_class method to return different serializers based on the request method.
     """
-    def get_serializer(self):
+    def get_serializer_class(self):
         if self.request.method == 'POST':
             return PostCreateUpdateSerializer
         return PostSerializer
     
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        post = serializer.save(author=self.request.user)
+        # Fan the new post out to followers' home timelines in the background
+        enqueue(fanout_post, post.pk)
 
 
-class PostDetailView(generics.RetrieveUpdateAPIView):
+class TrendingPostsView(ReactionContextMixin, generics.ListAPIView):
+    """
+    Top posts by time-decayed activity, read from the materialized TrendingScore index.
+    GET ?limit= (default 20, at most 100)
+    """
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = None
+    max_limit = 100
+
+    def get_queryset(self):
+        try:
+            limit = min(max(int(self.request.query_params.get('limit', 20)), 1), self.max_limit)
+        except ValueError:
+            limit = 20
+        post_ids = trending_post_ids(limit)
+        posts = post_queryset().in_bulk(post_ids)
+        return [posts[post_id] for post_id in post_ids if post_id in posts]
+
+
+class PostDetailView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     """
     View to retrieve, update or delete a specific post.
     GET: Retrieve a post by its ID.
@@ -47,17 +105,23 @@ class PostDetailView(generics.RetrieveUpdateAPIView):
     DELETE: Delete a post by its ID (only the author can delete).
     """
     queryset= Post.objects.all().order_by('-created_at')
-    serializer_classes = [permissions.IsAuthenticatedOrReadOnly]
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get_queryset(self):
+        return post_queryset(super().get_queryset())
 
-    def get_serializer(self):
+    def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
             return PostCreateUpdateSerializer
         return PostSerializer
+
+    def get_validators(self, request, pk):
+        return post_validators(request, pk)
     
 
 
 
-class CommentListCreateView(generics.ListCreateAPIView):
+class CommentListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     """
     View to list all comments for a specific post and create new comment for a specific posts.
     GET: List all comments for a specific post.
@@ -66,22 +130,35 @@ class CommentListCreateView(generics.ListCreateAPIView):
 
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    keyset_ordering = ('-created_at', '-id')
+    throttle_scope = 'comment'
+
+    def get_throttles(self):
+        # Only comment creation is limited; reads are served (and cached) freely
+        if self.request.method in permissions.SAFE_METHODS:
+            return []
+        return [UserRateThrottle(), TokenRateThrottle(), IPRateThrottle()]
 
-    def queryset(self):
+    def get_queryset(self):
         """
         Filter comments to only those related to the specified post, ordered by creation time (newest first).
         """
         post_id = self.kwargs.get('post_id')
-        return Comment.objects.filter(post_id=post_id).order_by('-created_at')
+        return comment_queryset().filter(post_id=post_id).order_by('-created_at')
+
+    def get_validators(self, request, post_id):
+        return list_validators(request, Comment.objects.filter(post_id=post_id))
     
     def perform_create(self, serializer):
         post_id = self.kwargs.get('post_id')
         post = get_object_or_404(Post, id=post_id)
-        serializer.save(author=self.request.user, post=post)
+        # The comment, its Post.comment_count increment (posts.signals) and its notification outbox row commit together
+        with transaction.atomic():
+            serializer.save(author=self.request.user, post=post)
 
 
 
-class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CommentDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     View to retrieve, update or delete a specific comment.
     GET: Retrieve a comment by its ID.
@@ -90,9 +167,100 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
     queryset = Comment.objects.all().order_by('-created_at')
     serializer_class = CommentSerializer
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
 
     def get_queryset(self):
         post_id = self.kwargs.get('post_id')
-        return Comment.objects.filter(post_id=post_id).order_by('-created_at')
-    
\ No newline at end of file
+        return comment_queryset().filter(post_id=post_id).order_by('-created_at')
+
+    def get_validators(self, request, post_id, pk):
+        return comment_validators(pk, post_id)
+
+    def perform_destroy(self, instance):
+        # The delete and its Post.comment_count decrement (posts.signals) commit together
+        with transaction.atomic():
+            instance.delete()
+
+
+
+class PostLikeView(APIView):
+    """
+    POST: like a post, optionally with {"reaction": ...}; reacting again changes the reaction.
+    DELETE: remove the like.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        post = get_object_or_404(Post, pk=pk)
+        reaction = request.data.get('reaction', Like.Reaction.LIKE)
+        if reaction not in Like.Reaction.values:
+            return Response(
+                {
+                    'error': f"reaction must be one of {', '.join(Like.Reaction.values)}"
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+        created = like_post(request.user, post, reaction)
+        return self.respond(post, reaction, status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    def delete(self, request, pk):
+        post = get_object_or_404(Post, pk=pk)
+        unlike_post(request.user, post)
+        return self.respond(post, None, status.HTTP_200_OK)
+
+    def respond(self, post, reaction, status_code):
+        like_count = post_queryset(Post.objects.filter(pk=post.pk)).values_list('total_likes', flat=True).get()
+        return Response({'post': post.pk, 'my_reaction': reaction, 'like_count': like_count}, status=status_code)
+
+
+class PostReactionsView(APIView):
+    """
+    Batched "did I react to these posts": GET ?ids=1,2,3 returns {post_id: reaction or null}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_ids = 100
+
+    def get(self, request):
+        try:
+            post_ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()]
+            # Ids past 64 bits would overflow the database lookup
+            if any(abs(post_id) > BigIntegerField.MAX_BIGINT for post_id in post_ids):
+                raise ValueError
+        except ValueError:
+            return Response(
+                {
+                    'error': "ids must be a comma separated list of post ids"
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(post_ids) > self.max_ids:
+            return Response(
+                {
+                    'error': f"At most {self.max_ids} ids per request"
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+        reactions = reactions_for(request.user, post_ids)
+        return Response({post_id: reactions.get(post_id) for post_id in post_ids}, status=status.HTTP_200_OK)
+
+
+class PostExportView(APIView):
+    """
+    Stream every post followed by its comments as NDJSON (admin only)
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        response = StreamingHttpResponse(export_lines(), content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="posts.ndjson"'
+        return response
+
+
+class PostImportView(APIView):
+    """
+    Import posts and comments from an NDJSON request body in the export format (admin only).
+    The body is read line by line and inserted in chunks; invalid lines are skipped and reported.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        # Iterate the raw body instead of request.data so it is never loaded whole
+        result = Importer().run(request.stream or [])
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
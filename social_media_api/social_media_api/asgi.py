@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_media_api.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after setup: the live comment stream uses the ORM (see streaming.py)
+from .streaming import stream_router  # noqa: E402
+
+application = stream_router(django_application)
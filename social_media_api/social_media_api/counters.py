@@ -0,0 +1,41 @@
+"""
+Denormalized counters (follower counts, comment and like counts) are maintained
+with F() expression updates and never through model instances, so an instance
+loaded before an increment holds a stale value. CounterFieldsMixin keeps those
+columns out of the UPDATE of a full ``save()``, so editing a profile or a post
+cannot write the stale counters back over concurrent increments.
+
+Saves with explicit ``update_fields`` are left alone, and so is the INSERT
+Model.save() falls back to when the row no longer exists.
+
+apply_counter_deltas is the batched write side: many rows' increments in as
+few UPDATEs as there are distinct deltas.
+"""
+
+from collections import defaultdict
+
+from django.db.models import F
+
+
+class CounterFieldsMixin:
+    """
+    Model mixin; list the F()-maintained columns in ``COUNTER_FIELDS``
+    """
+    COUNTER_FIELDS = ()
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        if update_fields is None:
+            values = [value for value in values if value[0].attname not in self.COUNTER_FIELDS]
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+
+def apply_counter_deltas(model, field, deltas):
+    """
+    Add ``deltas`` ({pk: delta}) to ``model``'s ``field`` with F() expressions, one UPDATE per distinct delta
+    """
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        model.objects.filter(pk__in=pks).update(**{field: F(field) + delta})
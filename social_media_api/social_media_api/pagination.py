@@ -0,0 +1,161 @@
+"""
+Keyset (cursor) pagination for the social_media_api list endpoints.
+
+Pages are addressed by the ordering values of the last row seen instead of an
+OFFSET, so every page is one index seek no matter how deep the client scrolls.
+Cursors are opaque base64 tokens; clients should only follow the ``next`` and
+``previous`` links.
+"""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import BigIntegerField, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate a queryset over a unique ordering such as ``('-created_at', '-id')``.
+
+    Views choose the ordering with a ``keyset_ordering`` attribute; the last field
+    must be unique (normally the primary key) so positions are never ambiguous.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE or 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, 'keyset_ordering', self.ordering))
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    # Cursor encoding
+
+    def encode_cursor(self, values, reverse=False):
+        payload = {'v': [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]}
+        if reverse:
+            payload['r'] = 1
+        return urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model, fields):
+        """
+        Return ``(values, reverse)`` for the request's cursor, or ``(None, False)`` on the first page
+        """
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+            raw = payload['v']
+            if len(raw) != len(fields):
+                raise ValueError
+            values = [model._meta.get_field(name).to_python(value) for name, value in zip(fields, raw)]
+            # Ids past 64 bits can't be compared by the database (OverflowError/DataError)
+            if any(isinstance(value, int) and abs(value) > BigIntegerField.MAX_BIGINT for value in values):
+                raise ValueError
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, bool(payload.get('r'))
+
+    def get_link(self, values, reverse=False):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values, reverse))
+
+    # Queryset paging
+
+    @staticmethod
+    def _split(ordering):
+        return [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+    def _seek(self, columns, values, reverse):
+        """
+        Build the lexicographic "strictly after this row" filter for the ordering
+        """
+        clauses = []
+        for index, (name, descending) in enumerate(columns):
+            lookup = 'lt' if descending != reverse else 'gt'
+            equal = {column: value for (column, _), value in zip(columns[:index], values[:index])}
+            clauses.append(Q(**equal, **{f'{name}__{lookup}': values[index]}))
+        return reduce(lambda left, right: left | right, clauses)
+
+    def _position(self, obj, columns):
+        if isinstance(obj, dict):
+            return [obj[name] for name, _ in columns]
+        return [getattr(obj, name) for name, _ in columns]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        columns = self._split(self.get_ordering(view))
+        values, reverse = self.decode_cursor(request, queryset.model, [name for name, _ in columns])
+
+        order_by = [('-' if descending != reverse else '') + name for name, descending in columns]
+        queryset = queryset.order_by(*order_by)
+        if values is not None:
+            queryset = queryset.filter(self._seek(columns, values, reverse))
+
+        rows = list(queryset[:self.page_size_value + 1])
+        has_more = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+        if reverse:
+            rows.reverse()
+
+        positions = [self._position(rows[0], columns), self._position(rows[-1], columns)] if rows else None
+        self.set_links(positions, values, reverse, has_more)
+        return rows
+
+    def set_links(self, positions, values, reverse, has_more):
+        """
+        Set the next/previous links of a page.
+
+        ``positions`` are the (first, last) rows' ordering values in display order,
+        or None for an empty page; ``values`` and ``reverse`` come from the request's
+        cursor and ``has_more`` says whether rows remain past the page in the
+        direction it was read. Also used by views that page without a queryset.
+        """
+        self.next_link = self.previous_link = None
+        if positions:
+            first, last = positions
+            # Walking backwards we came from a later page, so there is always a next one
+            has_next = has_more or reverse
+            has_previous = has_more if reverse else values is not None
+            if has_next:
+                self.next_link = self.get_link(last)
+            if has_previous:
+                self.previous_link = self.get_link(first, reverse=True)
+        elif values is not None:
+            # Ran off the end of the data: offer a way back to the first page
+            self.previous_link = remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next_link,
+            'previous': self.previous_link,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
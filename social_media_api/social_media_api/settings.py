@@ -41,6 +41,8 @@ INSTALLED_APPS = [
 	'rest_framework',
     'rest_framework.authtoken',
 	'accounts',
+    'timeline',
+    'notifications',
 ]
 
 MIDDLEWARE = [
@@ -128,12 +130,95 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
-    ]
+    ],
+    # Keyset pagination on (created_at, id); see social_media_api/pagination.py
+    'DEFAULT_PAGINATION_CLASS': 'social_media_api.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
+}
+
+
+AUTH_USER_MODEL = 'accounts.CustomUser'
+
+
+# Token -> user cache for accounts.authentication.CachedTokenAuthentication
+# Set SHARED_CACHE to a CACHES alias to share entries between worker processes
+TOKEN_AUTH_CACHE = {
+    'LOCAL_MAXSIZE': 10000,
+    'LOCAL_TTL': 30,
+    'SHARED_CACHE': None,
+    'SHARED_TTL': 300,
 }
 
 
-AUTH_USER_MODEL = 'accounts.CustomUser'
\ No newline at end of file
+# Rate limits (social_media_api.throttling) as '<scope>.<user|token|ip>': '<count>/<s|min|hour|day>'.
+# MemoryBackend is per process; use CacheBackend with a shared THROTTLE_CACHE when running several workers.
+THROTTLE_BACKEND = 'social_media_api.throttling.MemoryBackend'
+THROTTLE_CACHE = 'default'
+THROTTLE_RATES = {
+    'login.ip': '30/min',
+    'register.ip': '20/hour',
+    'follow.user': '300/min',
+    'follow.token': '300/min',
+    'comment.user': '60/min',
+    'comment.token': '60/min',
+    'comment.ip': '120/min',
+}
+
+
+# Follow-graph answers (accounts.graph) and the per-user versions that retire them.
+# With several workers this must be a CACHES alias shared by all of them (Redis, Memcached):
+# in a per-process cache, a follow only invalidates the worker that handled it.
+FOLLOW_GRAPH_CACHE = 'default'
+FOLLOW_GRAPH_CACHE_TIMEOUT = 60 * 15
+
+
+# "Who to follow" suggestions (accounts.suggestions)
+FOLLOW_SUGGESTIONS_SIZE = 20
+# Followers of accounts larger than this are refreshed by a full run instead of per follow
+FOLLOW_SUGGESTIONS_PROPAGATION_LIMIT = 1000
+
+
+# Username typeahead (accounts.autocomplete), an in-process index reloaded every interval
+AUTOCOMPLETE_REBUILD_INTERVAL = 3600
+AUTOCOMPLETE_MAX_SCAN = 5000
+
+
+# Number of latest comments embedded in each post payload (0 embeds all of them)
+POSTS_COMMENT_PREVIEW_SIZE = 3
+
+# Shard rows per post for like counters; folded into Post.like_count by fold_like_counters
+POSTS_LIKE_COUNTER_SHARDS = 8
+
+
+# NDJSON import/export (posts.transfer): rows per chunk, and how many imported post refs comments can point back to
+POSTS_TRANSFER_CHUNK_SIZE = 2000
+POSTS_TRANSFER_IMPORT_REF_WINDOW = 10000
+
+
+# Trending posts (posts.trending): activity weights decay with this half-life
+TRENDING_HALF_LIFE_HOURS = 6
+TRENDING_WEIGHTS = {'post': 1.0, 'comment': 1.0, 'like': 0.5}
+# Posts whose decayed score falls below this are dropped from the table
+TRENDING_MIN_SCORE = 0.01
+# Events are folded in once this old, so ones still in an open transaction are not skipped
+TRENDING_LAG_SECONDS = 60
+
+
+# Live comment stream (social_media_api.streaming); swap the broker for a shared one when running several processes
+LIVE_COMMENTS_BROKER = 'posts.live.InProcessBroker'
+LIVE_COMMENTS_QUEUE_SIZE = 100
+# Page size of the replay for a resuming client; pages continue until it is caught up
+LIVE_COMMENTS_REPLAY_LIMIT = 500
+LIVE_COMMENTS_HEARTBEAT = 15
+
+
+# Home timeline fan-out
+# Authors with at least TIMELINE_FANOUT_THRESHOLD followers are merged into feeds at read time
+TIMELINE_FANOUT_THRESHOLD = 10000
+TIMELINE_BACKFILL_SIZE = 50
+TIMELINE_WORKERS = 4
+TIMELINE_ASYNC = True
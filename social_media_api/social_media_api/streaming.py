@@ -0,0 +1,161 @@
+"""
+Live comment stream, served as plain ASGI next to the Django application.
+
+    GET /api/posts/<post_id>/comments/stream/   text/event-stream (SSE)
+    WS  /api/posts/<post_id>/comments/stream/   JSON text frames
+
+Clients subscribe to a post instead of polling CommentListCreateView. Each
+event carries the comment id; an SSE client reconnecting with Last-Event-ID
+(or any client passing ?last_event_id=) first gets the comments it missed,
+replayed from the database, then the live feed. Slow clients are disconnected
+when their bounded queue overflows (posts.live) and resume the same way.
+
+Live events arrive in commit order, so a comment can follow one with a higher
+id when its transaction committed later; clients should not treat ids as a
+sequence.
+
+Long-lived connections never hold a Django request thread: only the existence
+check and the replay touch the database, through sync_to_async.
+"""
+
+import asyncio
+import json
+import re
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+
+from posts.live import OVERFLOW, get_broker, live_setting, replay
+from posts.models import Post
+
+
+STREAM_PATH = re.compile(r'^/api/posts/(?P<post_id>\d+)/comments/stream/$')
+
+
+def stream_router(django_application):
+    """
+    Route comment stream requests to the streaming handlers and everything else to Django
+    """
+    async def application(scope, receive, send):
+        match = STREAM_PATH.match(scope.get('path', '')) if scope['type'] in ('http', 'websocket') else None
+        if match is None:
+            return await django_application(scope, receive, send)
+        handler = event_stream if scope['type'] == 'http' else websocket_stream
+        return await handler(scope, receive, send, int(match['post_id']))
+    return application
+
+
+def last_event_id(scope):
+    headers = dict(scope.get('headers', []))
+    query = parse_qs(scope.get('query_string', b'').decode())
+    value = headers.get(b'last-event-id', b'').decode() or query.get('last_event_id', [''])[0]
+    return int(value) if value.isdigit() else None
+
+
+async def comment_events(post_id, after_id, disconnected):
+    """
+    Yield replayed then live comment events for ``post_id``, or None as a heartbeat.
+
+    Ends when ``disconnected`` completes or the subscription overflows.
+    """
+    # Subscribe before replaying so nothing committed in between is lost; the replayed ids dedupe the overlap
+    subscription = get_broker().subscribe(post_id)
+    pending = None
+    try:
+        replayed = set()
+        if after_id is not None:
+            # Page through the backlog until a short page shows it is caught up
+            limit = live_setting('REPLAY_LIMIT', 500)
+            while True:
+                page = await sync_to_async(replay)(post_id, after_id, limit)
+                for event in page:
+                    replayed.add(event['id'])
+                    yield event
+                if len(page) < limit:
+                    break
+                after_id = page[-1]['id']
+
+        heartbeat = live_setting('HEARTBEAT', 15)
+        while True:
+            pending = pending or asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait({pending, disconnected}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                return
+            if pending not in done:
+                yield None
+                continue
+            event, pending = pending.result(), None
+            if event is OVERFLOW:
+                return
+            # Not a high-water mark: a lower id whose transaction committed late is still new
+            if event['id'] not in replayed:
+                yield event
+    finally:
+        if pending is not None:
+            pending.cancel()
+        subscription.close()
+
+
+async def wait_for(receive, message_type):
+    while True:
+        message = await receive()
+        if message['type'] == message_type:
+            return message
+
+
+async def event_stream(scope, receive, send, post_id):
+    if scope['method'] not in ('GET', 'HEAD'):
+        return await plain_response(send, 405, b'Method not allowed')
+    if not await sync_to_async(Post.objects.filter(pk=post_id).exists)():
+        return await plain_response(send, 404, b'Not found')
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    if scope['method'] == 'HEAD':
+        return await send({'type': 'http.response.body', 'body': b''})
+
+    disconnected = asyncio.ensure_future(wait_for(receive, 'http.disconnect'))
+    try:
+        # Tell EventSource how long to wait before reconnecting
+        await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+        async for event in comment_events(post_id, last_event_id(scope), disconnected):
+            if event is None:
+                body = b': keepalive\n\n'
+            else:
+                body = f"id: {event['id']}\nevent: comment\ndata: {json.dumps(event)}\n\n".encode()
+            # The server's send() waits while the client's socket buffer is full
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+        if not disconnected.done():
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnected.cancel()
+
+
+async def websocket_stream(scope, receive, send, post_id):
+    await wait_for(receive, 'websocket.connect')
+    if not await sync_to_async(Post.objects.filter(pk=post_id).exists)():
+        return await send({'type': 'websocket.close', 'code': 4404})
+    await send({'type': 'websocket.accept'})
+
+    disconnected = asyncio.ensure_future(wait_for(receive, 'websocket.disconnect'))
+    try:
+        async for event in comment_events(post_id, last_event_id(scope), disconnected):
+            if event is not None:
+                await send({'type': 'websocket.send', 'text': json.dumps(event)})
+        if not disconnected.done():
+            # 1013 "try again later": the client fell behind and should resume with last_event_id
+            await send({'type': 'websocket.close', 'code': 1013})
+    finally:
+        disconnected.cancel()
+
+
+async def plain_response(send, status, body):
+    await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', b'text/plain')]})
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,182 @@
+"""
+Rate limiting for write-heavy and abuse-prone endpoints.
+
+Views opt in with ``throttle_scope`` plus one or more of the throttle classes
+below, each keyed on a different identity (user, token, client IP). Rates come
+from ``THROTTLE_RATES`` as ``'<scope>.<kind>': '<count>/<period>'``, e.g.
+``'login.ip': '20/min'``; a scope/kind without a rate is not throttled.
+
+Every check is O(1) and never touches the database:
+
+* MemoryBackend (single process): GCRA, one "theoretical arrival time" per key,
+  updated under a lock. Exact, with bursts of up to the full rate.
+* CacheBackend (several workers): a sliding-window counter over a shared Django
+  cache, two atomic ``incr`` keys per identity (current and previous window),
+  the previous window weighted by how much of it still overlaps.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    '10/min' -> (10, 60)
+    """
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+class MemoryBackend:
+    """
+    In-process GCRA limiter with a bounded number of tracked keys
+    """
+    def __init__(self, maxsize=100000):
+        self._arrivals = OrderedDict()
+        self._lock = threading.Lock()
+        self.maxsize = maxsize
+
+    def hit(self, key, count, period):
+        """
+        Record a request; returns 0 if allowed, else seconds until one would be
+        """
+        interval = period / count
+        now = time.monotonic()
+        with self._lock:
+            arrival = max(self._arrivals.get(key, now), now)
+            allowed_at = arrival + interval - period
+            if now < allowed_at:
+                return allowed_at - now
+            self._arrivals[key] = arrival + interval
+            self._arrivals.move_to_end(key)
+            # Evicting the least recently seen keys can only make the limiter more lenient
+            while len(self._arrivals) > self.maxsize:
+                self._arrivals.popitem(last=False)
+        return 0
+
+
+class CacheBackend:
+    """
+    Sliding-window counter over a shared cache (THROTTLE_CACHE), safe across workers
+    """
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+    def hit(self, key, count, period):
+        now = time.time()
+        window = int(now // period)
+        current_key, previous_key = f'throttle:{key}:{window}', f'throttle:{key}:{window - 1}'
+        # Count the hit first and judge the post-increment total, so concurrent
+        # requests can't all pass a check made before any of them was counted
+        current = self.increment(current_key, period * 2)
+        overlap = 1 - (now % period) / period
+        estimate = self.cache.get(previous_key, 0) * overlap + current
+        if estimate > count:
+            # Refused requests don't use up the allowance
+            try:
+                self.cache.decr(current_key)
+            except ValueError:
+                pass
+            # Rough wait: until enough of the previous window has slid out
+            return max(period * (1 - overlap), 1)
+        return 0
+
+    def increment(self, key, timeout):
+        # add() then incr() keeps concurrent first hits from overwriting each other
+        self.cache.add(key, 0, timeout)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr(): start the window again from this hit
+            self.cache.set(key, 1, timeout)
+            return 1
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(getattr(settings, 'THROTTLE_BACKEND', 'social_media_api.throttling.MemoryBackend'))()
+        return _backend
+
+
+@receiver(setting_changed)
+def reset_backend_on_setting_change(setting, **kwargs):
+    global _backend
+    if setting in ('THROTTLE_BACKEND', 'THROTTLE_CACHE', 'THROTTLE_RATES'):
+        with _backend_lock:
+            _backend = None
+
+
+class ScopedThrottle(BaseThrottle):
+    """
+    Base for the per-identity throttles; subclasses set ``kind`` and ``get_identity``
+    """
+    kind = None
+
+    def get_identity(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = getattr(view, 'throttle_scope', None)
+        rate = getattr(settings, 'THROTTLE_RATES', {}).get(f'{scope}.{self.kind}') if scope else None
+        identity = self.get_identity(request) if rate else None
+        if identity is None:
+            return True
+        count, period = parse_rate(rate)
+        wait = get_backend().hit(f'{scope}:{self.kind}:{identity}', count, period)
+        if wait:
+            self.wait_seconds = wait
+            return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserRateThrottle(ScopedThrottle):
+    """
+    Per authenticated user; anonymous requests are left to IPRateThrottle
+    """
+    kind = 'user'
+
+    def get_identity(self, request):
+        return request.user.pk if request.user and request.user.is_authenticated else None
+
+
+class TokenRateThrottle(ScopedThrottle):
+    """
+    Per API token, so one leaked or scripted token can be limited without its owner's other sessions
+    """
+    kind = 'token'
+
+    def get_identity(self, request):
+        key = getattr(request.auth, 'key', None)
+        return hashlib.sha256(key.encode()).hexdigest()[:32] if key else None
+
+
+class IPRateThrottle(ScopedThrottle):
+    """
+    Per client address (honours REST_FRAMEWORK['NUM_PROXIES'])
+    """
+    kind = 'ip'
+
+    def get_identity(self, request):
+        return self.get_ident(request)
@@ -21,4 +21,6 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('accounts.urls')),
     path('api/posts/', include('posts.urls')),
+    path('api/feed/', include('timeline.urls')),
+    path('api/notifications/', include('notifications.urls')),
 ]
@@ -0,0 +1,46 @@
+from django.db import models
+from django.db.models import CASCADE
+from django.conf import settings
+
+
+# Materialized home timelines (fan-out-on-write)
+
+class TimelineEntry(models.Model):
+    """
+    One row of a user's precomputed home timeline.
+
+    The post's ``created_at`` is copied onto the entry so a home feed is a single
+    range scan over (user, created_at, post) without joining back to posts.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey('posts.Post', on_delete=CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=CASCADE, related_name='+')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at', '-post_id']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='timeline_unique_user_post'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='timeline_user_recent_idx'),
+            models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} <- post {self.post_id}'
+
+
+class HighFollowerAuthor(models.Model):
+    """
+    Authors whose posts are merged into feeds at read time instead of being fanned out.
+
+    An author is promoted here the first time they post with at least
+    ``TIMELINE_FANOUT_THRESHOLD`` followers. They stay on the read path afterwards so
+    posts that were never fanned out remain reachable from their followers' feeds.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=CASCADE, primary_key=True, related_name='+')
+    promoted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return str(self.user_id)
@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+from posts.models import Post
+from .models import TimelineEntry, HighFollowerAuthor
+
+
+# FAN-OUT-ON-WRITE / FAN-OUT-ON-READ TIMELINE SERVICES
+
+FANOUT_BATCH_SIZE = 1000
+
+
+def fanout_threshold():
+    return getattr(settings, 'TIMELINE_FANOUT_THRESHOLD', 10000)
+
+
+def _follows():
+    # Through table of CustomUser.followers: from_customuser is followed by to_customuser
+    return get_user_model().followers.through.objects
+
+
+def _beyond(position, newer=False, id_field='post_id'):
+    """
+    Keyset filter for rows strictly older (or ``newer``) than ``position`` = (created_at, post id)
+    """
+    created_at, post_id = position
+    lookup = 'gt' if newer else 'lt'
+    return Q(**{f'created_at__{lookup}': created_at}) | Q(created_at=created_at, **{f'{id_field}__{lookup}': post_id})
+
+
+def fanout_post(post_id):
+    """
+    Copy a new post into the timelines of its author and all of their followers.
+
+    Authors with at least ``TIMELINE_FANOUT_THRESHOLD`` followers are promoted to
+    the read path instead, and their followers pick the post up in ``home_timeline``.
+    """
+    post = Post.objects.filter(pk=post_id).values('id', 'author_id', 'created_at').first()
+    if post is None:
+        return 0
+
+    def entry(user_id):
+        return TimelineEntry(user_id=user_id, post_id=post['id'], author_id=post['author_id'], created_at=post['created_at'])
+
+    TimelineEntry.objects.bulk_create([entry(post['author_id'])], ignore_conflicts=True)
+
+    if HighFollowerAuthor.objects.filter(user_id=post['author_id']).exists():
+        return 1
+    followers_count = get_user_model().objects.filter(pk=post['author_id']).values_list('followers_count', flat=True).first()
+    if (followers_count or 0) >= fanout_threshold():
+        HighFollowerAuthor.objects.get_or_create(user_id=post['author_id'])
+        return 1
+
+    follower_ids = _follows().filter(from_customuser_id=post['author_id']).values_list('to_customuser_id', flat=True)
+
+    written = 1
+    batch = []
+    for follower_id in follower_ids.iterator(chunk_size=FANOUT_BATCH_SIZE):
+        batch.append(entry(follower_id))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            written += len(batch)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        written += len(batch)
+    return written
+
+
+def fanout_posts(post_ids):
+    """
+    fanout_post for each of ``post_ids``, e.g. after a bulk import
+    """
+    return sum(fanout_post(post_id) for post_id in post_ids)
+
+
+def backfill_follow(follower_id, followee_id):
+    """
+    Seed a new follower's timeline with the followee's most recent posts
+    """
+    if HighFollowerAuthor.objects.filter(user_id=followee_id).exists():
+        return 0
+    size = getattr(settings, 'TIMELINE_BACKFILL_SIZE', 50)
+    recent = Post.objects.filter(author_id=followee_id).order_by('-created_at', '-id').values_list('id', 'created_at')[:size]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=follower_id, post_id=post_id, author_id=followee_id, created_at=created_at)
+            for post_id, created_at in recent
+        ],
+        ignore_conflicts=True,
+    )
+    return len(recent)
+
+
+def prune_follow(follower_id, followee_id):
+    """
+    Remove an unfollowed author's posts from the former follower's timeline
+    """
+    deleted, _ = TimelineEntry.objects.filter(user_id=follower_id, author_id=followee_id).delete()
+    return deleted
+
+
+def home_timeline(user, limit, before=None, after=None):
+    """
+    Return up to ``limit`` post ids for ``user``'s home feed, newest first.
+
+    Materialized entries are read with one range scan over the timeline index and
+    merged with recent posts from followed high-follower authors. ``before`` is an
+    optional (created_at, post_id) keyset position to continue from; ``after``
+    pages backwards instead, returning the ``limit`` entries just newer than it.
+    """
+    position, newer = (after, True) if after is not None else (before, False)
+    # Read towards the position's far side: nearest first
+    direction = '' if newer else '-'
+    entries = TimelineEntry.objects.filter(user=user)
+    if position is not None:
+        entries = entries.filter(_beyond(position, newer))
+    rows = list(entries.order_by(f'{direction}created_at', f'{direction}post_id').values_list('created_at', 'post_id')[:limit])
+
+    followed = _follows().filter(to_customuser_id=user.pk).values('from_customuser_id')
+    read_path_authors = list(HighFollowerAuthor.objects.filter(user_id__in=followed).values_list('user_id', flat=True))
+    if read_path_authors:
+        posts = Post.objects.filter(author_id__in=read_path_authors)
+        if position is not None:
+            posts = posts.filter(_beyond(position, newer, id_field='id'))
+        rows.extend(posts.order_by(f'{direction}created_at', f'{direction}id').values_list('created_at', 'id')[:limit])
+        rows = sorted(set(rows), reverse=not newer)
+
+    return sorted(rows[:limit], reverse=True)
@@ -0,0 +1,16 @@
+from django.dispatch import receiver
+
+from accounts.signals import follows_changed
+from . import services
+from .tasks import enqueue
+
+
+@receiver(follows_changed)
+def sync_timelines_on_follow(sender, added, removed, **kwargs):
+    """
+    Keep materialized timelines in step with follows and unfollows
+    """
+    for follower_id, followee_id in added:
+        enqueue(services.backfill_follow, follower_id, followee_id)
+    for follower_id, followee_id in removed:
+        enqueue(services.prune_follow, follower_id, followee_id)
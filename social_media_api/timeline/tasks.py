@@ -0,0 +1,47 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+# BACKGROUND WORKER POOL FOR TIMELINE FAN-OUT
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'TIMELINE_WORKERS', 4),
+                thread_name_prefix='timeline',
+            )
+        return _executor
+
+
+def _run(func, *args):
+    close_old_connections()
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("Timeline task %s%r failed", func.__name__, args)
+    finally:
+        connections.close_all()
+
+
+def enqueue(func, *args):
+    """
+    Run ``func(*args)`` once the current transaction commits.
+
+    With ``TIMELINE_ASYNC`` enabled (the default) the call is handed to the background
+    worker pool so the request that triggered it never waits on the fan-out.
+    """
+    if getattr(settings, 'TIMELINE_ASYNC', True):
+        transaction.on_commit(lambda: _get_executor().submit(_run, func, *args))
+    else:
+        transaction.on_commit(lambda: func(*args))
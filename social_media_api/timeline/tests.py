@@ -0,0 +1,105 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts.models import CustomUser
+from posts.models import Post
+from social_media_api.pagination import KeysetPagination
+from .models import TimelineEntry, HighFollowerAuthor
+
+
+@override_settings(TIMELINE_ASYNC=False, TIMELINE_FANOUT_THRESHOLD=3)
+class HomeTimelineTests(APITestCase):
+    def setUp(self):
+        """Setup test data"""
+        self.author = CustomUser.objects.create_user(username='author', password='authorpass123')
+        self.reader = CustomUser.objects.create_user(username='reader', password='readerpass123')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.followers.add(self.reader)
+
+    def create_post(self, user, title):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('posts:post-list'), {'title': title, 'content': 'Body'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Post.objects.get(pk=response.data['id'])
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """Test creating a post writes timeline entries for the author and followers"""
+        post = self.create_post(self.author, 'Hello')
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(post=post).values_list('user_id', flat=True)),
+            {self.author.id, self.reader.id},
+        )
+
+        self.client.force_authenticate(self.reader)
+        response = self.client.get(reverse('timeline:home'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']], [post.id])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Test following seeds recent posts and unfollowing removes them"""
+        other = CustomUser.objects.create_user(username='other', password='otherpass123')
+        post = self.create_post(other, 'Earlier post')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reader.following.add(other)
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reader.following.remove(other)
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+
+    def test_pages_walk_forward_and_back(self):
+        """Test next links walk older and previous links walk back to the newest page"""
+        posts = [self.create_post(self.author, f'Post {i}') for i in range(3)]
+        newest_first = [post.id for post in reversed(posts)]
+        self.client.force_authenticate(self.reader)
+
+        pages, response = [], self.client.get(reverse('timeline:home'), {'page_size': 1})
+        while True:
+            pages.append([item['id'] for item in response.data['results']])
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(pages, [[post_id] for post_id in newest_first])
+
+        back = []
+        while response.data['previous'] is not None:
+            response = self.client.get(response.data['previous'])
+            back.append([item['id'] for item in response.data['results']])
+        self.assertEqual(back, [[newest_first[1]], [newest_first[0]]])
+
+    def test_out_of_range_cursor_is_rejected(self):
+        """Test a forged cursor with an id past 64 bits is a 404, not a server error"""
+        self.client.force_authenticate(self.reader)
+        cursor = KeysetPagination().encode_cursor(['2024-01-01T00:00:00Z', 10 ** 30])
+        response = self.client.get(reverse('timeline:home'), {'cursor': cursor})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_high_follower_author_is_merged_at_read_time(self):
+        """Test authors above the threshold are read from posts instead of fanned out"""
+        for name in ['fan1', 'fan2']:
+            self.author.followers.add(CustomUser.objects.create_user(username=name, password='fanpass123'))
+        older = self.create_post(self.reader, 'Own post')
+        post = self.create_post(self.author, 'Big announcement')
+
+        self.assertTrue(HighFollowerAuthor.objects.filter(user=self.author).exists())
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+
+        self.client.force_authenticate(self.reader)
+        response = self.client.get(reverse('timeline:home'))
+        self.assertEqual([item['id'] for item in response.data['results']], [post.id, older.id])
+
+        response = self.client.get(reverse('timeline:home'), {'page_size': 1})
+        self.assertEqual([item['id'] for item in response.data['results']], [post.id])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['id'] for item in response.data['results']], [older.id])
+        self.assertIsNone(response.data['next'])
+
+        # And back again, through the previous links
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([item['id'] for item in response.data['results']], [post.id])
+        self.assertIsNone(response.data['previous'])
+        self.assertIsNotNone(response.data['next'])
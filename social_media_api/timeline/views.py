@@ -0,0 +1,38 @@
+from rest_framework import generics, permissions
+
+from posts.models import Post
+from posts.queries import post_queryset
+from posts.serializers import PostSerializer
+from posts.views import ReactionContextMixin
+from . import services
+
+
+class HomeTimelineView(ReactionContextMixin, generics.ListAPIView):
+    """
+    Home feed of posts from the accounts the current user follows, newest first.
+    Paginated with the same opaque (created_at, id) cursors as the post list,
+    in both directions.
+    """
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request, *args, **kwargs):
+        paginator = self.paginator
+        paginator.request = request
+        page_size = paginator.get_page_size(request)
+        position, reverse = paginator.decode_cursor(request, Post, ['created_at', 'id'])
+
+        if reverse:
+            rows = services.home_timeline(request.user, page_size + 1, after=position)
+        else:
+            rows = services.home_timeline(request.user, page_size + 1, before=position)
+        has_more = len(rows) > page_size
+        # The extra row is the one farthest from the cursor: the newest when paging back
+        rows = rows[-page_size:] if reverse else rows[:page_size]
+
+        posts = post_queryset().in_bulk([post_id for _, post_id in rows])
+        ordered = [posts[post_id] for _, post_id in rows if post_id in posts]
+
+        paginator.set_links([rows[0], rows[-1]] if rows else None, position, reverse, has_more)
+        serializer = self.get_serializer(ordered, many=True)
+        return paginator.get_paginated_response(serializer.data)